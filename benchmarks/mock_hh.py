@@ -0,0 +1,235 @@
+"""Локальная имитация API hh.ru для бенчмарков загрузки.
+
+Отвечает на /vacancies (пагинация, лимит глубины 2000, кластеры по регионам, date_from/date_to),
+/vacancies/{id}, /employers, /employers/{id} и /dictionaries данными SyntheticDataset. Задержка ответа и доля
+ответов 503/429 настраиваются. Клиент проекта направляется сюда переменной HH_API_BASE_URL (кэш, архив
+и результаты поиска работодателей для этого адреса хранятся отдельно от данных api.hh.ru):
+
+    python -m benchmarks.mock_hh --scale 10k --port 8080 --latency-ms 50
+    HH_API_BASE_URL=http://127.0.0.1:8080 python main.py load --ids-file bench_employers.txt
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+from benchmarks.synthetic import SCALES, SyntheticDataset
+from core.services.api import MAX_SEARCH_DEPTH
+from core.services.currency import CURRENCY_FIXTURE_PATH
+
+
+class MockHHServer:
+    """Многопоточный HTTP-сервер с данными синтетического набора"""
+
+    def __init__(
+        self,
+        dataset: SyntheticDataset,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.dataset = dataset
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        with open(CURRENCY_FIXTURE_PATH, "r", encoding="utf-8") as f:
+            self.dictionaries = json.load(f)
+        self.httpd = ThreadingHTTPServer((host, port), MockHHHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockHHServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-hh", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def failure(self) -> Optional[int]:
+        """Код искусственного сбоя для очередного запроса (None — отвечать нормально)"""
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                return 503
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.errors += 1
+                return 429
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+    def search_vacancies(self, query: Dict[str, str], path: str) -> Tuple[int, Dict]:
+        """Ответ /vacancies: фильтры employer_id, area, date_from/date_to, страницы и кластеры"""
+        per_page = int(query.get("per_page", 20))
+        page = int(query.get("page", 0))
+        if per_page and (page + 1) * per_page > MAX_SEARCH_DEPTH:
+            return 400, {"errors": [{"type": "bad_argument", "value": "page"}]}
+
+        employer_ids = query.get("employer_id")
+        if employer_ids is None:
+            # Без работодателя отвечаем только на проверку соединения (per_page=0)
+            return 200, {"found": self.dataset.vacancy_count, "pages": 0, "per_page": per_page, "page": 0, "items": []}
+
+        index = self.dataset.employer_index(employer_ids)
+        vacancies = self.dataset.employer_vacancies(index) if index is not None else []
+        area = query.get("area")
+        date_from = datetime.fromisoformat(query["date_from"]) if "date_from" in query else None
+        date_to = datetime.fromisoformat(query["date_to"]) if "date_to" in query else None
+        matched = [
+            (area_id, item)
+            for published, area_id, item in vacancies
+            if (area is None or area_id == area)
+            and (date_from is None or published >= date_from)
+            and (date_to is None or published < date_to)
+        ]
+
+        found = len(matched)
+        pages = min(math.ceil(found / per_page), MAX_SEARCH_DEPTH // per_page) if per_page else 0
+        body = {
+            "found": found,
+            "pages": pages,
+            "per_page": per_page,
+            "page": page,
+            "items": [item for _, item in matched[page * per_page : (page + 1) * per_page]],
+        }
+        if query.get("clusters") == "true":
+            body["clusters"] = [{"id": "area", "name": "Регион", "items": self._area_cluster(matched, query, path)}]
+        return 200, body
+
+    def _area_cluster(self, matched: List[Tuple[str, Dict]], query: Dict[str, str], path: str) -> List[Dict]:
+        counts: Dict[str, int] = {}
+        names: Dict[str, str] = {}
+        for area_id, item in matched:
+            counts[area_id] = counts.get(area_id, 0) + 1
+            names[area_id] = item["area"]["name"]
+        base = {key: value for key, value in query.items() if key not in ("clusters", "per_page", "page")}
+        return [
+            {
+                "id": area_id,
+                "name": names[area_id],
+                "count": count,
+                "url": f"{self.url}{path}?{urlencode({**base, 'area': area_id})}",
+            }
+            for area_id, count in sorted(counts.items(), key=lambda entry: -entry[1])
+        ]
+
+    def search_employers(self, query: Dict[str, str]) -> Dict:
+        """Ответ /employers: поиск по подстроке названия"""
+        text = query.get("text", "").lower()
+        per_page = int(query.get("per_page", 20))
+        page = int(query.get("page", 0))
+        matched = [i for i, name in enumerate(self.dataset.employer_names) if text in name.lower()]
+        items = [self.dataset.employer(i) for i in matched[page * per_page : (page + 1) * per_page]]
+        return {"found": len(matched), "pages": math.ceil(len(matched) / per_page) if per_page else 0, "items": items}
+
+
+class MockHHHandler(BaseHTTPRequestHandler):
+    """Маршрутизация запросов к MockHHServer"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - сигнатура BaseHTTPRequestHandler
+        pass
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # noqa: N802 - имя задаёт BaseHTTPRequestHandler
+        mock: MockHHServer = self.server.mock
+        if mock.latency:
+            time.sleep(mock.latency)
+        failure = mock.failure()
+        if failure == 429:
+            return self._send(429, {"errors": [{"type": "too_many_requests"}]}, {"Retry-After": "0"})
+        if failure:
+            return self._send(failure, {"errors": [{"type": "service_unavailable"}]})
+
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.path.rstrip("/")
+        if path == "/vacancies":
+            return self._send(*mock.search_vacancies(query, path))
+        if path.startswith("/vacancies/"):
+            number = mock.dataset.vacancy_number(path.rsplit("/", 1)[1])
+            if number is None:
+                return self._send(404, {"errors": [{"type": "not_found"}]})
+            return self._send(200, mock.dataset.vacancy_details(number))
+        if path == "/employers":
+            return self._send(200, mock.search_employers(query))
+        if path.startswith("/employers/"):
+            index = mock.dataset.employer_index(path.rsplit("/", 1)[1])
+            if index is None:
+                return self._send(404, {"errors": [{"type": "not_found"}]})
+            return self._send(200, mock.dataset.employer(index))
+        if path == "/dictionaries":
+            return self._send(200, mock.dictionaries)
+        return self._send(404, {"errors": [{"type": "not_found"}]})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальная имитация API hh.ru")
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--ids-file", help="записать ID работодателей набора в файл (формат employers.txt)")
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(SCALES[args.scale], seed=args.seed)
+    if args.ids_file:
+        dataset.write_ids_file(args.ids_file)
+    server = MockHHServer(
+        dataset, args.host, args.port, args.latency_ms / 1000, args.error_rate, args.rate_limit_rate, args.seed
+    )
+    print(f"Mock hh.ru: {server.url} ({len(dataset.employer_ids)} работодателей, {dataset.vacancy_count} вакансий)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""Бенчмарки загрузки: сквозная загрузка через имитацию API, этапы и задержки запросов DBManager.
+
+Запуск (нужна локальная PostgreSQL с параметрами из database.ini; БД бенчмарка пересоздаётся):
+
+    python -m benchmarks.run --scale 10k --workers 8
+    python -m benchmarks.run --scale 1m --seed-only        # без API: прямая запись и запросы
+
+Результаты сохраняются в benchmarks/results/<время>_<масштаб>.json и сравниваются
+с предыдущим запуском того же масштаба; заметные ухудшения выводятся как регрессии.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from benchmarks.synthetic import SCALES, SyntheticDataset
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# БД бенчмарка удаляется целиком, поэтому её имя обязано начинаться с этого префикса
+BENCH_DB_PREFIX = "career_bench"
+# Рабочие БД: удалять их бенчмарк не должен даже при подходящем имени
+PROTECTED_DATABASES = ("career_db", "postgres", "template0", "template1")
+
+# Методы, время которых замеряется как этапы загрузки
+STAGES = (
+    ("core.services.api", "HeadHunterAPI", "_request", "api.request"),
+    ("core.services.api", "HeadHunterAPI", "get_employer_info", "api.get_employer_info"),
+    ("core.services.api", "HeadHunterAPI", "_fetch_vacancy_page", "api.fetch_vacancy_page"),
+    ("core.services.api", "HeadHunterAPI", "get_vacancy_details", "api.get_vacancy_details"),
+    ("core.database.db_manager", "DBManager", "save_employers_bulk", "db.save_employers_bulk"),
+    ("core.database.db_manager", "DBManager", "save_vacancies_bulk", "db.save_vacancies_bulk"),
+    ("core.database.db_manager", "DBManager", "close_missing_vacancies", "db.close_missing_vacancies"),
+    ("core.database.db_manager", "DBManager", "refresh_stats", "db.refresh_stats"),
+    ("core.database.db_manager", "DBManager", "save_vacancy_details_bulk", "db.save_vacancy_details_bulk"),
+)
+
+# Запросы DBManager: имя → вызов (результат материализуется, чтобы замерить полную выборку)
+QUERIES: Dict[str, Callable] = {
+    "get_companies_and_vacancies_count": lambda db: db.get_companies_and_vacancies_count(),
+    "get_salary_stats": lambda db: db.get_salary_stats(),
+    "get_avg_salary": lambda db: db.get_avg_salary(),
+    "get_all_vacancies": lambda db: db.get_all_vacancies(),
+    "get_vacancies_with_higher_salary": lambda db: db.get_vacancies_with_higher_salary(),
+    "get_vacancies_with_keyword": lambda db: db.get_vacancies_with_keyword("python"),
+    "search_vacancies": lambda db: list(db.search_vacancies("senior python, golang", limit=20)),
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def describe(samples: List[float]) -> Dict[str, float]:
+    """Сводка по замерам в миллисекундах"""
+    return {
+        "count": len(samples),
+        "total_ms": round(sum(samples) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "max_ms": round(max(samples, default=0.0) * 1000, 3),
+    }
+
+
+class StageTimer:
+    """Замеряет время вызовов методов классов на время бенчмарка (исходные методы восстанавливаются)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def _wrap(self, function: Callable, stage: str) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+
+        return timed
+
+    def __enter__(self):
+        for module_name, class_name, attribute, stage in STAGES:
+            owner = getattr(__import__(module_name, fromlist=[class_name]), class_name)
+            original = vars(owner)[attribute]
+            self._patched.append((owner, attribute, original))
+            setattr(owner, attribute, self._wrap(original, stage))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for owner, attribute, original in reversed(self._patched):
+            setattr(owner, attribute, original)
+        self._patched.clear()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {stage: describe(samples) for stage, samples in sorted(self.samples.items())}
+
+
+def check_bench_database(db_name: str) -> None:
+    """Проверяет, что БД можно удалить: имя с префиксом бенчмарка и не совпадает с рабочей БД из database.ini"""
+    from core.utils.config_loader import get_db_config
+
+    if db_name.startswith(BENCH_DB_PREFIX):
+        config = get_db_config()
+        if db_name not in {*PROTECTED_DATABASES, config.get("dbname"), config.get("database")}:
+            return
+    raise ValueError(
+        f"БД {db_name} не может быть БД бенчмарка: она удаляется, нужно имя с префиксом {BENCH_DB_PREFIX},"
+        f" отличное от рабочей БД"
+    )
+
+
+def drop_database(db_name: str) -> None:
+    """Удаляет БД бенчмарка вместе с активными подключениями"""
+    import psycopg2
+    from core.database.pool import close_pools
+    from core.utils.config_loader import get_db_config
+
+    check_bench_database(db_name)
+    close_pools()
+    conn = psycopg2.connect(**{**get_db_config(), "dbname": "postgres"})
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{db_name}" WITH (FORCE)')
+    finally:
+        conn.close()
+
+
+def recreate_database(db_name: str) -> None:
+    """Пересоздаёт БД бенчмарка с актуальной схемой"""
+    from core.database.db_handler import initialize_database
+
+    drop_database(db_name)
+    if not initialize_database(db_name):
+        raise RuntimeError(f"Не удалось создать БД {db_name}")
+
+
+@contextmanager
+def mock_api(dataset: SyntheticDataset, latency: float, error_rate: float):
+    """Поднимает имитацию API и направляет на неё клиент проекта (без дискового кэша и архива ответов)"""
+    from benchmarks.mock_hh import MockHHServer
+
+    saved = {key: os.environ.get(key) for key in ("HH_API_BASE_URL", "HH_CACHE", "HH_ARCHIVE")}
+    with MockHHServer(dataset, latency=latency, error_rate=error_rate) as server:
+        os.environ["HH_API_BASE_URL"] = server.url
+        os.environ["HH_CACHE"] = "0"
+        os.environ["HH_ARCHIVE"] = "0"
+        try:
+            yield server
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def bench_load(dataset: SyntheticDataset, args) -> Dict:
+    """Сквозная загрузка работодателей через DataProcessor и имитацию API"""
+    from core.services.data_processor import DataProcessor
+    from core.services.rate_limiter import TokenBucket
+    from core.utils.metrics import REGISTRY
+
+    employer_ids = dataset.employer_ids[: args.employers] if args.employers else dataset.employer_ids
+    with mock_api(dataset, args.latency_ms / 1000, args.error_rate) as server:
+        processor = DataProcessor(args.db_name, workers=args.workers)
+        # Лимит частоты живого API здесь не нужен: измеряется пропускная способность самого кода
+        processor.api.rate_limiter = TokenBucket(args.requests_per_second)
+        processor.api.backoff_base = 0.01
+        # Синтетические названия не должны попадать в сохранённый индекс работодателей
+        processor.api.employer_index.cache_path = None
+
+        REGISTRY.reset()
+        with StageTimer() as stages:
+            started = time.perf_counter()
+            ok = processor.load_by_ids(employer_ids)
+            elapsed = time.perf_counter() - started
+            if args.enrich:
+                processor.enrich(employer_ids)
+
+    summary = processor.last_summary.to_dict() if processor.last_summary else {}
+    enrichment = processor.last_enrichment.to_dict() if processor.last_enrichment else None
+    return {
+        "ok": ok,
+        "employers": len(employer_ids),
+        "elapsed_seconds": round(elapsed, 3),
+        "employers_per_second": round(len(employer_ids) / elapsed, 3),
+        "vacancies_per_second": round(summary.get("vacancies_found", 0) / elapsed, 3),
+        "summary": summary,
+        "enrichment": enrichment,
+        "api": server.stats(),
+        "stages": stages.report(),
+        # Встроенные метрики приложения: задержка HTTP по эндпоинтам, разбор, строки пакетов
+        "metrics": REGISTRY.summary(),
+    }
+
+
+def bench_seed(dataset: SyntheticDataset, args) -> Dict:
+    """Прямая запись набора в БД пакетными методами DBManager (без API)"""
+    from core.database.db_manager import DBManager
+    from core.services.currency import CurrencyConverter
+
+    converter = CurrencyConverter.from_fixture()
+    written = 0
+    with DBManager(args.db_name) as db, StageTimer() as stages:
+        started = time.perf_counter()
+        for employers, vacancies in dataset.iter_models():
+            for vacancy in vacancies:
+                vacancy.salary_rub_mid = converter.salary_mid_rub(vacancy)
+            db.save_employers_bulk(employers)
+            db.save_vacancies_bulk(vacancies)
+            written += len(vacancies)
+        db.refresh_stats()
+        elapsed = time.perf_counter() - started
+    return {
+        "vacancies": written,
+        "elapsed_seconds": round(elapsed, 3),
+        "vacancies_per_second": round(written / elapsed, 3),
+        "stages": stages.report(),
+    }
+
+
+def bench_queries(args) -> Dict[str, Dict[str, float]]:
+    """Задержка каждого запроса DBManager (первый вызов — прогрев, не учитывается)"""
+    from core.database.db_manager import DBManager
+
+    results = {}
+    with DBManager(args.db_name) as db:
+        for name, query in QUERIES.items():
+            query(db)
+            samples = []
+            for _ in range(args.query_repeats):
+                started = time.perf_counter()
+                query(db)
+                samples.append(time.perf_counter() - started)
+            results[name] = describe(samples)
+    return results
+
+
+def key_metrics(result: Dict) -> Dict[str, Dict]:
+    """Показатели для сравнения запусков: значение и направление улучшения"""
+    metrics = {}
+    if "load" in result:
+        metrics["load.vacancies_per_second"] = {"value": result["load"]["vacancies_per_second"], "better": "higher"}
+        metrics["load.employers_per_second"] = {"value": result["load"]["employers_per_second"], "better": "higher"}
+        enrichment = result["load"].get("enrichment")
+        if enrichment and enrichment["elapsed_seconds"]:
+            metrics["enrich.vacancies_per_second"] = {
+                "value": round(enrichment["enriched"] / enrichment["elapsed_seconds"], 3),
+                "better": "higher",
+            }
+        for stage, stats in result["load"]["stages"].items():
+            metrics[f"stage.{stage}.p50_ms"] = {"value": stats["p50_ms"], "better": "lower"}
+    if "seed" in result:
+        metrics["seed.vacancies_per_second"] = {"value": result["seed"]["vacancies_per_second"], "better": "higher"}
+    for name, stats in result.get("queries", {}).items():
+        metrics[f"query.{name}.p50_ms"] = {"value": stats["p50_ms"], "better": "lower"}
+    return metrics
+
+
+def compare(current: Dict[str, Dict], previous: Dict[str, Dict], threshold: float) -> List[Dict]:
+    """Показатели, ухудшившиеся больше чем на threshold относительно прошлого запуска"""
+    regressions = []
+    for name, metric in current.items():
+        old = previous.get(name, {}).get("value")
+        new = metric["value"]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change < -threshold if metric["better"] == "higher" else change > threshold
+        if worse:
+            regressions.append({"metric": name, "previous": old, "current": new, "change": round(change, 3)})
+    return regressions
+
+
+def latest_result(results_dir: str, scale: str) -> Optional[Dict]:
+    paths = sorted(glob.glob(os.path.join(results_dir, f"*_{scale}.json")))
+    if not paths:
+        return None
+    with open(paths[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL)
+        return output.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки загрузки и запросов к БД")
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--db-name", default=BENCH_DB_PREFIX, help=f"БД бенчмарка (пересоздаётся, имя с префиксом {BENCH_DB_PREFIX})"
+    )
+    parser.add_argument("--keep-db", action="store_true", help="не удалять БД после запуска")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--employers", type=int, help="загружать только первых N работодателей набора")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="задержка ответа имитации API")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503 имитации API")
+    parser.add_argument("--requests-per-second", type=float, default=10_000.0)
+    parser.add_argument("--seed-only", action="store_true", help="записать набор напрямую, без API")
+    parser.add_argument("--enrich", action="store_true", help="после загрузки получить подробности вакансий")
+    parser.add_argument("--query-repeats", type=int, default=5)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое ухудшение (доля)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+    try:
+        check_bench_database(args.db_name)
+    except ValueError as e:
+        parser.error(str(e))
+
+    dataset = SyntheticDataset(SCALES[args.scale], seed=args.seed)
+    result = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "params": {
+            key: value for key, value in vars(args).items() if key not in ("results_dir", "fail_on_regression")
+        },
+        "dataset": {"employers": len(dataset.employer_ids), "vacancies": dataset.vacancy_count},
+    }
+
+    recreate_database(args.db_name)
+    try:
+        if args.seed_only:
+            result["seed"] = bench_seed(dataset, args)
+        else:
+            result["load"] = bench_load(dataset, args)
+        result["queries"] = bench_queries(args)
+    finally:
+        if not args.keep_db:
+            drop_database(args.db_name)
+
+    previous = latest_result(args.results_dir, args.scale)
+    result["metrics"] = key_metrics(result)
+    result["regressions"] = compare(result["metrics"], previous["metrics"], args.threshold) if previous else []
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{datetime.now():%Y%m%d_%H%M%S}_{args.scale}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 Результаты: {path}")
+    for name, metric in result["metrics"].items():
+        print(f"   {name}: {metric['value']}")
+    for regression in result["regressions"]:
+        print(f"⚠️ Регрессия {regression['metric']}: {regression['previous']} → {regression['current']}"
+              f" ({regression['change']:+.1%})")
+    return 1 if result["regressions"] and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
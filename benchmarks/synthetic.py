@@ -0,0 +1,235 @@
+"""Генератор синтетических работодателей и вакансий в формате API hh.ru.
+
+Данные детерминированы (seed) и создаются по требованию: вакансия с номером k всегда одинакова,
+поэтому даже набор на 1 млн вакансий не держится в памяти целиком.
+"""
+
+import random
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from core.data_models.employer import Employer
+from core.data_models.vacancy import Vacancy
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# (ID региона hh.ru, название, вес)
+AREAS = (
+    ("1", "Москва", 45),
+    ("2", "Санкт-Петербург", 20),
+    ("3", "Екатеринбург", 8),
+    ("4", "Новосибирск", 7),
+    ("88", "Казань", 6),
+    ("66", "Нижний Новгород", 5),
+    ("113", "Россия", 9),
+)
+ROLES = (
+    "Python-разработчик",
+    "Backend developer",
+    "Frontend developer",
+    "Java developer",
+    "Golang developer",
+    "Аналитик данных",
+    "Data Scientist",
+    "DevOps-инженер",
+    "Тестировщик",
+    "Системный администратор",
+    "Менеджер проектов",
+    "Product manager",
+    "Бухгалтер",
+    "Менеджер по продажам",
+    "Оператор call-центра",
+)
+LEVELS = ("Junior", "Middle", "Senior", "Lead", "Ведущий", "Старший", "")
+REQUIREMENTS = (
+    "Опыт коммерческой разработки от 3 лет",
+    "Знание SQL и PostgreSQL",
+    "Опыт работы с Docker и Kubernetes",
+    "Уверенное знание Python, asyncio",
+    "Понимание принципов REST и микросервисной архитектуры",
+    "Опыт работы с Kafka или RabbitMQ",
+    "Знание Excel, 1С",
+    "Грамотная речь, клиентоориентированность",
+)
+SKILLS = (
+    "Python",
+    "SQL",
+    "PostgreSQL",
+    "Docker",
+    "Kubernetes",
+    "Git",
+    "Linux",
+    "Django",
+    "FastAPI",
+    "Kafka",
+    "Java",
+    "Spring Framework",
+    "Golang",
+    "React",
+    "TypeScript",
+    "MS Excel",
+    "1С: Бухгалтерия",
+    "Английский язык",
+    "Деловая переписка",
+    "Активные продажи",
+)
+# Справочные значения /vacancies/{id}: (ID, название)
+EXPERIENCE = (("noExperience", "Нет опыта"), ("between1And3", "От 1 года до 3 лет"), ("between3And6", "От 3 до 6 лет"))
+SCHEDULES = (("fullDay", "Полный день"), ("remote", "Удаленная работа"), ("flexible", "Гибкий график"))
+EMPLOYMENT = (("full", "Полная занятость"), ("part", "Частичная занятость"), ("project", "Проектная работа"))
+# (валюта, вес, множитель зарплаты относительно рублёвой)
+CURRENCIES = (("RUR", 85, 1.0), ("USD", 8, 0.0115), ("EUR", 4, 0.0105), ("KZT", 3, 5.6))
+NAME_ROOTS = ("Альфа", "Вектор", "Квант", "Север", "Восток", "Цифра", "Нова", "Гео", "Агро", "Техно", "Медиа")
+NAME_SUFFIXES = ("Софт", "Банк", "Лаб", "Системы", "Групп", "Телеком", "Маркет", "Тех", "Логистик", "Финанс")
+
+FIRST_EMPLOYER_ID = 9_000_000
+FIRST_VACANCY_ID = 500_000_000
+AREA_WEIGHTS = [weight for _, _, weight in AREAS]
+CURRENCY_WEIGHTS = [weight for _, weight, _ in CURRENCIES]
+
+
+class SyntheticDataset:
+    """Синтетический набор: работодатели с распределением размеров «тяжёлый хвост» и их вакансии"""
+
+    __slots__ = ["seed", "created_at", "employer_ids", "employer_names", "offsets", "_vacancies_of"]
+
+    def __init__(
+        self, vacancies: int, seed: int = 42, mean_per_employer: int = 100, max_per_employer: int = 20_000
+    ):
+        self.seed = seed
+        self.created_at = datetime.now().replace(microsecond=0)
+        rng = random.Random(seed)
+        # Размер работодателя ~ Парето(1.2) (среднее 6): крупные работодатели превышают лимит глубины 2000
+        self.offsets = [0]
+        while self.offsets[-1] < vacancies:
+            size = int(rng.paretovariate(1.2) * mean_per_employer / 6) + 1
+            self.offsets.append(self.offsets[-1] + min(size, max_per_employer, vacancies - self.offsets[-1]))
+        count = len(self.offsets) - 1
+        self.employer_ids = [str(FIRST_EMPLOYER_ID + i) for i in range(count)]
+        self.employer_names = [
+            f"{rng.choice(NAME_ROOTS)}{rng.choice(NAME_SUFFIXES)} {i}" if i % 7 else f"{rng.choice(NAME_ROOTS)}{i}"
+            for i in range(count)
+        ]
+        self._vacancies_of = lru_cache(maxsize=128)(self._build_employer_vacancies)
+
+    @property
+    def vacancy_count(self) -> int:
+        return self.offsets[-1]
+
+    def employer_index(self, employer_id: str) -> Optional[int]:
+        try:
+            index = int(employer_id) - FIRST_EMPLOYER_ID
+        except (TypeError, ValueError):
+            return None
+        return index if 0 <= index < len(self.employer_ids) else None
+
+    def employer(self, index: int) -> Dict:
+        """Работодатель в формате /employers/{id}"""
+        employer_id = self.employer_ids[index]
+        area = AREAS[index % len(AREAS)]
+        return {
+            "id": employer_id,
+            "name": self.employer_names[index],
+            "area": {"id": area[0], "name": area[1]},
+            "site_url": f"https://employer{employer_id}.example.com",
+            "alternate_url": f"https://hh.ru/employer/{employer_id}",
+            "open_vacancies": self.offsets[index + 1] - self.offsets[index],
+        }
+
+    def vacancy(self, number: int) -> Dict:
+        """Вакансия с порядковым номером number в формате элемента выдачи /vacancies"""
+        rng = random.Random(self.seed * 1_000_003 + number)
+        employer_index = bisect_right(self.offsets, number) - 1
+        employer_id = self.employer_ids[employer_index]
+        vacancy_id = str(FIRST_VACANCY_ID + number)
+        area = rng.choices(AREAS, weights=AREA_WEIGHTS)[0]
+        published = self.created_at - timedelta(seconds=rng.randint(0, 29 * 24 * 3600))
+
+        salary = None
+        if rng.random() < 0.7:
+            currency, _, multiplier = rng.choices(CURRENCIES, weights=CURRENCY_WEIGHTS)[0]
+            base = rng.lognormvariate(11.7, 0.5) * multiplier
+            low = int(round(base, -3)) or int(base) or 1
+            high = int(low * rng.uniform(1.1, 1.6))
+            form = rng.random()
+            salary = {
+                "from": low if form < 0.8 else None,
+                "to": high if form > 0.4 else None,
+                "currency": currency,
+                "gross": rng.random() < 0.5,
+            }
+
+        return {
+            "id": vacancy_id,
+            "name": f"{rng.choice(LEVELS)} {rng.choice(ROLES)}".strip(),
+            "area": {"id": area[0], "name": area[1]},
+            "salary": salary,
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%S+0300"),
+            "employer": {"id": employer_id, "name": self.employer_names[employer_index]},
+            "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+            "snippet": {
+                "requirement": ". ".join(rng.sample(REQUIREMENTS, 2)),
+                "responsibility": "Разработка и поддержка внутренних сервисов",
+            },
+        }
+
+    def vacancy_number(self, vacancy_id: str) -> Optional[int]:
+        try:
+            number = int(vacancy_id) - FIRST_VACANCY_ID
+        except (TypeError, ValueError):
+            return None
+        return number if 0 <= number < self.vacancy_count else None
+
+    def vacancy_details(self, number: int) -> Dict:
+        """Вакансия в формате /vacancies/{id}: полное описание, ключевые навыки и условия работы"""
+        item = self.vacancy(number)
+        rng = random.Random(self.seed * 2_000_003 + number)
+        experience, schedule, employment = (rng.choice(values) for values in (EXPERIENCE, SCHEDULES, EMPLOYMENT))
+        requirements = "".join(f"<li>{requirement}</li>" for requirement in rng.sample(REQUIREMENTS, 4))
+        return {
+            **item,
+            "description": f"<p>{item['snippet']['responsibility']}.</p><p><strong>Требования:</strong></p>"
+            f"<ul>{requirements}</ul>",
+            "key_skills": [{"name": skill} for skill in rng.sample(SKILLS, rng.randint(0, 7))],
+            "experience": {"id": experience[0], "name": experience[1]},
+            "schedule": {"id": schedule[0], "name": schedule[1]},
+            "employment": {"id": employment[0], "name": employment[1]},
+            "archived": False,
+        }
+
+    def _build_employer_vacancies(self, index: int) -> List[Tuple[datetime, str, Dict]]:
+        vacancies = []
+        for number in range(self.offsets[index], self.offsets[index + 1]):
+            item = self.vacancy(number)
+            published = datetime.strptime(item["published_at"][:19], "%Y-%m-%dT%H:%M:%S")
+            vacancies.append((published, item["area"]["id"], item))
+        return vacancies
+
+    def employer_vacancies(self, index: int) -> List[Tuple[datetime, str, Dict]]:
+        """Вакансии работодателя как (дата публикации, ID региона, вакансия); последние запрошенные кэшируются"""
+        return self._vacancies_of(index)
+
+    def iter_vacancies(self) -> Iterator[Dict]:
+        for number in range(self.vacancy_count):
+            yield self.vacancy(number)
+
+    def iter_models(self, employers_per_batch: int = 50) -> Iterator[Tuple[List[Employer], List[Vacancy]]]:
+        """Пакеты моделей проекта для прямой записи в БД (минуя API)"""
+        for start in range(0, len(self.employer_ids), employers_per_batch):
+            indexes = range(start, min(start + employers_per_batch, len(self.employer_ids)))
+            employers = [Employer.from_api_response(self.employer(i)) for i in indexes]
+            vacancies = [
+                Vacancy.from_api_response(self.vacancy(number))
+                for i in indexes
+                for number in range(self.offsets[i], self.offsets[i + 1])
+            ]
+            yield employers, vacancies
+
+    def write_ids_file(self, path: str, limit: Optional[int] = None) -> int:
+        """Записывает ID работодателей в формате employers.txt"""
+        ids = self.employer_ids[:limit] if limit else self.employer_ids
+        with open(path, "w", encoding="utf-8") as f:
+            for employer_id in ids:
+                f.write(f"{employer_id}    # {self.employer_names[self.employer_index(employer_id)]}\n")
+        return len(ids)
@@ -1,7 +1,21 @@
+import hashlib
+
+
 class Vacancy:
     """Класс для представления вакансии"""
 
-    __slots__ = ["id", "title", "employer_id", "min_salary", "max_salary", "currency", "url", "description"]
+    __slots__ = [
+        "id",
+        "title",
+        "employer_id",
+        "min_salary",
+        "max_salary",
+        "currency",
+        "url",
+        "description",
+        "published_at",
+        "salary_rub_mid",
+    ]
 
     def __init__(
         self,
@@ -13,6 +27,7 @@ class Vacancy:
         currency: str = None,
         url: str = None,
         description: str = None,
+        published_at: str = None,
     ):
         self.id = position_id
         self.title = title
@@ -22,6 +37,39 @@ class Vacancy:
         self.currency = currency
         self.url = url
         self.description = description
+        self.published_at = published_at
+        # Заполняется при загрузке по курсам валют, в хэш содержимого не входит
+        self.salary_rub_mid = None
+
+    def to_db_format(self) -> tuple:
+        """Возвращает данные в формате для вставки в БД"""
+        return (
+            self.id,
+            self.employer_id,
+            self.title,
+            self.min_salary,
+            self.max_salary,
+            self.currency,
+            self.url,
+            self.description,
+            self.published_at,
+            self.content_hash(),
+            self.salary_rub_mid,
+        )
+
+    def content_hash(self) -> str:
+        """Хэш содержимого вакансии для определения изменений при повторной загрузке"""
+        fields = (
+            self.employer_id,
+            self.title,
+            self.min_salary,
+            self.max_salary,
+            self.currency,
+            self.url,
+            self.description,
+            self.published_at,
+        )
+        return hashlib.sha1("\x1f".join("" if f is None else str(f) for f in fields).encode("utf-8")).hexdigest()
 
     def get_avg_salary(self) -> float:
         """Рассчитывает среднюю зарплату"""
@@ -44,4 +92,5 @@ class Vacancy:
             currency=salary.get("currency"),
             url=data.get("alternate_url", ""),
             description=snippet.get("requirement", "") or snippet.get("responsibility", ""),
+            published_at=data.get("published_at"),
         )
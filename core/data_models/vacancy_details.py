@@ -0,0 +1,65 @@
+import html
+import re
+from typing import List, Optional
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def html_to_text(value: Optional[str]) -> str:
+    """Текст описания вакансии без HTML-разметки"""
+    if not value:
+        return ""
+    return " ".join(html.unescape(_TAG_RE.sub(" ", value)).split())
+
+
+def normalize_skill(name: str) -> str:
+    """Ключ навыка: регистр и пробелы не различаются ("Python ", "python" — один навык)"""
+    return " ".join(name.split()).casefold()
+
+
+class VacancyDetails:
+    """Подробности вакансии из /vacancies/{id}: полное описание, ключевые навыки и условия работы"""
+
+    __slots__ = ["vacancy_id", "description", "experience", "schedule", "employment", "key_skills", "source_hash"]
+
+    def __init__(
+        self,
+        vacancy_id: str,
+        description: str = "",
+        experience: str = None,
+        schedule: str = None,
+        employment: str = None,
+        key_skills: List[str] = None,
+        source_hash: str = None,
+    ):
+        self.vacancy_id = vacancy_id
+        self.description = description
+        self.experience = experience
+        self.schedule = schedule
+        self.employment = employment
+        self.key_skills = key_skills or []
+        # content_hash вакансии, для которой получены подробности: по нему видно, что их пора обновить
+        self.source_hash = source_hash
+
+    def to_db_format(self) -> tuple:
+        """Возвращает данные в формате для вставки в vacancy_details"""
+        return (self.vacancy_id, self.description, self.experience, self.schedule, self.employment, self.source_hash)
+
+    @classmethod
+    def from_api_response(cls, data: dict, source_hash: str = None) -> "VacancyDetails":
+        """Создаёт объект из ответа /vacancies/{id}; справочные поля сохраняются как ID (between1And3, fullDay)"""
+        skills = {}
+        for skill in data.get("key_skills") or []:
+            name = " ".join((skill.get("name") or "").split())
+            if name:
+                skills.setdefault(normalize_skill(name), name)
+
+        return cls(
+            vacancy_id=str(data.get("id", "")),
+            description=html_to_text(data.get("description")),
+            experience=(data.get("experience") or {}).get("id"),
+            schedule=(data.get("schedule") or {}).get("id"),
+            employment=(data.get("employment") or {}).get("id"),
+            key_skills=list(skills.values()),
+            source_hash=source_hash,
+        )
@@ -0,0 +1,159 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional
+from core.database.db_manager import (
+    EMPLOYER_UPSERT_CONFLICT,
+    VACANCY_COLUMNS,
+    VACANCY_UPSERT_CONFLICT,
+    BulkSaveResult,
+    record_batch,
+)
+from core.utils.config_loader import get_db_config, get_pool_config
+from core.utils.log import get_logger
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - асинхронный режим необязателен
+    asyncpg = None
+
+logger = get_logger(__name__)
+
+# Типы массивов для unnest(): значения передаются столбцами, по массиву на столбец
+VACANCY_ARRAY_TYPES = (
+    "TEXT[]",
+    "TEXT[]",
+    "TEXT[]",
+    "INTEGER[]",
+    "INTEGER[]",
+    "TEXT[]",
+    "TEXT[]",
+    "TEXT[]",
+    "TIMESTAMPTZ[]",
+    "TEXT[]",
+    "NUMERIC[]",
+)
+
+
+class AsyncDBWriter:
+    """Асинхронная запись работодателей и вакансий в PostgreSQL (asyncpg)"""
+
+    def __init__(self, db_name: str = "career_db"):
+        if asyncpg is None:
+            raise ImportError("Для асинхронной загрузки установите пакет asyncpg")
+        self.db_name = db_name
+        self.pool: Optional["asyncpg.Pool"] = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    async def connect(self) -> None:
+        """Открывает пул асинхронных соединений"""
+        params = get_db_config()
+        pool_config = get_pool_config()
+        self.pool = await asyncpg.create_pool(
+            host=params.get("host"),
+            port=int(params.get("port", 5432)),
+            user=params.get("user"),
+            password=params.get("password"),
+            database=self.db_name,
+            min_size=pool_config["min_connections"],
+            max_size=pool_config["max_connections"],
+        )
+
+    async def disconnect(self) -> None:
+        """Закрывает пул соединений"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    async def _save_bulk(
+        self, query: str, columns: List[list], total: int, entity: str, table: str
+    ) -> BulkSaveResult:
+        """Выполняет upsert пакета одной командой и считает вставленные/обновлённые строки"""
+        try:
+            async with self.pool.acquire() as connection:
+                written = await connection.fetch(query, *columns)
+            inserted = sum(1 for row in written if row[0])
+            result = BulkSaveResult(inserted=inserted, updated=len(written) - inserted, skipped=total - len(written))
+        except Exception as e:
+            logger.error(f"Ошибка пакетного сохранения {entity}: {e}", extra={"table": table})
+            result = BulkSaveResult(failed=total)
+        record_batch(table, total, result)
+        return result
+
+    async def save_employers_bulk(self, employers: Iterable) -> BulkSaveResult:
+        """Сохраняет пакет работодателей"""
+        rows = list({employer.id: employer.to_db_format() for employer in employers}.values())
+        if not rows:
+            return BulkSaveResult()
+        return await self._save_bulk(
+            f"""
+            INSERT INTO employers (id, name, location, website)
+            SELECT * FROM unnest($1::TEXT[], $2::TEXT[], $3::TEXT[], $4::TEXT[])
+            {EMPLOYER_UPSERT_CONFLICT}
+            """,
+            [list(column) for column in zip(*rows)],
+            len(rows),
+            "работодателей",
+            "employers",
+        )
+
+    async def save_vacancies_bulk(self, vacancies: Iterable) -> BulkSaveResult:
+        """Сохраняет пакет вакансий тем же upsert, что и DBManager.save_vacancies_bulk"""
+        rows = list({vacancy.id: vacancy.to_db_format() for vacancy in vacancies}.values())
+        if not rows:
+            return BulkSaveResult()
+
+        columns = [list(column) for column in zip(*rows)]
+        # asyncpg требует объекты datetime/Decimal там, где psycopg2 принимает строки и float
+        published_at = VACANCY_COLUMNS.index("published_at")
+        columns[published_at] = [parse_timestamp(value) for value in columns[published_at]]
+        salary = VACANCY_COLUMNS.index("salary_rub_mid")
+        columns[salary] = [None if value is None else Decimal(str(value)) for value in columns[salary]]
+
+        placeholders = ", ".join(f"${i}::{array_type}" for i, array_type in enumerate(VACANCY_ARRAY_TYPES, start=1))
+        return await self._save_bulk(
+            f"""
+            INSERT INTO vacancies ({", ".join(VACANCY_COLUMNS)})
+            SELECT * FROM unnest({placeholders})
+            {VACANCY_UPSERT_CONFLICT}
+            """,
+            columns,
+            len(rows),
+            "вакансий",
+            "vacancies",
+        )
+
+    async def close_missing_vacancies(self, employer_id: str, seen_ids: Iterable[str]) -> int:
+        """Помечает закрытыми открытые вакансии работодателя, которых больше нет в API"""
+        try:
+            async with self.pool.acquire() as connection:
+                status = await connection.execute(
+                    """
+                    UPDATE vacancies
+                    SET closed_at = NOW(), updated_at = NOW()
+                    WHERE employer_id = $1
+                      AND closed_at IS NULL
+                      AND NOT (id = ANY($2::TEXT[]))
+                    """,
+                    employer_id,
+                    list(seen_ids),
+                )
+            # asyncpg возвращает статус команды вида "UPDATE 3"
+            return int(status.split()[-1])
+        except Exception as e:
+            logger.error(
+                f"Ошибка закрытия вакансий работодателя {employer_id}: {e}", extra={"employer_id": employer_id}
+            )
+            return 0
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Разбирает дату hh.ru вида 2024-01-01T10:00:00+0300"""
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
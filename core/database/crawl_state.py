@@ -0,0 +1,210 @@
+import json
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+from psycopg2.extras import execute_values
+from core.database.job_queue import JobQueue, pooled_cursor, release_stale_claims, seconds_until_available
+
+
+def slice_key(params: Dict) -> str:
+    """Ключ среза — его параметры поиска в каноническом виде (area=1&date_from=...&text=...)"""
+    return urlencode(sorted(params.items()), doseq=True)
+
+
+class CrawlSlice(NamedTuple):
+    """Срез поисковой выдачи, захваченный рабочим"""
+
+    crawl_id: int
+    key: str
+    params: Dict
+    depth: int
+    attempts: int
+
+
+class CrawlCheckpoint:
+    """Контрольные точки обхода рынка в PostgreSQL: статус каждого среза выдачи /vacancies.
+
+    Срез, который не помещается в ограничение глубины выдачи, помечается split и заменяется дочерними
+    срезами в той же транзакции, поэтому прерванный обход продолжается без повторного разбиения.
+    Захват через FOR UPDATE SKIP LOCKED позволяет вести один обход из нескольких процессов.
+    Срез после временного сбоя захватывается снова не раньше, чем через retry_delay секунд
+    (удваиваются с каждой попыткой, но не меньше Retry-After). Обход со срезами failed не завершается:
+    при следующем запуске с тем же именем они возвращаются в очередь.
+    """
+
+    def __init__(self, db_name: str = "career_db", max_attempts: int = 3, retry_delay: float = 0.0):
+        self.db_name = db_name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def _cursor(self):
+        return pooled_cursor(self.db_name)
+
+    def open_crawl(self, name: str, params: Dict) -> Tuple[int, Dict]:
+        """Возвращает незавершённый обход с таким именем или создаёт новый с корневым срезом params.
+
+        Возвращает ID обхода и параметры, с которыми он был создан: при возобновлении окно дат
+        остаётся прежним, иначе уже пройденные срезы не совпали бы с новыми.
+        """
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO crawls (name, params) VALUES (%s, %s::jsonb)
+                ON CONFLICT (name) WHERE finished_at IS NULL DO UPDATE SET name = EXCLUDED.name
+                RETURNING id, params
+                """,
+                (name, json.dumps(params)),
+            )
+            crawl_id, params = cur.fetchone()
+            cur.execute(
+                """
+                INSERT INTO crawl_slices (crawl_id, slice_key, params) VALUES (%s, %s, %s::jsonb)
+                ON CONFLICT (crawl_id, slice_key) DO NOTHING
+                """,
+                (crawl_id, slice_key(params), json.dumps(params)),
+            )
+        return crawl_id, params
+
+    def release_stale(self, crawl_id: int, older_than_seconds: float) -> int:
+        """Возвращает в очередь срезы, захваченные давно или завершившимися процессами этого хоста"""
+        with self._cursor() as cur:
+            return release_stale_claims(cur, "crawl_slices", "crawl_id", crawl_id, older_than_seconds)
+
+    def retry_failed(self, crawl_id: int) -> int:
+        """Возвращает в очередь срезы, исчерпавшие попытки в прошлых запусках, с новым счётчиком попыток"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE crawl_slices
+                SET status = 'pending', attempts = 0, claimed_by = NULL, available_at = NOW(), updated_at = NOW()
+                WHERE crawl_id = %s AND status = 'failed'
+                """,
+                (crawl_id,),
+            )
+            return cur.rowcount
+
+    def seconds_until_available(self, crawl_id: int) -> Optional[float]:
+        """Через сколько секунд можно захватить следующий срез; None, если ожидающих нет"""
+        with self._cursor() as cur:
+            return seconds_until_available(cur, "crawl_slices", "crawl_id", crawl_id)
+
+    def claim(self, crawl_id: int) -> Optional[CrawlSlice]:
+        """Захватывает следующий доступный срез (сначала самые глубокие); None, если доступных сейчас нет"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE crawl_slices s
+                SET status = 'in_progress',
+                    attempts = s.attempts + 1,
+                    claimed_by = %(worker)s,
+                    claimed_at = NOW(),
+                    updated_at = NOW()
+                FROM (
+                    SELECT crawl_id, slice_key
+                    FROM crawl_slices
+                    WHERE crawl_id = %(crawl_id)s AND status = 'pending' AND available_at <= NOW()
+                    ORDER BY depth DESC
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                ) next_slice
+                WHERE s.crawl_id = next_slice.crawl_id AND s.slice_key = next_slice.slice_key
+                RETURNING s.crawl_id, s.slice_key, s.params, s.depth, s.attempts
+                """,
+                {"crawl_id": crawl_id, "worker": JobQueue.worker_id()},
+            )
+            row = cur.fetchone()
+        return CrawlSlice(*row) if row else None
+
+    def complete(self, item: CrawlSlice, found: int, fetched: int) -> None:
+        """Отмечает срез полностью загруженным"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE crawl_slices
+                SET status = 'done', found = %s, fetched = %s, last_error = NULL, updated_at = NOW()
+                WHERE crawl_id = %s AND slice_key = %s
+                """,
+                (found, fetched, item.crawl_id, item.key),
+            )
+
+    def split(self, item: CrawlSlice, found: int, children: Iterable[Dict]) -> int:
+        """Заменяет срез дочерними (одной транзакцией) и возвращает число новых срезов"""
+        rows = [(item.crawl_id, slice_key(params), json.dumps(params), item.depth + 1) for params in children]
+        with self._cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO crawl_slices (crawl_id, slice_key, params, depth) VALUES %s
+                ON CONFLICT (crawl_id, slice_key) DO NOTHING
+                """,
+                rows,
+                template="(%s, %s, %s::jsonb, %s)",
+                page_size=max(len(rows), 1),
+            )
+            added = cur.rowcount
+            cur.execute(
+                """
+                UPDATE crawl_slices
+                SET status = 'split', found = %s, last_error = NULL, updated_at = NOW()
+                WHERE crawl_id = %s AND slice_key = %s
+                """,
+                (found, item.crawl_id, item.key),
+            )
+        return added
+
+    def fail(self, item: CrawlSlice, error: str, retryable: bool, retry_after: Optional[float] = None) -> bool:
+        """Отмечает сбой; временный сбой возвращает срез в очередь, пока не исчерпаны попытки.
+
+        Возвращённый срез захватывается не раньше, чем через retry_delay * 2^(попытка - 1) секунд
+        и не раньше retry_after. Возвращает True, если срез будет обработан ещё раз.
+        """
+        requeue = retryable and item.attempts < self.max_attempts
+        delay = max(self.retry_delay * 2 ** max(item.attempts - 1, 0), retry_after or 0.0) if requeue else 0.0
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE crawl_slices
+                SET status = %s,
+                    last_error = %s,
+                    claimed_by = NULL,
+                    available_at = NOW() + make_interval(secs => %s),
+                    updated_at = NOW()
+                WHERE crawl_id = %s AND slice_key = %s
+                """,
+                ("pending" if requeue else "failed", error, delay, item.crawl_id, item.key),
+            )
+        return requeue
+
+    def progress(self, crawl_id: int) -> Dict[str, int]:
+        """Количество срезов обхода по статусам и число загруженных вакансий"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                SELECT status, COUNT(*), COALESCE(SUM(fetched), 0)
+                FROM crawl_slices
+                WHERE crawl_id = %s
+                GROUP BY status
+                """,
+                (crawl_id,),
+            )
+            rows = cur.fetchall()
+        progress = {status: count for status, count, _ in rows}
+        progress["vacancies"] = sum(fetched for _, _, fetched in rows)
+        return progress
+
+    def finish_if_done(self, crawl_id: int) -> bool:
+        """Закрывает обход, если все срезы загружены или разделены (срезы с ошибкой ждут следующего запуска)"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE crawls
+                SET finished_at = NOW()
+                WHERE id = %(crawl_id)s
+                  AND finished_at IS NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM crawl_slices
+                      WHERE crawl_id = %(crawl_id)s AND status IN ('pending', 'in_progress', 'failed')
+                  )
+                """,
+                {"crawl_id": crawl_id},
+            )
+            return cur.rowcount > 0
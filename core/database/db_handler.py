@@ -1,9 +1,20 @@
 import psycopg2
+from core.database.db_manager import postgres_enabled
+from core.database.migrations import apply_migrations, get_schema_version
+from core.database.stats import refresh_statistics
 from core.utils.config_loader import get_db_config
+from core.utils.log import get_logger
 
+logger = get_logger(__name__)
+
+
+def initialize_database(db_name: str = "career_db") -> bool:
+    """Создаёт базу данных при первом запуске и применяет миграции схемы (False при ошибке)"""
+    if not postgres_enabled():
+        from core.database.embedded import initialize_embedded
+
+        return initialize_embedded(db_name)
 
-def initialize_database(db_name: str = "career_db") -> None:
-    """Создаёт базу данных и таблицы при первом запуске"""
     params = get_db_config()
     admin_params = params.copy()
     admin_params["dbname"] = "postgres"
@@ -20,53 +31,32 @@ def initialize_database(db_name: str = "career_db") -> None:
 
         if not exists:
             cur.execute(f"CREATE DATABASE {db_name}")
-            print(f"База данных {db_name} создана")
+            logger.info(f"База данных {db_name} создана")
         else:
-            print(f"База данных {db_name} уже существует")
+            logger.info(f"База данных {db_name} уже существует")
 
         cur.close()
         conn.close()
 
-        # Подключение к новой БД для создания таблиц
+        # Подключение к новой БД для применения миграций
         params["dbname"] = db_name
         conn = psycopg2.connect(**params)
-        cur = conn.cursor()
-
-        # Создание таблицы работодателей
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS employers (
-                id VARCHAR(20) PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                location VARCHAR(100),
-                website TEXT
-            )
-        """
-        )
-
-        # Создание таблицы вакансий
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS vacancies (
-                id VARCHAR(20) PRIMARY KEY,
-                employer_id VARCHAR(20) NOT NULL REFERENCES employers(id) ON DELETE CASCADE,
-                title VARCHAR(255) NOT NULL,
-                min_salary INTEGER,
-                max_salary INTEGER,
-                currency VARCHAR(10),
-                url TEXT NOT NULL,
-                description TEXT
-            )
-        """
-        )
 
-        conn.commit()
-        print("Таблицы созданы успешно")
+        # Приведение схемы к актуальной версии
+        applied = apply_migrations(conn)
+        if applied:
+            logger.info(f"Применены миграции схемы: {', '.join(map(str, applied))}")
+            # Новые таблицы статистики заполняем по уже загруженным данным
+            refresh_statistics(conn)
+        logger.info(f"Схема БД актуальна (версия {get_schema_version(conn)})")
+        return True
 
     except psycopg2.errors.DuplicateDatabase:
-        print(f"База данных {db_name} уже существует")
+        logger.info(f"База данных {db_name} уже существует")
+        return True
     except Exception as e:
-        print(f"Ошибка инициализации БД: {e}")
+        logger.error(f"Ошибка инициализации БД: {e}")
+        return False
     finally:
         if "cur" in locals() and cur:
             cur.close()
@@ -1,14 +1,150 @@
-import psycopg2
-from typing import List, Tuple, Optional
-from core.utils.config_loader import get_db_config
+import re
+from datetime import datetime
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+from core.data_models.vacancy_details import normalize_skill
+from core.database.pool import get_pool
+from core.database.stats import refresh_statistics
+from core.database.transfer import TableTransferResult, export_dataset, import_dataset
+from core.utils.config_loader import get_observability_config, get_storage_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY, timed_method
+
+
+logger = get_logger(__name__)
+
+
+class BulkSaveResult(NamedTuple):
+    """Итог пакетной записи: вставлено, обновлено, пропущено без изменений, не записано из-за ошибки"""
+
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+# Порядок столбцов совпадает с Vacancy.to_db_format()
+VACANCY_COLUMNS = (
+    "id",
+    "employer_id",
+    "title",
+    "min_salary",
+    "max_salary",
+    "currency",
+    "url",
+    "description",
+    "published_at",
+    "content_hash",
+    "salary_rub_mid",
+)
+
+# Изменившиеся записи обновляются, неизменные не трогаются; RETURNING отличает вставку от обновления
+EMPLOYER_UPSERT_CONFLICT = """
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name,
+    location = EXCLUDED.location,
+    website = EXCLUDED.website
+WHERE (employers.name, employers.location, employers.website)
+    IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.location, EXCLUDED.website)
+RETURNING (xmax = 0)
+"""
+
+# Работодатели из поисковой выдачи: известны только название и ссылка, остальное не затирается
+DISCOVERED_EMPLOYER_CONFLICT = """
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name,
+    website = COALESCE(employers.website, EXCLUDED.website)
+WHERE employers.name IS DISTINCT FROM EXCLUDED.name
+   OR (employers.website IS NULL AND EXCLUDED.website IS NOT NULL)
+RETURNING (xmax = 0)
+"""
+
+VACANCY_UPSERT_CONFLICT = """
+ON CONFLICT (id) DO UPDATE SET
+    employer_id = EXCLUDED.employer_id,
+    title = EXCLUDED.title,
+    min_salary = EXCLUDED.min_salary,
+    max_salary = EXCLUDED.max_salary,
+    currency = EXCLUDED.currency,
+    url = EXCLUDED.url,
+    description = EXCLUDED.description,
+    published_at = EXCLUDED.published_at,
+    content_hash = EXCLUDED.content_hash,
+    salary_rub_mid = EXCLUDED.salary_rub_mid,
+    updated_at = NOW(),
+    closed_at = NULL
+WHERE vacancies.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+   OR vacancies.closed_at IS NOT NULL
+RETURNING (xmax = 0)
+"""
+
+# Вакансии из архива ответов: updated_at — время получения ответа, закрытие не отменяется,
+# а запись, обновлённая позже получения ответа, не затирается
+ARCHIVED_VACANCY_CONFLICT = """
+ON CONFLICT (id) DO UPDATE SET
+    employer_id = EXCLUDED.employer_id,
+    title = EXCLUDED.title,
+    min_salary = EXCLUDED.min_salary,
+    max_salary = EXCLUDED.max_salary,
+    currency = EXCLUDED.currency,
+    url = EXCLUDED.url,
+    description = EXCLUDED.description,
+    published_at = EXCLUDED.published_at,
+    content_hash = EXCLUDED.content_hash,
+    salary_rub_mid = EXCLUDED.salary_rub_mid,
+    updated_at = EXCLUDED.updated_at
+WHERE vacancies.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+  AND vacancies.updated_at < EXCLUDED.updated_at
+RETURNING (xmax = 0)
+"""
+
+
+def record_batch(table: str, rows: int, result: BulkSaveResult) -> None:
+    """Учитывает пакет записи в метриках: размер пакета и итог по строкам"""
+    REGISTRY.observe("db_batch_rows", rows, get_observability_config()["row_buckets"], table=table)
+    for outcome, count in result._asdict().items():
+        if count:
+            REGISTRY.inc("db_rows_written_total", count, table=table, result=outcome)
+
+
+def postgres_enabled() -> bool:
+    """Данные хранятся в PostgreSQL: очередь заданий, обход рынка и асинхронная загрузка доступны только в нём"""
+    return get_storage_config()["backend"] == "postgres"
+
+
+def build_search_query(text: str) -> Optional[str]:
+    """Строит tsquery из поисковой строки.
+
+    Слова через пробел должны встречаться все (AND), группы через запятую — любая из них (OR).
+    Каждое слово ищется как префикс, поэтому "разраб" найдёт "разработчик".
+    """
+    groups = []
+    for group in text.split(","):
+        words = re.findall(r"\w+", group.lower())
+        if words:
+            groups.append("(" + " & ".join(f"{word}:*" for word in words) + ")")
+    return " | ".join(groups) or None
 
 
 class DBManager:
-    """Управление взаимодействием с базой данных"""
+    """Управление взаимодействием с базой данных.
+
+    DBManager(...) создаёт менеджер выбранного хранилища (get_storage_config): без database.ini это
+    EmbeddedDBManager над локальным файлом DuckDB или SQLite с теми же методами.
+    """
 
-    def __init__(self, db_name: str = "career_db"):
-        self.params = get_db_config()
-        self.params["dbname"] = db_name
+    def __new__(cls, *args, **kwargs):
+        if cls is DBManager and not postgres_enabled():
+            from core.database.embedded import EmbeddedDBManager
+
+            cls = EmbeddedDBManager
+        return super().__new__(cls)
+
+    def __init__(self, db_name: str = "career_db", itersize: int = 2000):
+        self.db_name = db_name
+        # Сколько строк серверный курсор передаёт за один сетевой обмен
+        self.itersize = itersize
         self.connection = None
 
     def __enter__(self):
@@ -19,141 +155,496 @@ class DBManager:
         self.disconnect()
 
     def connect(self):
-        """Устанавливает соединение с БД"""
+        """Берёт соединение с БД из общего пула процесса"""
         try:
-            self.connection = psycopg2.connect(**self.params)
+            self.connection = get_pool(self.db_name).getconn()
             return True
         except Exception as e:
-            print(f"Ошибка подключения к БД: {e}")
+            logger.error(f"Ошибка подключения к БД: {e}")
             return False
 
     def disconnect(self):
-        """Закрывает соединение с БД"""
+        """Возвращает соединение в пул"""
         if self.connection:
-            self.connection.close()
+            get_pool(self.db_name).putconn(self.connection)
+            self.connection = None
 
     def save_employer(self, employer) -> bool:
         """Сохраняет работодателя в БД"""
+        return self.save_employers_bulk([employer]).failed == 0
+
+    def save_vacancy(self, vacancy) -> bool:
+        """Сохраняет вакансию в БД"""
+        return self.save_vacancies_bulk([vacancy]).failed == 0
+
+    def _save_bulk(self, query: str, rows: Iterable[tuple], entity: str, table: str) -> BulkSaveResult:
+        """Записывает пакет строк одним upsert-запросом и одной транзакцией"""
+        # Дубликаты внутри пакета отбрасываем заранее, ключ — первый столбец (id)
+        unique_rows = list({row[0]: row for row in rows}.values())
+        if not unique_rows:
+            return BulkSaveResult()
+
+        try:
+            with self.connection.cursor() as cur:
+                # Запрос возвращает только вставленные и реально изменённые строки
+                written = execute_values(cur, query, unique_rows, page_size=len(unique_rows), fetch=True)
+            self.connection.commit()
+            inserted = sum(1 for (is_new,) in written if is_new)
+            result = BulkSaveResult(
+                inserted=inserted, updated=len(written) - inserted, skipped=len(unique_rows) - len(written)
+            )
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка пакетного сохранения {entity}: {e}", extra={"table": table})
+            result = BulkSaveResult(failed=len(unique_rows))
+        record_batch(table, len(unique_rows), result)
+        return result
+
+    @timed_method("db_query_seconds")
+    def save_employers_bulk(self, employers: Iterable) -> BulkSaveResult:
+        """Сохраняет пакет работодателей, обновляя изменившиеся записи"""
+        return self._save_bulk(
+            f"""
+            INSERT INTO employers (id, name, location, website)
+            VALUES %s
+            {EMPLOYER_UPSERT_CONFLICT}
+            """,
+            (employer.to_db_format() for employer in employers),
+            "работодателей",
+            "employers",
+        )
+
+    @timed_method("db_query_seconds")
+    def save_discovered_employers_bulk(self, employers: Iterable) -> BulkSaveResult:
+        """Добавляет работодателей, найденных в поисковой выдаче, не затирая полные данные из /employers/{id}"""
+        return self._save_bulk(
+            f"""
+            INSERT INTO employers (id, name, location, website)
+            VALUES %s
+            {DISCOVERED_EMPLOYER_CONFLICT}
+            """,
+            (employer.to_db_format() for employer in employers),
+            "работодателей",
+            "employers",
+        )
+
+    @timed_method("db_query_seconds")
+    def save_vacancies_bulk(self, vacancies: Iterable) -> BulkSaveResult:
+        """Сохраняет пакет вакансий, обновляя только те, у которых изменился хэш содержимого"""
+        return self._save_bulk(
+            f"""
+            INSERT INTO vacancies ({", ".join(VACANCY_COLUMNS)})
+            VALUES %s
+            {VACANCY_UPSERT_CONFLICT}
+            """,
+            (vacancy.to_db_format() for vacancy in vacancies),
+            "вакансий",
+            "vacancies",
+        )
+
+    @timed_method("db_query_seconds")
+    def save_archived_vacancies_bulk(self, vacancies: Iterable[Tuple]) -> BulkSaveResult:
+        """Сохраняет вакансии из архива ответов API: пары (вакансия, время получения ответа).
+
+        В отличие от save_vacancies_bulk закрытые вакансии не открываются заново, а записи,
+        обновлённые после получения ответа, остаются без изменений.
+        """
+        return self._save_bulk(
+            f"""
+            INSERT INTO vacancies ({", ".join(VACANCY_COLUMNS)}, updated_at)
+            VALUES %s
+            {ARCHIVED_VACANCY_CONFLICT}
+            """,
+            (vacancy.to_db_format() + (fetched_at,) for vacancy, fetched_at in vacancies),
+            "вакансий",
+            "vacancies",
+        )
+
+    @timed_method("db_query_seconds")
+    def close_missing_vacancies(self, employer_id: str, seen_ids: Iterable[str]) -> int:
+        """Помечает закрытыми открытые вакансии работодателя, которых больше нет в API"""
         try:
             with self.connection.cursor() as cur:
                 cur.execute(
                     """
-                    INSERT INTO employers (id, name, location, website)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (id) DO NOTHING
+                    UPDATE vacancies
+                    SET closed_at = NOW(), updated_at = NOW()
+                    WHERE employer_id = %s
+                      AND closed_at IS NULL
+                      AND NOT (id = ANY(%s))
                     """,
-                    employer.to_db_format(),
+                    (employer_id, list(seen_ids)),
                 )
+                closed = cur.rowcount
             self.connection.commit()
-            return True
+            return closed
         except Exception as e:
-            print(f"Ошибка сохранения работодателя: {e}")
-            return False
+            self.connection.rollback()
+            logger.error(
+                f"Ошибка закрытия вакансий работодателя {employer_id}: {e}", extra={"employer_id": employer_id}
+            )
+            return 0
 
-    def save_vacancy(self, vacancy) -> bool:
-        """Сохраняет вакансию в БД"""
+    @timed_method("db_query_seconds")
+    def close_vacancies(self, vacancy_ids: Iterable[str]) -> List[Tuple[str, str]]:
+        """Помечает закрытыми вакансии, удалённые или отправленные в архив на hh.ru.
+
+        Возвращает пары (ID вакансии, ID работодателя) только для вакансий, которые были открыты.
+        """
         try:
             with self.connection.cursor() as cur:
                 cur.execute(
                     """
-                    INSERT INTO vacancies 
-                    (id, employer_id, title, min_salary, max_salary, currency, url, description)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (id) DO NOTHING
+                    UPDATE vacancies
+                    SET closed_at = NOW(), updated_at = NOW()
+                    WHERE id = ANY(%s) AND closed_at IS NULL
+                    RETURNING id, employer_id
                     """,
-                    (
-                        vacancy.id,
-                        vacancy.employer_id,
-                        vacancy.title,
-                        vacancy.min_salary,
-                        vacancy.max_salary,
-                        vacancy.currency,
-                        vacancy.url,
-                        vacancy.description,
-                    ),
+                    (list(vacancy_ids),),
                 )
+                closed = cur.fetchall()
             self.connection.commit()
+            return closed
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка закрытия вакансий: {e}")
+            return []
+
+    @timed_method("db_query_seconds")
+    def save_vacancy_details_bulk(self, details: Iterable) -> BulkSaveResult:
+        """Сохраняет подробности вакансий и заменяет их наборы навыков одной транзакцией"""
+        details = list({item.vacancy_id: item for item in details}.values())
+        if not details:
+            return BulkSaveResult()
+
+        try:
+            with self.connection.cursor() as cur:
+                written = execute_values(
+                    cur,
+                    """
+                    INSERT INTO vacancy_details
+                        (vacancy_id, description, experience, schedule, employment, source_hash)
+                    VALUES %s
+                    ON CONFLICT (vacancy_id) DO UPDATE SET
+                        description = EXCLUDED.description,
+                        experience = EXCLUDED.experience,
+                        schedule = EXCLUDED.schedule,
+                        employment = EXCLUDED.employment,
+                        source_hash = EXCLUDED.source_hash,
+                        fetched_at = NOW()
+                    RETURNING (xmax = 0)
+                    """,
+                    [item.to_db_format() for item in details],
+                    page_size=len(details),
+                    fetch=True,
+                )
+
+                # Новые навыки добавляются в справочник в одном порядке во всех процессах (без взаимоблокировок)
+                names = {normalize_skill(name): name for item in details for name in item.key_skills}
+                skill_ids = {}
+                if names:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO skills (name, normalized_name) VALUES %s
+                        ON CONFLICT (normalized_name) DO NOTHING
+                        """,
+                        [(name, key) for key, name in sorted(names.items())],
+                    )
+                    cur.execute(
+                        "SELECT normalized_name, id FROM skills WHERE normalized_name = ANY(%s)", (list(names),)
+                    )
+                    skill_ids = dict(cur.fetchall())
+
+                # Набор навыков вакансии заменяется целиком
+                vacancy_ids = [item.vacancy_id for item in details]
+                cur.execute("DELETE FROM vacancy_skills WHERE vacancy_id = ANY(%s)", (vacancy_ids,))
+                links = {
+                    (item.vacancy_id, skill_ids[normalize_skill(name)]) for item in details for name in item.key_skills
+                }
+                if links:
+                    execute_values(cur, "INSERT INTO vacancy_skills (vacancy_id, skill_id) VALUES %s", sorted(links))
+            self.connection.commit()
+            inserted = sum(1 for (is_new,) in written if is_new)
+            result = BulkSaveResult(inserted=inserted, updated=len(written) - inserted)
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка сохранения подробностей вакансий: {e}", extra={"table": "vacancy_details"})
+            result = BulkSaveResult(failed=len(details))
+        record_batch("vacancy_details", len(details), result)
+        return result
+
+    @timed_method("db_query_seconds")
+    def get_exchange_rates(self) -> Tuple[Dict[str, float], Optional[datetime]]:
+        """Возвращает сохранённые курсы валют и время их последнего обновления"""
+        try:
+            with self.connection.cursor() as cur:
+                cur.execute("SELECT code, rate, updated_at FROM exchange_rates")
+                rows = cur.fetchall()
+            rates = {code: float(rate) for code, rate, _ in rows}
+            return rates, min((updated_at for _, _, updated_at in rows), default=None)
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка получения курсов валют: {e}")
+            return {}, None
+
+    @timed_method("db_query_seconds")
+    def save_exchange_rates(self, rates: Dict[str, float]) -> bool:
+        """Сохраняет курсы валют и пересчитывает по ним рублёвые зарплаты вакансий"""
+        try:
+            with self.connection.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO exchange_rates (code, rate) VALUES %s
+                    ON CONFLICT (code) DO UPDATE SET rate = EXCLUDED.rate, updated_at = NOW()
+                    """,
+                    list(rates.items()),
+                )
+                cur.execute(
+                    """
+                    UPDATE vacancies v
+                    SET salary_rub_mid = ROUND(
+                        CASE
+                            WHEN v.min_salary IS NOT NULL AND v.max_salary IS NOT NULL
+                                THEN (v.min_salary + v.max_salary) / 2.0
+                            ELSE COALESCE(v.min_salary, v.max_salary)
+                        END / r.rate,
+                        2
+                    )
+                    FROM exchange_rates r
+                    WHERE r.code = COALESCE(v.currency, 'RUR')
+                      AND (v.min_salary IS NOT NULL OR v.max_salary IS NOT NULL)
+                    """
+                )
+            self.connection.commit()
+            return True
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка сохранения курсов валют: {e}")
+            return False
+
+    @timed_method("db_query_seconds")
+    def refresh_stats(self, employer_ids: Optional[Iterable[str]] = None) -> bool:
+        """Обновляет материализованную статистику после пакета загрузки"""
+        try:
+            refresh_statistics(self.connection, employer_ids)
             return True
         except Exception as e:
-            print(f"Ошибка сохранения вакансии: {e}")
+            logger.error(f"Ошибка обновления статистики: {e}")
             return False
 
+    @timed_method("db_query_seconds")
+    def get_employers(self) -> List[Tuple[str, str]]:
+        """Возвращает пары (ID, название) всех работодателей"""
+        try:
+            with self.connection.cursor() as cur:
+                cur.execute("SELECT id, name FROM employers")
+                return cur.fetchall()
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка получения работодателей: {e}")
+            return []
+
+    @timed_method("db_query_seconds")
     def get_companies_and_vacancies_count(self) -> List[Tuple]:
         """Возвращает список работодателей с количеством вакансий"""
         try:
             with self.connection.cursor() as cur:
                 cur.execute(
                     """
-                    SELECT e.name, COUNT(v.id) 
+                    SELECT e.name, SUM(COALESCE(s.vacancy_count, 0))
                     FROM employers e
-                    LEFT JOIN vacancies v ON e.id = v.employer_id
+                    LEFT JOIN employer_stats s ON s.employer_id = e.id
                     GROUP BY e.name
-                    ORDER BY COUNT(v.id) DESC
+                    ORDER BY 2 DESC
                 """
                 )
                 return cur.fetchall()
         except Exception as e:
-            print(f"Ошибка получения данных: {e}")
+            logger.error(f"Ошибка получения данных: {e}")
             return []
 
-    def get_avg_salary(self) -> Optional[float]:
-        """Рассчитывает среднюю зарплату"""
+    @timed_method("db_query_seconds")
+    def get_salary_stats(self) -> Optional[dict]:
+        """Возвращает глобальную статистику по зарплатам из материализованной таблицы"""
         try:
-            with self.connection.cursor() as cur:
+            with self.connection.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(
                     """
-                    SELECT AVG((min_salary + max_salary) / 2)
-                    FROM vacancies
-                    WHERE min_salary IS NOT NULL 
-                      AND max_salary IS NOT NULL
+                    SELECT vacancy_count, salary_count, avg_salary, median_salary,
+                           p25_salary, p75_salary, p90_salary, currency_counts, refreshed_at
+                    FROM salary_stats
                 """
                 )
                 result = cur.fetchone()
-                return result[0] if result else None
+                return dict(result) if result else None
         except Exception as e:
-            print(f"Ошибка расчёта зарплаты: {e}")
+            logger.error(f"Ошибка получения статистики: {e}")
             return None
 
-    def get_all_vacancies(self) -> List[Tuple]:
-        """Возвращает список всех вакансий"""
+    def get_avg_salary(self) -> Optional[float]:
+        """Возвращает среднюю зарплату"""
+        stats = self.get_salary_stats()
+        return stats["avg_salary"] if stats else None
+
+    @timed_method("db_query_seconds")
+    def export_dataset(self, directory: str, fmt: str = "csv", chunk_size: int = 20000) -> Optional[Dict[str, int]]:
+        """Выгружает работодателей и вакансии в файлы каталога directory"""
+        try:
+            return export_dataset(self.connection, directory, fmt, chunk_size)
+        except Exception as e:
+            logger.error(f"Ошибка выгрузки данных: {e}")
+            return None
+
+    @timed_method("db_query_seconds")
+    def import_dataset(
+        self, directory: str, fmt: Optional[str] = None, chunk_size: int = 20000
+    ) -> Optional[Dict[str, TableTransferResult]]:
+        """Загружает выгрузку из каталога directory, сливая её с существующими данными"""
+        try:
+            return import_dataset(self.connection, directory, fmt, chunk_size)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return None
+
+    @timed_method("db_query_seconds")
+    def get_stats_version(self) -> Optional[datetime]:
+        """Время последнего пересчёта статистики — меняется после каждого пакета загрузки"""
         try:
             with self.connection.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
-                    FROM vacancies v
-                    JOIN employers e ON v.employer_id = e.id
-                """
-                )
-                return cur.fetchall()
+                cur.execute("SELECT refreshed_at FROM salary_stats")
+                row = cur.fetchone()
+                return row[0] if row else None
         except Exception as e:
-            print(f"Ошибка получения вакансий: {e}")
-            return []
+            self.connection.rollback()
+            logger.error(f"Ошибка получения версии статистики: {e}")
+            return None
 
-    def get_vacancies_with_higher_salary(self) -> List[Tuple]:
-        """Возвращает вакансии с зарплатой выше средней"""
-        avg_salary = self.get_avg_salary()
-        if not avg_salary:
-            return []
+    def _iter_query(self, query: str, params=(), error_message: str = "Ошибка получения данных", strict: bool = False):
+        """Построчно отдаёт результат запроса через именованный (серверный) курсор.
+
+        Ошибка обрывает поток; при strict=True она поднимается как ConnectionError, чтобы вызывающий
+        не принял неполный результат за полный.
+        """
+        try:
+            with self.connection.cursor(name=f"stream_{uuid4().hex}") as cur:
+                cur.itersize = self.itersize
+                cur.execute(query, params)
+                yield from cur
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"{error_message}: {e}")
+            if strict:
+                raise ConnectionError(f"{error_message}: {e}") from e
+
+    @timed_method("db_query_seconds")
+    def iter_all_vacancies(self, strict: bool = False) -> Iterator[Tuple]:
+        """Потоково отдаёт все вакансии (strict=True — обрыв чтения поднимает ConnectionError)"""
+        return self._iter_query(
+            """
+            SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
+            FROM vacancies v
+            JOIN employers e ON v.employer_id = e.id
+            WHERE v.closed_at IS NULL
+            """,
+            error_message="Ошибка получения вакансий",
+            strict=strict,
+        )
+
+    @timed_method("db_query_seconds")
+    def iter_vacancy_snapshot(self) -> Iterator[Tuple]:
+        """Потоково отдаёт столбцы открытых вакансий для аналитического снимка (обрыв — ConnectionError)"""
+        return self._iter_query(
+            """
+            SELECT v.id, v.employer_id, e.name, v.currency, v.salary_rub_mid, v.title
+            FROM vacancies v
+            JOIN employers e ON v.employer_id = e.id
+            WHERE v.closed_at IS NULL
+            ORDER BY v.employer_id, v.id
+            """,
+            error_message="Ошибка получения снимка вакансий",
+            strict=True,
+        )
 
+    @timed_method("db_query_seconds")
+    def iter_vacancies_to_enrich(
+        self, employer_ids: Optional[Iterable[str]] = None, limit: Optional[int] = None
+    ) -> Iterator[Tuple[str, str]]:
+        """Открытые вакансии без подробностей или изменившиеся после их загрузки: пары (ID, content_hash)"""
+        return self._iter_query(
+            """
+            SELECT v.id, v.content_hash
+            FROM vacancies v
+            LEFT JOIN vacancy_details d ON d.vacancy_id = v.id
+            WHERE v.closed_at IS NULL
+              AND v.content_hash IS NOT NULL
+              AND d.source_hash IS DISTINCT FROM v.content_hash
+              AND (%(employer_ids)s::TEXT[] IS NULL OR v.employer_id = ANY(%(employer_ids)s::TEXT[]))
+            ORDER BY v.updated_at DESC
+            LIMIT %(limit)s
+            """,
+            {"employer_ids": None if employer_ids is None else list(employer_ids), "limit": limit},
+            error_message="Ошибка получения вакансий для загрузки подробностей",
+        )
+
+    @timed_method("db_query_seconds")
+    def get_skills_version(self) -> Optional[str]:
+        """Версия данных для индекса навыков: пересчёт статистики после загрузки и последняя загрузка подробностей"""
         try:
             with self.connection.cursor() as cur:
                 cur.execute(
                     """
-                    SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
-                    FROM vacancies v
-                    JOIN employers e ON v.employer_id = e.id
-                    WHERE (v.min_salary + v.max_salary) / 2 > %s
-                """,
-                    (avg_salary,),
+                    SELECT (SELECT refreshed_at FROM salary_stats), (SELECT MAX(fetched_at) FROM vacancy_details)
+                    """
                 )
+                refreshed_at, fetched_at = cur.fetchone()
+            if fetched_at is None:
+                return None
+            return f"{refreshed_at.isoformat() if refreshed_at else ''}/{fetched_at.isoformat()}"
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка получения версии индекса навыков: {e}")
+            return None
+
+    @timed_method("db_query_seconds")
+    def get_skills(self) -> List[Tuple[int, str]]:
+        """Возвращает справочник навыков: пары (ID, название); ошибка чтения поднимает ConnectionError"""
+        try:
+            with self.connection.cursor() as cur:
+                cur.execute("SELECT id, name FROM skills")
                 return cur.fetchall()
         except Exception as e:
-            print(f"Ошибка получения вакансий: {e}")
-            return []
+            self.connection.rollback()
+            logger.error(f"Ошибка получения навыков: {e}")
+            raise ConnectionError(f"Ошибка получения навыков: {e}") from e
 
-    def get_vacancies_with_keyword(self, keyword: str) -> List[Tuple]:
-        """Возвращает вакансии по ключевому слову"""
+    @timed_method("db_query_seconds")
+    def iter_vacancy_skill_rows(self) -> Iterator[Tuple]:
+        """Потоково отдаёт открытые вакансии с подробностями: (id, employer_id, salary_rub_mid, [ID навыков]).
+
+        Обрыв чтения поднимает ConnectionError.
+        """
+        return self._iter_query(
+            """
+            SELECT v.id, v.employer_id, v.salary_rub_mid,
+                   COALESCE(array_agg(vs.skill_id) FILTER (WHERE vs.skill_id IS NOT NULL), '{}')
+            FROM vacancies v
+            JOIN vacancy_details d ON d.vacancy_id = v.id
+            LEFT JOIN vacancy_skills vs ON vs.vacancy_id = v.id
+            WHERE v.closed_at IS NULL
+            GROUP BY v.id
+            ORDER BY v.id
+            """,
+            error_message="Ошибка получения навыков вакансий",
+            strict=True,
+        )
+
+    @timed_method("db_query_seconds")
+    def get_vacancies_by_ids(self, vacancy_ids: List[str]) -> List[Tuple]:
+        """Возвращает вакансии в порядке переданных ID (формат как у get_all_vacancies)"""
+        if not vacancy_ids:
+            return []
         try:
             with self.connection.cursor() as cur:
                 cur.execute(
@@ -161,11 +652,77 @@ class DBManager:
                     SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
                     FROM vacancies v
                     JOIN employers e ON v.employer_id = e.id
-                    WHERE v.title ILIKE %s
-                """,
-                    (f"%{keyword}%",),
+                    WHERE v.id = ANY(%(ids)s)
+                    ORDER BY array_position(%(ids)s, v.id)
+                    """,
+                    {"ids": list(vacancy_ids)},
                 )
                 return cur.fetchall()
         except Exception as e:
-            print(f"Ошибка поиска вакансий: {e}")
+            self.connection.rollback()
+            logger.error(f"Ошибка получения вакансий: {e}")
             return []
+
+    def get_all_vacancies(self) -> List[Tuple]:
+        """Возвращает список всех вакансий"""
+        return list(self.iter_all_vacancies())
+
+    @timed_method("db_query_seconds")
+    def iter_vacancies_with_higher_salary(self, strict: bool = False) -> Iterator[Tuple]:
+        """Потоково отдаёт вакансии с зарплатой выше средней (strict=True — обрыв чтения поднимает ConnectionError)"""
+        avg_salary = self.get_avg_salary()
+        if not avg_salary:
+            return iter(())
+
+        return self._iter_query(
+            """
+            SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
+            FROM vacancies v
+            JOIN employers e ON v.employer_id = e.id
+            WHERE v.closed_at IS NULL
+              AND v.salary_rub_mid > %s
+            """,
+            (avg_salary,),
+            error_message="Ошибка получения вакансий",
+            strict=strict,
+        )
+
+    def get_vacancies_with_higher_salary(self) -> List[Tuple]:
+        """Возвращает вакансии с зарплатой выше средней"""
+        return list(self.iter_vacancies_with_higher_salary())
+
+    def iter_vacancies_with_keyword(self, keyword: str, strict: bool = False) -> Iterator[Tuple]:
+        """Потоково отдаёт вакансии по ключевым словам, самые релевантные первыми"""
+        return self.search_vacancies(keyword, limit=None, strict=strict)
+
+    def get_vacancies_with_keyword(self, keyword: str) -> List[Tuple]:
+        """Возвращает вакансии по ключевому слову"""
+        return list(self.iter_vacancies_with_keyword(keyword))
+
+    @timed_method("db_query_seconds")
+    def search_vacancies(
+        self, text: str, limit: Optional[int] = 20, offset: int = 0, strict: bool = False
+    ) -> Iterator[Tuple]:
+        """Ранжированный полнотекстовый поиск по названию и описанию вакансий (с пагинацией).
+
+        strict=True — ошибка запроса поднимается как ConnectionError, а не обрывает результат.
+        """
+        search_query = build_search_query(text)
+        if not search_query:
+            return iter(())
+
+        return self._iter_query(
+            """
+            SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
+            FROM vacancies v
+            JOIN employers e ON v.employer_id = e.id,
+                 to_tsquery('russian', %(query)s) || to_tsquery('english', %(query)s) AS q
+            WHERE v.closed_at IS NULL
+              AND v.search_vector @@ q
+            ORDER BY ts_rank_cd(v.search_vector, q) DESC, v.id
+            LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            {"query": search_query, "limit": limit, "offset": offset},
+            error_message="Ошибка поиска вакансий",
+            strict=strict,
+        )
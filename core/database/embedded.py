@@ -0,0 +1,970 @@
+"""Встроенное хранилище в локальном файле: DuckDB (колоночный движок для аналитики) или SQLite.
+
+Таблицы те же, что в PostgreSQL, но без внешних ключей и материализованной статистики: агрегаты
+считаются запросом по колонкам. Время хранится строками ISO 8601 в UTC — одинаково в обоих движках.
+"""
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from core.data_models.vacancy_details import normalize_skill
+from core.database.db_manager import VACANCY_COLUMNS, BulkSaveResult, DBManager, record_batch
+from core.database.transfer import (
+    ARROW_TYPES,
+    FORMATS,
+    TABLE_COLUMNS,
+    TableTransferResult,
+    _iter_file_chunks,
+    _require_arrow,
+    _write_chunks,
+    detect_format,
+    table_path,
+)
+from core.utils.config_loader import get_storage_config
+from core.utils.log import get_logger
+from core.utils.metrics import timed_method
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - DuckDB необязателен
+    duckdb = None
+
+EMBEDDED_SCHEMA_VERSION = 1
+
+EMBEDDED_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS employers (
+        id VARCHAR PRIMARY KEY,
+        name VARCHAR NOT NULL,
+        location VARCHAR,
+        website VARCHAR
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vacancies (
+        id VARCHAR PRIMARY KEY,
+        employer_id VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        min_salary INTEGER,
+        max_salary INTEGER,
+        currency VARCHAR,
+        url VARCHAR NOT NULL,
+        description VARCHAR,
+        published_at VARCHAR,
+        content_hash VARCHAR,
+        salary_rub_mid DOUBLE,
+        created_at VARCHAR NOT NULL,
+        updated_at VARCHAR NOT NULL,
+        closed_at VARCHAR
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS exchange_rates (
+        code VARCHAR PRIMARY KEY,
+        rate DOUBLE NOT NULL,
+        updated_at VARCHAR NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vacancy_details (
+        vacancy_id VARCHAR PRIMARY KEY,
+        description VARCHAR,
+        experience VARCHAR,
+        schedule VARCHAR,
+        employment VARCHAR,
+        source_hash VARCHAR,
+        fetched_at VARCHAR NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS skills (
+        id INTEGER PRIMARY KEY,
+        name VARCHAR NOT NULL,
+        normalized_name VARCHAR NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vacancy_skills (
+        vacancy_id VARCHAR NOT NULL,
+        skill_id INTEGER NOT NULL,
+        PRIMARY KEY (vacancy_id, skill_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS storage_meta (
+        key VARCHAR PRIMARY KEY,
+        value VARCHAR
+    )
+    """,
+)
+
+# Индексы для выборок по работодателю и навыку нужны только SQLite: DuckDB сканирует колонки
+# с пропуском блоков, а вторичные индексы в нём мешают ON CONFLICT DO UPDATE
+SQLITE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS vacancies_employer_id_idx ON vacancies (employer_id)",
+    "CREATE INDEX IF NOT EXISTS vacancy_skills_skill_id_idx ON vacancy_skills (skill_id)",
+)
+
+EMPLOYER_COLUMNS = ("id", "name", "location", "website")
+VACANCY_WRITE_COLUMNS = VACANCY_COLUMNS + ("created_at", "updated_at", "closed_at")
+DETAILS_COLUMNS = ("vacancy_id", "description", "experience", "schedule", "employment", "source_hash", "fetched_at")
+SALARY_STATS_KEYS = (
+    "vacancy_count",
+    "salary_count",
+    "avg_salary",
+    "median_salary",
+    "p25_salary",
+    "p75_salary",
+    "p90_salary",
+)
+TIMESTAMP_COLUMNS = frozenset(column for column, type_name in ARROW_TYPES.items() if type_name == "timestamp")
+
+# Предел числа параметров одного запроса (SQLite до 3.32 допускал только 999)
+MAX_SQL_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+logger = get_logger(__name__)
+
+_duckdb_databases: Dict[str, "duckdb.DuckDBPyConnection"] = {}
+_write_locks: Dict[str, threading.Lock] = {}
+_initialized = set()
+_lock = threading.Lock()
+
+
+def resolve_engine(backend: Optional[str] = None) -> str:
+    """Движок встроенной БД: duckdb или sqlite (embedded — DuckDB, если он установлен)"""
+    backend = backend or get_storage_config()["backend"]
+    if backend == "embedded":
+        return "duckdb" if duckdb is not None else "sqlite"
+    if backend == "duckdb" and duckdb is None:
+        raise ImportError("Для хранилища duckdb установите пакет duckdb")
+    return backend
+
+
+def database_path(db_name: str, engine: Optional[str] = None) -> str:
+    extension = ".duckdb" if (engine or resolve_engine()) == "duckdb" else ".sqlite3"
+    return os.path.join(get_storage_config()["data_dir"], f"{db_name}{extension}")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _timestamp_text(value) -> Optional[str]:
+    """Время из файла выгрузки (datetime или строка) в формате хранения; нераспознанная строка — как есть"""
+    parsed = _parse_timestamp(value)
+    if parsed is None:
+        return value or None
+    return parsed.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Строка времени из БД в datetime с часовым поясом (без пояса — UTC)"""
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join(["?"] * count)
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """Перцентиль отсортированного списка с линейной интерполяцией, как percentile_cont"""
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _open_connection(path: str, engine: str):
+    """Соединение с файлом БД; схема создаётся при первом открытии файла в процессе"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if engine == "sqlite":
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Встроенный lower() SQLite понимает только ASCII, поиску по-русски нужен Unicode
+        connection.create_function(
+            "lower", 1, lambda value: value.lower() if isinstance(value, str) else value, deterministic=True
+        )
+    else:
+        with _lock:
+            database = _duckdb_databases.get(path)
+            if database is None:
+                database = duckdb.connect(path)
+                _duckdb_databases[path] = database
+        # Файл DuckDB открывается одним процессом: потоки получают свои соединения с общей БД
+        connection = database.cursor()
+
+    with _lock:
+        if path not in _initialized:
+            for statement in EMBEDDED_SCHEMA + (SQLITE_INDEXES if engine == "sqlite" else ()):
+                connection.execute(statement)
+            connection.execute(
+                "INSERT INTO storage_meta (key, value) VALUES ('schema_version', ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [str(EMBEDDED_SCHEMA_VERSION)],
+            )
+            _initialized.add(path)
+    return connection
+
+
+@contextmanager
+def _write_lock(path: str):
+    """Записи процесса в один файл идут по очереди: оба движка допускают одного писателя"""
+    with _lock:
+        lock = _write_locks.setdefault(path, threading.Lock())
+    with lock:
+        yield
+
+
+@atexit.register
+def close_databases() -> None:
+    """Закрывает файлы DuckDB, открытые процессом"""
+    with _lock:
+        for database in _duckdb_databases.values():
+            database.close()
+        _duckdb_databases.clear()
+        _initialized.clear()
+
+
+def initialize_embedded(db_name: str = "career_db") -> bool:
+    """Создаёт файл встроенной БД и её схему (False при ошибке)"""
+    db = EmbeddedDBManager(db_name)
+    if not db.connect():
+        return False
+    db.disconnect()
+    logger.info(f"Встроенная БД {db.engine}: {os.path.abspath(db.path)} (схема версии {EMBEDDED_SCHEMA_VERSION})")
+    return True
+
+
+class EmbeddedDBManager(DBManager):
+    """Менеджер встроенной БД в локальном файле с теми же методами, что и у DBManager для PostgreSQL.
+
+    Переносимые запросы DBManager (плейсхолдеры %s) выполняются как есть, остальные методы
+    переопределены. В DuckDB и SQLite нет xmax, поэтому пакет сначала сравнивается с сохранёнными
+    строками, а записываются одним многострочным INSERT ... ON CONFLICT только новые и изменённые.
+    """
+
+    def __init__(self, db_name: str = "career_db", itersize: int = 2000, engine: Optional[str] = None):
+        super().__init__(db_name, itersize)
+        self.engine = resolve_engine(engine)
+        self.path = database_path(db_name, self.engine)
+
+    def connect(self):
+        """Открывает файл БД (создаёт его и схему при первом обращении)"""
+        try:
+            self.connection = _open_connection(self.path, self.engine)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка подключения к БД: {e}")
+            return False
+
+    def disconnect(self):
+        """Закрывает соединение с файлом БД"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def _execute(self, query: str, params: Sequence = ()):
+        """Выполняет запрос на соединении менеджера (внутри его транзакции, если она открыта)"""
+        return self.connection.execute(query, list(params))
+
+    @contextmanager
+    def _transaction(self):
+        """Транзакция записи: фиксируется при выходе, откатывается при исключении"""
+        with _write_lock(self.path):
+            self._execute("BEGIN IMMEDIATE" if self.engine == "sqlite" else "BEGIN TRANSACTION")
+            try:
+                yield
+            except Exception:
+                self._execute("ROLLBACK")
+                raise
+            self._execute("COMMIT")
+
+    def _id_list(self, ids: Sequence[str]) -> Tuple[str, list]:
+        """Список ID для IN (...): фрагмент SQL и его параметры"""
+        if self.engine == "duckdb":
+            # DuckDB медленно привязывает параметры по одному, поэтому список передаётся одной строкой JSON
+            return "SELECT unnest(from_json(?, '[\"VARCHAR\"]'))", [json.dumps(list(ids), ensure_ascii=False)]
+        return _placeholders(len(ids)), list(ids)
+
+    def _id_chunks(self, ids: Iterable[str], reserved: int = 0) -> Iterator[Tuple[str, list]]:
+        """Списки ID для IN (...) порциями в пределах MAX_SQL_PARAMS (reserved — прочие параметры запроса)"""
+        ids = list(ids)
+        size = len(ids) if self.engine == "duckdb" else MAX_SQL_PARAMS - reserved
+        for chunk in _chunks(ids, max(size, 1)):
+            yield self._id_list(chunk)
+
+    def _fetch_by_ids(self, query: str, ids: Iterable, params: Sequence = ()) -> List[tuple]:
+        """Строки по списку ID порциями; {ids} в запросе заменяется списком, params идут перед ним"""
+        rows = []
+        for fragment, id_params in self._id_chunks(ids, len(params)):
+            rows.extend(self._execute(query.format(ids=fragment), [*params, *id_params]).fetchall())
+        return rows
+
+    def _insert(self, table: str, columns: Sequence[str], rows: Sequence[tuple], conflict: str = "") -> None:
+        """Многострочный INSERT порциями в пределах MAX_SQL_PARAMS параметров (в DuckDB — одним JSON)"""
+        if not rows:
+            return
+        if self.engine == "duckdb":
+            structure = json.dumps([dict.fromkeys(columns, "VARCHAR")])
+            self._execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)}"
+                f" FROM (SELECT unnest(from_json(?, '{structure}'), recursive := true)) {conflict}",
+                [json.dumps([dict(zip(columns, row)) for row in rows], ensure_ascii=False)],
+            )
+            return
+        row_placeholders = f"({_placeholders(len(columns))})"
+        for chunk in _chunks(rows, max(1, MAX_SQL_PARAMS // len(columns))):
+            self._execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_placeholders] * len(chunk))}"
+                f" {conflict}",
+                [value for row in chunk for value in row],
+            )
+
+    def _upsert(
+        self, table: str, columns: Sequence[str], rows: Sequence[tuple], key: str = "id", keep: Sequence[str] = ()
+    ) -> None:
+        """INSERT ... ON CONFLICT DO UPDATE: при обновлении столбцы keep сохраняют прежние значения"""
+        updates = ", ".join(
+            f"{column} = excluded.{column}" for column in columns if column != key and column not in keep
+        )
+        self._insert(table, columns, rows, f"ON CONFLICT ({key}) DO UPDATE SET {updates}")
+
+    def _merge_rows(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[tuple],
+        compare: Sequence[str],
+        merge: Callable[[tuple, Optional[tuple]], Optional[tuple]],
+        keep: Sequence[str] = (),
+    ) -> BulkSaveResult:
+        """Сливает пакет с таблицей внутри открытой транзакции.
+
+        merge(строка, сохранённые значения compare или None) возвращает строку для записи
+        или None, если запись не изменилась.
+        """
+        unique_rows = list({row[0]: row for row in rows}.values())
+        if not unique_rows:
+            return BulkSaveResult()
+        existing = {
+            row[0]: tuple(row[1:])
+            for row in self._fetch_by_ids(
+                f"SELECT id, {', '.join(compare)} FROM {table} WHERE id IN ({{ids}})", (row[0] for row in unique_rows)
+            )
+        }
+        written, inserted = [], 0
+        for row in unique_rows:
+            merged = merge(row, existing.get(row[0]))
+            if merged is not None:
+                written.append(merged)
+                inserted += row[0] not in existing
+        if written:
+            self._upsert(table, columns, written, keep=keep)
+        return BulkSaveResult(
+            inserted=inserted, updated=len(written) - inserted, skipped=len(unique_rows) - len(written)
+        )
+
+    def _save_rows(
+        self,
+        table: str,
+        entity: str,
+        columns: Sequence[str],
+        rows: Iterable[tuple],
+        compare: Sequence[str],
+        merge: Callable[[tuple, Optional[tuple]], Optional[tuple]],
+        keep: Sequence[str] = (),
+    ) -> BulkSaveResult:
+        """Сливает пакет одной транзакцией и учитывает его в метриках"""
+        rows = list(rows)
+        try:
+            with self._transaction():
+                result = self._merge_rows(table, columns, rows, compare, merge, keep)
+        except Exception as e:
+            logger.error(f"Ошибка пакетного сохранения {entity}: {e}", extra={"table": table})
+            result = BulkSaveResult(failed=len({row[0] for row in rows}))
+        record_batch(table, result.inserted + result.updated + result.skipped + result.failed, result)
+        return result
+
+    @staticmethod
+    def _merge_employer(row: tuple, old: Optional[tuple]) -> Optional[tuple]:
+        return row if old is None or tuple(row[1:]) != old else None
+
+    @staticmethod
+    def _merge_discovered_employer(row: tuple, old: Optional[tuple]) -> Optional[tuple]:
+        if old is None:
+            return row
+        # Из поисковой выдачи известны только название и ссылка: остальное не затирается
+        merged = (row[0], row[1], old[1], old[2] or row[3])
+        return merged if merged[1:] != old else None
+
+    @staticmethod
+    def _merge_vacancy(row: tuple, old: Optional[tuple]) -> Optional[tuple]:
+        # Вакансия обновляется, если изменилось содержимое или она снова появилась в выдаче
+        if old is not None and old[0] == row[VACANCY_COLUMNS.index("content_hash")] and old[1] is None:
+            return None
+        now = _now()
+        return tuple(row) + (now, now, None)
+
+    @staticmethod
+    def _merge_archived_vacancy(row: tuple, old: Optional[tuple]) -> Optional[tuple]:
+        # row — строка вакансии и время получения ответа; закрытие не отменяется (closed_at в keep)
+        fetched_at = _timestamp_text(row[-1])
+        if old is not None and (
+            old[0] == row[VACANCY_COLUMNS.index("content_hash")]
+            or _parse_timestamp(old[1]) >= _parse_timestamp(fetched_at)
+        ):
+            return None
+        return tuple(row[:-1]) + (fetched_at, fetched_at, None)
+
+    @timed_method("db_query_seconds")
+    def save_employers_bulk(self, employers: Iterable) -> BulkSaveResult:
+        """Сохраняет пакет работодателей, обновляя изменившиеся записи"""
+        return self._save_rows(
+            "employers",
+            "работодателей",
+            EMPLOYER_COLUMNS,
+            (employer.to_db_format() for employer in employers),
+            EMPLOYER_COLUMNS[1:],
+            self._merge_employer,
+        )
+
+    @timed_method("db_query_seconds")
+    def save_discovered_employers_bulk(self, employers: Iterable) -> BulkSaveResult:
+        """Добавляет работодателей, найденных в поисковой выдаче, не затирая полные данные из /employers/{id}"""
+        return self._save_rows(
+            "employers",
+            "работодателей",
+            EMPLOYER_COLUMNS,
+            (employer.to_db_format() for employer in employers),
+            EMPLOYER_COLUMNS[1:],
+            self._merge_discovered_employer,
+        )
+
+    @timed_method("db_query_seconds")
+    def save_vacancies_bulk(self, vacancies: Iterable) -> BulkSaveResult:
+        """Сохраняет пакет вакансий, обновляя только те, у которых изменился хэш содержимого"""
+        return self._save_rows(
+            "vacancies",
+            "вакансий",
+            VACANCY_WRITE_COLUMNS,
+            (vacancy.to_db_format() for vacancy in vacancies),
+            ("content_hash", "closed_at"),
+            self._merge_vacancy,
+            keep=("created_at",),
+        )
+
+    @timed_method("db_query_seconds")
+    def save_archived_vacancies_bulk(self, vacancies: Iterable[Tuple]) -> BulkSaveResult:
+        """Сохраняет вакансии из архива ответов API: пары (вакансия, время получения ответа).
+
+        В отличие от save_vacancies_bulk закрытые вакансии не открываются заново, а записи,
+        обновлённые после получения ответа, остаются без изменений.
+        """
+        return self._save_rows(
+            "vacancies",
+            "вакансий",
+            VACANCY_WRITE_COLUMNS,
+            (vacancy.to_db_format() + (fetched_at,) for vacancy, fetched_at in vacancies),
+            ("content_hash", "updated_at"),
+            self._merge_archived_vacancy,
+            keep=("created_at", "closed_at"),
+        )
+
+    def _close_open(self, vacancy_ids: Iterable[str]) -> List[Tuple[str, str]]:
+        """Закрывает открытые вакансии из списка внутри транзакции: пары (ID вакансии, ID работодателя)"""
+        closed = [
+            tuple(row)
+            for row in self._fetch_by_ids(
+                "SELECT id, employer_id FROM vacancies WHERE closed_at IS NULL AND id IN ({ids})", vacancy_ids
+            )
+        ]
+        now = _now()
+        for fragment, id_params in self._id_chunks([vacancy_id for vacancy_id, _ in closed], 2):
+            self._execute(
+                f"UPDATE vacancies SET closed_at = ?, updated_at = ? WHERE id IN ({fragment})", [now, now, *id_params]
+            )
+        return closed
+
+    @timed_method("db_query_seconds")
+    def close_missing_vacancies(self, employer_id: str, seen_ids: Iterable[str]) -> int:
+        """Помечает закрытыми открытые вакансии работодателя, которых больше нет в API"""
+        try:
+            with self._transaction():
+                open_ids = self._execute(
+                    "SELECT id FROM vacancies WHERE employer_id = ? AND closed_at IS NULL", [employer_id]
+                ).fetchall()
+                seen = set(seen_ids)
+                return len(self._close_open([vacancy_id for (vacancy_id,) in open_ids if vacancy_id not in seen]))
+        except Exception as e:
+            logger.error(
+                f"Ошибка закрытия вакансий работодателя {employer_id}: {e}", extra={"employer_id": employer_id}
+            )
+            return 0
+
+    @timed_method("db_query_seconds")
+    def close_vacancies(self, vacancy_ids: Iterable[str]) -> List[Tuple[str, str]]:
+        """Помечает закрытыми вакансии, удалённые или отправленные в архив на hh.ru.
+
+        Возвращает пары (ID вакансии, ID работодателя) только для вакансий, которые были открыты.
+        """
+        try:
+            with self._transaction():
+                return self._close_open(vacancy_ids)
+        except Exception as e:
+            logger.error(f"Ошибка закрытия вакансий: {e}")
+            return []
+
+    @timed_method("db_query_seconds")
+    def save_vacancy_details_bulk(self, details: Iterable) -> BulkSaveResult:
+        """Сохраняет подробности вакансий и заменяет их наборы навыков одной транзакцией"""
+        details = list({item.vacancy_id: item for item in details}.values())
+        if not details:
+            return BulkSaveResult()
+
+        vacancy_ids = [item.vacancy_id for item in details]
+        try:
+            with self._transaction():
+                existing = self._fetch_by_ids(
+                    "SELECT vacancy_id FROM vacancy_details WHERE vacancy_id IN ({ids})", vacancy_ids
+                )
+                now = _now()
+                rows = [item.to_db_format() + (now,) for item in details]
+                self._upsert("vacancy_details", DETAILS_COLUMNS, rows, "vacancy_id")
+
+                # ID новых навыков выдаются здесь же: запись в файл идёт под общей блокировкой
+                names = {normalize_skill(name): name for item in details for name in item.key_skills}
+                skill_ids = dict(
+                    self._fetch_by_ids(
+                        "SELECT normalized_name, id FROM skills WHERE normalized_name IN ({ids})", names
+                    )
+                )
+                new_skills = sorted(key for key in names if key not in skill_ids)
+                if new_skills:
+                    (next_id,) = self._execute("SELECT COALESCE(MAX(id), 0) + 1 FROM skills").fetchone()
+                    rows = [(next_id + offset, names[key], key) for offset, key in enumerate(new_skills)]
+                    self._insert("skills", ("id", "name", "normalized_name"), rows)
+                    skill_ids.update((key, skill_id) for skill_id, _, key in rows)
+
+                # Набор навыков вакансии заменяется целиком: удаляются лишние связи, добавляются новые
+                links = {
+                    (item.vacancy_id, skill_ids[normalize_skill(name)]) for item in details for name in item.key_skills
+                }
+                current = set(
+                    self._fetch_by_ids(
+                        "SELECT vacancy_id, skill_id FROM vacancy_skills WHERE vacancy_id IN ({ids})", vacancy_ids
+                    )
+                )
+                for link in sorted(current - links):
+                    self._execute("DELETE FROM vacancy_skills WHERE vacancy_id = ? AND skill_id = ?", link)
+                self._insert("vacancy_skills", ("vacancy_id", "skill_id"), sorted(links - current))
+            result = BulkSaveResult(inserted=len(details) - len(existing), updated=len(existing))
+        except Exception as e:
+            logger.error(f"Ошибка сохранения подробностей вакансий: {e}", extra={"table": "vacancy_details"})
+            result = BulkSaveResult(failed=len(details))
+        record_batch("vacancy_details", len(details), result)
+        return result
+
+    @timed_method("db_query_seconds")
+    def get_exchange_rates(self) -> Tuple[Dict[str, float], Optional[datetime]]:
+        """Возвращает сохранённые курсы валют и время их последнего обновления"""
+        try:
+            rows = self._execute("SELECT code, rate, updated_at FROM exchange_rates").fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка получения курсов валют: {e}")
+            return {}, None
+        rates = {code: float(rate) for code, rate, _ in rows}
+        return rates, min((_parse_timestamp(updated_at) for _, _, updated_at in rows), default=None)
+
+    @timed_method("db_query_seconds")
+    def save_exchange_rates(self, rates: Dict[str, float]) -> bool:
+        """Сохраняет курсы валют и пересчитывает по ним рублёвые зарплаты вакансий"""
+        now = _now()
+        try:
+            with self._transaction():
+                rows = [(code, rate, now) for code, rate in rates.items()]
+                self._upsert("exchange_rates", ("code", "rate", "updated_at"), rows, "code")
+                self._execute(
+                    """
+                    UPDATE vacancies
+                    SET salary_rub_mid = ROUND(
+                        CASE
+                            WHEN vacancies.min_salary IS NOT NULL AND vacancies.max_salary IS NOT NULL
+                                THEN (vacancies.min_salary + vacancies.max_salary) / 2.0
+                            ELSE COALESCE(vacancies.min_salary, vacancies.max_salary)
+                        END / exchange_rates.rate,
+                        2
+                    )
+                    FROM exchange_rates
+                    WHERE exchange_rates.code = COALESCE(vacancies.currency, 'RUR')
+                      AND (vacancies.min_salary IS NOT NULL OR vacancies.max_salary IS NOT NULL)
+                    """
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения курсов валют: {e}")
+            return False
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._execute("SELECT value FROM storage_meta WHERE key = ?", [key]).fetchone()
+        return row[0] if row else None
+
+    @timed_method("db_query_seconds")
+    def refresh_stats(self, employer_ids: Optional[Iterable[str]] = None) -> bool:
+        """Отмечает новую версию данных: статистика считается запросом, пересчитывать нечего"""
+        try:
+            with self._transaction():
+                self._upsert("storage_meta", ("key", "value"), [("stats_refreshed_at", _now())], "key")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка обновления статистики: {e}")
+            return False
+
+    @timed_method("db_query_seconds")
+    def get_stats_version(self) -> Optional[datetime]:
+        """Время последнего пакета загрузки — меняется после каждого пакета"""
+        try:
+            return _parse_timestamp(self._get_meta("stats_refreshed_at"))
+        except Exception as e:
+            logger.error(f"Ошибка получения версии статистики: {e}")
+            return None
+
+    @timed_method("db_query_seconds")
+    def get_employers(self) -> List[Tuple[str, str]]:
+        """Возвращает пары (ID, название) всех работодателей"""
+        try:
+            return self._execute("SELECT id, name FROM employers").fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка получения работодателей: {e}")
+            return []
+
+    @timed_method("db_query_seconds")
+    def get_companies_and_vacancies_count(self) -> List[Tuple]:
+        """Возвращает список работодателей с количеством открытых вакансий"""
+        try:
+            return self._execute(
+                """
+                SELECT e.name, COUNT(v.id)
+                FROM employers e
+                LEFT JOIN vacancies v ON v.employer_id = e.id AND v.closed_at IS NULL
+                GROUP BY e.name
+                ORDER BY 2 DESC
+                """
+            ).fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка получения данных: {e}")
+            return []
+
+    @timed_method("db_query_seconds")
+    def get_salary_stats(self) -> Optional[dict]:
+        """Возвращает глобальную статистику по зарплатам открытых вакансий (считается запросом)"""
+        try:
+            if self.engine == "duckdb":
+                row = self._execute(
+                    """
+                    SELECT COUNT(*), COUNT(salary_rub_mid), AVG(salary_rub_mid),
+                           quantile_cont(salary_rub_mid, 0.5), quantile_cont(salary_rub_mid, 0.25),
+                           quantile_cont(salary_rub_mid, 0.75), quantile_cont(salary_rub_mid, 0.9)
+                    FROM vacancies
+                    WHERE closed_at IS NULL
+                    """
+                ).fetchone()
+            else:
+                # В SQLite нет перцентилей: отсортированная колонка зарплат считается на стороне Python
+                (vacancy_count,) = self._execute("SELECT COUNT(*) FROM vacancies WHERE closed_at IS NULL").fetchone()
+                salaries = [
+                    mid
+                    for (mid,) in self._execute(
+                        "SELECT salary_rub_mid FROM vacancies"
+                        " WHERE closed_at IS NULL AND salary_rub_mid IS NOT NULL ORDER BY salary_rub_mid"
+                    )
+                ]
+                row = (
+                    vacancy_count,
+                    len(salaries),
+                    sum(salaries) / len(salaries) if salaries else None,
+                    *(_percentile(salaries, q) for q in (0.5, 0.25, 0.75, 0.9)),
+                )
+            currency_counts = dict(
+                self._execute(
+                    "SELECT currency, COUNT(*) FROM vacancies"
+                    " WHERE closed_at IS NULL AND currency IS NOT NULL GROUP BY currency"
+                ).fetchall()
+            )
+            refreshed_at = _parse_timestamp(self._get_meta("stats_refreshed_at"))
+        except Exception as e:
+            logger.error(f"Ошибка получения статистики: {e}")
+            return None
+
+        return {**dict(zip(SALARY_STATS_KEYS, row)), "currency_counts": currency_counts, "refreshed_at": refreshed_at}
+
+    def _iter_table(self, table: str, chunk_size: int) -> Iterator[List[tuple]]:
+        """Порции строк таблицы выгрузки; время — datetime, как из PostgreSQL"""
+        columns = TABLE_COLUMNS[table]
+        times = [index for index, column in enumerate(columns) if column in TIMESTAMP_COLUMNS]
+        cur = self._execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            for index, row in enumerate(rows):
+                row = list(row)
+                for position in times:
+                    row[position] = _parse_timestamp(row[position])
+                rows[index] = tuple(row)
+            yield rows
+
+    @timed_method("db_query_seconds")
+    def export_dataset(self, directory: str, fmt: str = "csv", chunk_size: int = 20000) -> Optional[Dict[str, int]]:
+        """Выгружает работодателей и вакансии в файлы каталога directory (в одной читающей транзакции)"""
+        try:
+            _require_arrow(fmt)
+            os.makedirs(directory, exist_ok=True)
+            counts = {}
+            self._execute("BEGIN TRANSACTION")
+            try:
+                for table in TABLE_COLUMNS:
+                    path = table_path(directory, table, fmt)
+                    counts[table] = _write_chunks(self._iter_table(table, chunk_size), table, path, fmt)
+            finally:
+                self._execute("ROLLBACK")
+            return counts
+        except Exception as e:
+            logger.error(f"Ошибка выгрузки данных: {e}")
+            return None
+
+    def _import_table(self, table: str, path: str, fmt: str, chunk_size: int) -> TableTransferResult:
+        """Сливает файл выгрузки с таблицей внутри открытой транзакции"""
+        columns = TABLE_COLUMNS[table]
+        times = [index for index, column in enumerate(columns) if column in TIMESTAMP_COLUMNS]
+        total = inserted = updated = 0
+        for rows in _iter_file_chunks(path, table, fmt, chunk_size):
+            total += len(rows)
+            normalized = []
+            for row in rows:
+                row = list(row)
+                for position in times:
+                    row[position] = _timestamp_text(row[position])
+                normalized.append(tuple(row))
+
+            if table == "employers":
+                result = self._merge_rows(table, columns, normalized, columns[1:], self._merge_employer)
+            else:
+                # Вакансии без работодателя в БД пропускаются, как и в PostgreSQL
+                known = {
+                    row[0]
+                    for row in self._fetch_by_ids(
+                        "SELECT id FROM employers WHERE id IN ({ids})", {row[1] for row in normalized}
+                    )
+                }
+                result = self._merge_rows(
+                    table,
+                    columns + ("created_at",),
+                    [row for row in normalized if row[1] in known],
+                    ("content_hash", "closed_at"),
+                    self._merge_imported_vacancy,
+                    keep=("created_at",),
+                )
+            inserted += result.inserted
+            updated += result.updated
+        return TableTransferResult(rows=total, inserted=inserted, updated=updated, skipped=total - inserted - updated)
+
+    @staticmethod
+    def _merge_imported_vacancy(row: tuple, old: Optional[tuple]) -> Optional[tuple]:
+        columns = TABLE_COLUMNS["vacancies"]
+        if old == (row[columns.index("content_hash")], row[columns.index("closed_at")]):
+            return None
+        now = _now()
+        updated_at = row[columns.index("updated_at")] or now
+        return tuple(row[: columns.index("updated_at")]) + (updated_at, row[columns.index("closed_at")], now)
+
+    @timed_method("db_query_seconds")
+    def import_dataset(
+        self, directory: str, fmt: Optional[str] = None, chunk_size: int = 20000
+    ) -> Optional[Dict[str, TableTransferResult]]:
+        """Загружает выгрузку из каталога directory одной транзакцией, сливая её с существующими данными"""
+        try:
+            fmt = fmt or detect_format(directory)
+            if fmt not in FORMATS:
+                raise ValueError(f"Не найдена выгрузка в {directory}")
+            _require_arrow(fmt)
+            results = {}
+            with self._transaction():
+                for table in TABLE_COLUMNS:
+                    path = table_path(directory, table, fmt)
+                    if os.path.exists(path):
+                        results[table] = self._import_table(table, path, fmt, chunk_size)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return None
+        self.refresh_stats()
+        return results
+
+    def _iter_query(self, query: str, params=(), error_message: str = "Ошибка получения данных", strict: bool = False):
+        """Построчно отдаёт результат запроса порциями по itersize строк (плейсхолдеры %s или ?).
+
+        Ошибка обрывает поток; при strict=True она поднимается как ConnectionError.
+        """
+        try:
+            # Отдельный курсор: пока результат читается, соединение менеджера свободно для других запросов
+            cur = self.connection.cursor()
+            try:
+                cur.execute(query.replace("%s", "?"), list(params))
+                while True:
+                    rows = cur.fetchmany(self.itersize)
+                    if not rows:
+                        return
+                    yield from rows
+            finally:
+                cur.close()
+        except Exception as e:
+            logger.error(f"{error_message}: {e}")
+            if strict:
+                raise ConnectionError(f"{error_message}: {e}") from e
+
+    def _limit_clause(self, limit: Optional[int], offset: int = 0) -> Tuple[str, list]:
+        if limit is None and not offset:
+            return "", []
+        if limit is None:
+            # SQLite не допускает OFFSET без LIMIT
+            return ("LIMIT -1 OFFSET ?", [offset]) if self.engine == "sqlite" else ("OFFSET ?", [offset])
+        return "LIMIT ? OFFSET ?", [limit, offset]
+
+    @timed_method("db_query_seconds")
+    def iter_vacancies_to_enrich(
+        self, employer_ids: Optional[Iterable[str]] = None, limit: Optional[int] = None
+    ) -> Iterator[Tuple[str, str]]:
+        """Открытые вакансии без подробностей или изменившиеся после их загрузки: пары (ID, content_hash)"""
+        employer_filter, employer_params = "", []
+        if employer_ids is not None:
+            fragment, employer_params = self._id_list(list(employer_ids))
+            employer_filter = f"AND v.employer_id IN ({fragment})"
+        limit_clause, limit_params = self._limit_clause(limit)
+        return self._iter_query(
+            f"""
+            SELECT v.id, v.content_hash
+            FROM vacancies v
+            LEFT JOIN vacancy_details d ON d.vacancy_id = v.id
+            WHERE v.closed_at IS NULL
+              AND v.content_hash IS NOT NULL
+              AND (d.source_hash IS NULL OR d.source_hash <> v.content_hash)
+              {employer_filter}
+            ORDER BY v.updated_at DESC
+            {limit_clause}
+            """,
+            [*employer_params, *limit_params],
+            error_message="Ошибка получения вакансий для загрузки подробностей",
+        )
+
+    @timed_method("db_query_seconds")
+    def get_skills_version(self) -> Optional[str]:
+        """Версия данных для индекса навыков: последний пакет загрузки и последняя загрузка подробностей"""
+        try:
+            (fetched_at,) = self._execute("SELECT MAX(fetched_at) FROM vacancy_details").fetchone()
+            if fetched_at is None:
+                return None
+            return f"{self._get_meta('stats_refreshed_at') or ''}/{fetched_at}"
+        except Exception as e:
+            logger.error(f"Ошибка получения версии индекса навыков: {e}")
+            return None
+
+    @timed_method("db_query_seconds")
+    def get_skills(self) -> List[Tuple[int, str]]:
+        """Возвращает справочник навыков: пары (ID, название); ошибка чтения поднимает ConnectionError"""
+        try:
+            return self._execute("SELECT id, name FROM skills").fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка получения навыков: {e}")
+            raise ConnectionError(f"Ошибка получения навыков: {e}") from e
+
+    @timed_method("db_query_seconds")
+    def iter_vacancy_skill_rows(self) -> Iterator[Tuple]:
+        """Потоково отдаёт открытые вакансии с подробностями: (id, employer_id, salary_rub_mid, [ID навыков]).
+
+        Обрыв чтения поднимает ConnectionError.
+        """
+        rows = self._iter_query(
+            """
+            SELECT v.id, v.employer_id, v.salary_rub_mid, vs.skill_id
+            FROM vacancies v
+            JOIN vacancy_details d ON d.vacancy_id = v.id
+            LEFT JOIN vacancy_skills vs ON vs.vacancy_id = v.id
+            WHERE v.closed_at IS NULL
+            ORDER BY v.id
+            """,
+            error_message="Ошибка получения навыков вакансий",
+            strict=True,
+        )
+        for (vacancy_id, employer_id, salary), group in groupby(rows, key=lambda row: row[:3]):
+            yield vacancy_id, employer_id, salary, [row[3] for row in group if row[3] is not None]
+
+    @timed_method("db_query_seconds")
+    def get_vacancies_by_ids(self, vacancy_ids: List[str]) -> List[Tuple]:
+        """Возвращает вакансии в порядке переданных ID (формат как у get_all_vacancies)"""
+        try:
+            rows = self._fetch_by_ids(
+                """
+                SELECT v.id, e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
+                FROM vacancies v
+                JOIN employers e ON v.employer_id = e.id
+                WHERE v.id IN ({ids})
+                """,
+                vacancy_ids,
+            )
+        except Exception as e:
+            logger.error(f"Ошибка получения вакансий: {e}")
+            return []
+        by_id = {row[0]: row[1:] for row in rows}
+        return [by_id[vacancy_id] for vacancy_id in vacancy_ids if vacancy_id in by_id]
+
+    @timed_method("db_query_seconds")
+    def search_vacancies(
+        self, text: str, limit: Optional[int] = 20, offset: int = 0, strict: bool = False
+    ) -> Iterator[Tuple]:
+        """Поиск по названию и описанию вакансий: пробел — И, запятая — ИЛИ; совпадения в названии выше.
+
+        strict=True — ошибка запроса поднимается как ConnectionError, а не обрывает результат.
+        """
+        groups = [words for words in (re.findall(r"\w+", group.lower()) for group in text.split(",")) if words]
+        if not groups:
+            return iter(())
+
+        document = "lower(v.title || ' ' || COALESCE(v.description, ''))"
+        condition = " OR ".join("(" + " AND ".join([f"{document} LIKE ?"] * len(words)) + ")" for words in groups)
+        patterns = [f"%{word}%" for words in groups for word in words]
+        rank = " + ".join(["CASE WHEN lower(v.title) LIKE ? THEN 1 ELSE 0 END"] * len(patterns))
+        limit_clause, limit_params = self._limit_clause(limit, offset)
+        return self._iter_query(
+            f"""
+            SELECT e.name, v.title, v.min_salary, v.max_salary, v.currency, v.url
+            FROM vacancies v
+            JOIN employers e ON v.employer_id = e.id
+            WHERE v.closed_at IS NULL
+              AND ({condition})
+            ORDER BY {rank} DESC, v.id
+            {limit_clause}
+            """,
+            [*patterns, *patterns, *limit_params],
+            error_message="Ошибка поиска вакансий",
+            strict=strict,
+        )
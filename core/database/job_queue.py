@@ -0,0 +1,233 @@
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+from psycopg2.extras import execute_values
+from core.database.pool import get_pool
+
+
+@contextmanager
+def pooled_cursor(db_name: str) -> Iterator:
+    """Курсор на соединении из общего пула; транзакция фиксируется при выходе"""
+    pool = get_pool(db_name)
+    connection = pool.getconn()
+    try:
+        with connection.cursor() as cur:
+            yield cur
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        pool.putconn(connection)
+
+
+def is_dead_local_worker(worker: str) -> bool:
+    """Рабочий (JobQueue.worker_id) запущен на этом хосте, и его процесс уже завершился"""
+    host, _, rest = worker.partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def release_stale_claims(cur, table: str, scope_column: str, scope_id: int, older_than_seconds: float) -> int:
+    """Возвращает в очередь table захваченные элементы задания scope_id.
+
+    Освобождаются захваты старше older_than_seconds и захваты процессов этого хоста, которые уже
+    завершились (например, прерванных Ctrl+C): их не нужно ждать до истечения таймаута.
+    """
+    cur.execute(
+        f"SELECT DISTINCT claimed_by FROM {table} WHERE {scope_column} = %s AND status = 'in_progress'",
+        (scope_id,),
+    )
+    dead = [worker for (worker,) in cur.fetchall() if worker and is_dead_local_worker(worker)]
+    cur.execute(
+        f"""
+        UPDATE {table}
+        SET status = 'pending', claimed_by = NULL, claimed_at = NULL, available_at = NOW(), updated_at = NOW()
+        WHERE {scope_column} = %s
+          AND status = 'in_progress'
+          AND (claimed_at < NOW() - make_interval(secs => %s) OR claimed_by = ANY(%s))
+        """,
+        (scope_id, older_than_seconds, dead),
+    )
+    return cur.rowcount
+
+
+def seconds_until_available(cur, table: str, scope_column: str, scope_id: int) -> Optional[float]:
+    """Через сколько секунд станет доступен ближайший ожидающий элемент; None, если ожидающих нет"""
+    cur.execute(
+        f"""
+        SELECT GREATEST(EXTRACT(EPOCH FROM MIN(available_at) - NOW()), 0)
+        FROM {table}
+        WHERE {scope_column} = %s AND status = 'pending'
+        """,
+        (scope_id,),
+    )
+    (delay,) = cur.fetchone()
+    return None if delay is None else float(delay)
+
+
+class QueueItem(NamedTuple):
+    """Элемент задания загрузки, захваченный рабочим"""
+
+    job_id: int
+    key: str
+    key_type: str
+    attempts: int
+
+
+class JobQueue:
+    """Очередь загрузки в PostgreSQL: статус по каждой компании, захват через FOR UPDATE SKIP LOCKED.
+
+    Очередь переживает падение процесса и может обслуживать несколько процессов или машин одновременно.
+    Элемент, возвращённый после временного сбоя, становится доступен для захвата через retry_delay секунд,
+    удваивающихся с каждой попыткой.
+    """
+
+    def __init__(self, db_name: str = "career_db", max_attempts: int = 3, retry_delay: float = 0.0):
+        self.db_name = db_name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def _cursor(self):
+        return pooled_cursor(self.db_name)
+
+    @staticmethod
+    def worker_id() -> str:
+        """Идентификатор рабочего: хост, процесс и поток"""
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def open_job(self, name: str, keys: Iterable[str], key_type: str = "id") -> int:
+        """Возвращает незавершённое задание с таким именем или создаёт новое и ставит компании в очередь.
+
+        При возобновлении уже обработанные компании не трогаются, новые добавляются в конец.
+        """
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO ingestion_jobs (name) VALUES (%s)
+                ON CONFLICT (name) WHERE finished_at IS NULL DO UPDATE SET name = EXCLUDED.name
+                RETURNING id
+                """,
+                (name,),
+            )
+            job_id = cur.fetchone()[0]
+            # Позиции новых компаний продолжают очередь возобновлённого задания
+            cur.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM ingestion_queue WHERE job_id = %s", (job_id,))
+            start = cur.fetchone()[0]
+            execute_values(
+                cur,
+                """
+                INSERT INTO ingestion_queue (job_id, item_key, key_type, position) VALUES %s
+                ON CONFLICT (job_id, item_key) DO NOTHING
+                """,
+                [(job_id, key, key_type, position) for position, key in enumerate(dict.fromkeys(keys), start)],
+            )
+        return job_id
+
+    def release_stale(self, job_id: int, older_than_seconds: float) -> int:
+        """Возвращает в очередь элементы, захваченные давно или завершившимися процессами этого хоста"""
+        with self._cursor() as cur:
+            return release_stale_claims(cur, "ingestion_queue", "job_id", job_id, older_than_seconds)
+
+    def seconds_until_available(self, job_id: int) -> Optional[float]:
+        """Через сколько секунд можно захватить следующий элемент; None, если ожидающих нет"""
+        with self._cursor() as cur:
+            return seconds_until_available(cur, "ingestion_queue", "job_id", job_id)
+
+    def claim(self, job_id: int) -> Optional[QueueItem]:
+        """Захватывает следующий доступный элемент; None, если доступных сейчас нет"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingestion_queue q
+                SET status = 'in_progress',
+                    attempts = q.attempts + 1,
+                    claimed_by = %(worker)s,
+                    claimed_at = NOW(),
+                    updated_at = NOW()
+                FROM (
+                    SELECT job_id, item_key
+                    FROM ingestion_queue
+                    WHERE job_id = %(job_id)s AND status = 'pending' AND available_at <= NOW()
+                    ORDER BY position
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                ) next_item
+                WHERE q.job_id = next_item.job_id AND q.item_key = next_item.item_key
+                RETURNING q.job_id, q.item_key, q.key_type, q.attempts
+                """,
+                {"job_id": job_id, "worker": self.worker_id()},
+            )
+            row = cur.fetchone()
+        return QueueItem(*row) if row else None
+
+    def complete(self, item: QueueItem) -> None:
+        """Отмечает элемент обработанным"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingestion_queue
+                SET status = 'done', last_error = NULL, updated_at = NOW()
+                WHERE job_id = %s AND item_key = %s
+                """,
+                (item.job_id, item.key),
+            )
+
+    def fail(self, item: QueueItem, error: str, retryable: bool) -> bool:
+        """Отмечает сбой; временный сбой возвращает элемент в очередь, пока не исчерпаны попытки.
+
+        Возвращённый элемент захватывается не раньше, чем через retry_delay * 2^(попытка - 1) секунд.
+        Возвращает True, если элемент будет обработан ещё раз.
+        """
+        requeue = retryable and item.attempts < self.max_attempts
+        delay = self.retry_delay * 2 ** max(item.attempts - 1, 0) if requeue else 0.0
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingestion_queue
+                SET status = %s,
+                    last_error = %s,
+                    claimed_by = NULL,
+                    available_at = NOW() + make_interval(secs => %s),
+                    updated_at = NOW()
+                WHERE job_id = %s AND item_key = %s
+                """,
+                ("pending" if requeue else "failed", error, delay, item.job_id, item.key),
+            )
+        return requeue
+
+    def progress(self, job_id: int) -> Dict[str, int]:
+        """Количество элементов задания по статусам"""
+        with self._cursor() as cur:
+            cur.execute(
+                "SELECT status, COUNT(*) FROM ingestion_queue WHERE job_id = %s GROUP BY status", (job_id,)
+            )
+            return dict(cur.fetchall())
+
+    def finish_if_done(self, job_id: int) -> bool:
+        """Закрывает задание, если в нём не осталось ожидающих и захваченных элементов"""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                UPDATE ingestion_jobs
+                SET finished_at = NOW()
+                WHERE id = %(job_id)s
+                  AND finished_at IS NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM ingestion_queue
+                      WHERE job_id = %(job_id)s AND status IN ('pending', 'in_progress')
+                  )
+                """,
+                {"job_id": job_id},
+            )
+            return cur.rowcount > 0
@@ -0,0 +1,328 @@
+from typing import List, NamedTuple, Tuple
+
+
+class Migration(NamedTuple):
+    """Версионированное изменение схемы БД"""
+
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+# Миграции применяются строго по возрастанию версии и никогда не редактируются задним числом:
+# любое изменение схемы оформляется новой миграцией в конце списка.
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Таблицы работодателей и вакансий",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS employers (
+                id VARCHAR(20) PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                location VARCHAR(100),
+                website TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS vacancies (
+                id VARCHAR(20) PRIMARY KEY,
+                employer_id VARCHAR(20) NOT NULL REFERENCES employers(id) ON DELETE CASCADE,
+                title VARCHAR(255) NOT NULL,
+                min_salary INTEGER,
+                max_salary INTEGER,
+                currency VARCHAR(10),
+                url TEXT NOT NULL,
+                description TEXT
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "Поля для инкрементальной синхронизации вакансий",
+        (
+            """
+            ALTER TABLE vacancies
+                ADD COLUMN IF NOT EXISTS published_at TIMESTAMPTZ,
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                ADD COLUMN IF NOT EXISTS content_hash CHAR(40),
+                ADD COLUMN IF NOT EXISTS closed_at TIMESTAMPTZ
+            """,
+        ),
+    ),
+    Migration(
+        3,
+        "Полнотекстовый поиск по названию и описанию вакансий",
+        (
+            """
+            ALTER TABLE vacancies
+                ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+                    setweight(to_tsvector('russian', coalesce(title, '')), 'A')
+                    || setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                    || setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+                    || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+                ) STORED
+            """,
+            "CREATE INDEX IF NOT EXISTS vacancies_search_idx ON vacancies USING GIN (search_vector)",
+        ),
+    ),
+    Migration(
+        4,
+        "Индексы для соединения с работодателями и фильтров по зарплате",
+        (
+            "CREATE INDEX IF NOT EXISTS vacancies_employer_id_idx ON vacancies (employer_id)",
+            "CREATE INDEX IF NOT EXISTS vacancies_min_salary_idx ON vacancies (min_salary)",
+            "CREATE INDEX IF NOT EXISTS vacancies_max_salary_idx ON vacancies (max_salary)",
+            # Совпадает с выражением и условием из get_vacancies_with_higher_salary
+            """
+            CREATE INDEX IF NOT EXISTS vacancies_salary_mid_idx
+                ON vacancies (((min_salary + max_salary) / 2))
+                WHERE closed_at IS NULL
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "Материализованная статистика по работодателям и зарплатам",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS employer_stats (
+                employer_id VARCHAR(20) PRIMARY KEY REFERENCES employers(id) ON DELETE CASCADE,
+                vacancy_count INTEGER NOT NULL DEFAULT 0,
+                salary_count INTEGER NOT NULL DEFAULT 0,
+                salary_sum NUMERIC NOT NULL DEFAULT 0,
+                avg_salary NUMERIC,
+                median_salary NUMERIC,
+                p25_salary NUMERIC,
+                p75_salary NUMERIC,
+                currency_counts JSONB NOT NULL DEFAULT '{}',
+                refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS salary_stats (
+                id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                vacancy_count INTEGER NOT NULL DEFAULT 0,
+                salary_count INTEGER NOT NULL DEFAULT 0,
+                avg_salary NUMERIC,
+                median_salary NUMERIC,
+                p25_salary NUMERIC,
+                p75_salary NUMERIC,
+                p90_salary NUMERIC,
+                currency_counts JSONB NOT NULL DEFAULT '{}',
+                refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+        ),
+    ),
+    Migration(
+        6,
+        "Курсы валют и нормализованная зарплата в рублях",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS exchange_rates (
+                code VARCHAR(10) PRIMARY KEY,
+                rate NUMERIC NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS salary_rub_mid NUMERIC",
+            """
+            CREATE INDEX IF NOT EXISTS vacancies_salary_rub_mid_idx
+                ON vacancies (salary_rub_mid)
+                WHERE closed_at IS NULL
+            """,
+            # Аналитика больше не считает середину вилки на лету
+            "DROP INDEX IF EXISTS vacancies_salary_mid_idx",
+        ),
+    ),
+    Migration(
+        7,
+        "Очередь заданий загрузки с контрольными точками",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                finished_at TIMESTAMPTZ
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ingestion_jobs_active_name_idx
+                ON ingestion_jobs (name)
+                WHERE finished_at IS NULL
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_queue (
+                job_id INTEGER NOT NULL REFERENCES ingestion_jobs(id) ON DELETE CASCADE,
+                item_key TEXT NOT NULL,
+                key_type VARCHAR(10) NOT NULL DEFAULT 'id' CHECK (key_type IN ('id', 'name')),
+                position INTEGER NOT NULL,
+                status VARCHAR(12) NOT NULL DEFAULT 'pending'
+                    CHECK (status IN ('pending', 'in_progress', 'done', 'failed')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                claimed_by TEXT,
+                claimed_at TIMESTAMPTZ,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (job_id, item_key)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ingestion_queue_pending_idx
+                ON ingestion_queue (job_id, position)
+                WHERE status = 'pending'
+            """,
+        ),
+    ),
+    Migration(
+        8,
+        "Подробности вакансий и ключевые навыки",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS vacancy_details (
+                vacancy_id VARCHAR(20) PRIMARY KEY REFERENCES vacancies(id) ON DELETE CASCADE,
+                description TEXT,
+                experience VARCHAR(30),
+                schedule VARCHAR(30),
+                employment VARCHAR(30),
+                source_hash CHAR(40) NOT NULL,
+                fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS skills (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL,
+                normalized_name TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS vacancy_skills (
+                vacancy_id VARCHAR(20) NOT NULL REFERENCES vacancies(id) ON DELETE CASCADE,
+                skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+                PRIMARY KEY (vacancy_id, skill_id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS vacancy_skills_skill_id_idx ON vacancy_skills (skill_id)",
+        ),
+    ),
+    Migration(
+        9,
+        "Версия индекса навыков: время последней загрузки подробностей",
+        ("CREATE INDEX IF NOT EXISTS vacancy_details_fetched_at_idx ON vacancy_details (fetched_at)",),
+    ),
+    Migration(
+        10,
+        "Обход рынка: срезы поисковой выдачи с контрольными точками",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS crawls (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL,
+                params JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                finished_at TIMESTAMPTZ
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS crawls_active_name_idx
+                ON crawls (name)
+                WHERE finished_at IS NULL
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS crawl_slices (
+                crawl_id INTEGER NOT NULL REFERENCES crawls(id) ON DELETE CASCADE,
+                slice_key TEXT NOT NULL,
+                params JSONB NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0,
+                status VARCHAR(12) NOT NULL DEFAULT 'pending'
+                    CHECK (status IN ('pending', 'in_progress', 'split', 'done', 'failed')),
+                found INTEGER,
+                fetched INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                claimed_by TEXT,
+                claimed_at TIMESTAMPTZ,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (crawl_id, slice_key)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS crawl_slices_pending_idx
+                ON crawl_slices (crawl_id, depth DESC)
+                WHERE status = 'pending'
+            """,
+        ),
+    ),
+    Migration(
+        11,
+        "Отложенный повтор элементов очереди загрузки после временных сбоев",
+        (
+            """
+            ALTER TABLE ingestion_queue
+                ADD COLUMN IF NOT EXISTS available_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            """,
+        ),
+    ),
+    Migration(
+        12,
+        "Отложенный повтор срезов обхода рынка после временных сбоев",
+        (
+            """
+            ALTER TABLE crawl_slices
+                ADD COLUMN IF NOT EXISTS available_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            """,
+        ),
+    ),
+]
+
+# Произвольный ключ advisory-блокировки, чтобы два процесса не мигрировали БД одновременно
+MIGRATION_LOCK_ID = 7_460_221
+
+
+def apply_migrations(connection) -> List[int]:
+    """Применяет к БД все ещё не применённые миграции и возвращает их версии"""
+    with connection.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """
+        )
+        connection.commit()
+
+        applied = []
+        for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+            # Каждая миграция — отдельная транзакция под общей блокировкой
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (migration.version,))
+            if cur.fetchone():
+                connection.commit()
+                continue
+
+            for statement in migration.statements:
+                cur.execute(statement)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (migration.version, migration.description),
+            )
+            connection.commit()
+            applied.append(migration.version)
+
+    return applied
+
+
+def get_schema_version(connection) -> int:
+    """Возвращает последнюю применённую версию схемы (0 для пустой БД)"""
+    with connection.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return 0
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        return cur.fetchone()[0]
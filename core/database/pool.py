@@ -0,0 +1,88 @@
+import atexit
+import threading
+import time
+from typing import Dict
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from core.utils.config_loader import get_db_config, get_pool_config
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с PostgreSQL с проверкой живости и переподключением"""
+
+    def __init__(self, db_name: str, min_connections: int, max_connections: int, health_check_interval: float):
+        params = get_db_config()
+        params["dbname"] = db_name
+        self.db_name = db_name
+        self.health_check_interval = health_check_interval
+        self._pool = ThreadedConnectionPool(min_connections, max_connections, **params)
+        # ThreadedConnectionPool бросает PoolError при исчерпании, семафор заставляет ждать
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._last_used: Dict[int, float] = {}
+
+    @staticmethod
+    def _is_alive(connection) -> bool:
+        """Проверяет, что соединение открыто и сервер отвечает"""
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Выдаёт соединение из пула, при необходимости переподключаясь"""
+        self._slots.acquire()
+        try:
+            connection = self._pool.getconn()
+            # Только что открытые соединения не проверяем, остальные — после долгого простоя
+            last_used = self._last_used.pop(id(connection), None)
+            if last_used is not None and time.monotonic() - last_used > self.health_check_interval:
+                if not self._is_alive(connection):
+                    # Соединение оборвалось (рестарт сервера, таймаут): выбрасываем и открываем новое
+                    self._pool.putconn(connection, close=True)
+                    connection = self._pool.getconn()
+            return connection
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection) -> None:
+        """Возвращает соединение в пул (незавершённая транзакция откатывается)"""
+        try:
+            if not connection.closed:
+                self._last_used[id(connection)] = time.monotonic()
+            self._pool.putconn(connection, close=bool(connection.closed))
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        """Закрывает все соединения пула"""
+        if not self._pool.closed:
+            self._pool.closeall()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name: str = "career_db") -> ConnectionPool:
+    """Возвращает общий для процесса пул соединений с указанной БД"""
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = ConnectionPool(db_name, **get_pool_config())
+            _pools[db_name] = pool
+        return pool
+
+
+@atexit.register
+def close_pools() -> None:
+    """Закрывает все пулы соединений процесса"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
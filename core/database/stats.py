@@ -0,0 +1,134 @@
+from typing import Iterable, Optional
+
+# Середина вилки в рублях, рассчитанная при загрузке (индекс vacancies_salary_rub_mid_idx)
+SALARY_MID_SQL = "salary_rub_mid"
+
+
+def refresh_employer_stats(connection, employer_ids: Optional[Iterable[str]] = None) -> None:
+    """Пересчитывает агрегаты по указанным работодателям (по всем, если список не задан)"""
+    ids = None if employer_ids is None else list(employer_ids)
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            WITH open_vacancies AS (
+                SELECT employer_id, currency, {SALARY_MID_SQL} AS mid
+                FROM vacancies
+                WHERE closed_at IS NULL
+                  AND (%(ids)s::VARCHAR[] IS NULL OR employer_id = ANY(%(ids)s))
+            ),
+            currencies AS (
+                SELECT employer_id, jsonb_object_agg(currency, total) AS currency_counts
+                FROM (
+                    SELECT employer_id, currency, COUNT(*) AS total
+                    FROM open_vacancies
+                    WHERE currency IS NOT NULL
+                    GROUP BY employer_id, currency
+                ) c
+                GROUP BY employer_id
+            )
+            INSERT INTO employer_stats (
+                employer_id, vacancy_count, salary_count, salary_sum,
+                avg_salary, median_salary, p25_salary, p75_salary, currency_counts, refreshed_at
+            )
+            SELECT
+                e.id,
+                COUNT(ov.employer_id),
+                COUNT(ov.mid),
+                COALESCE(SUM(ov.mid), 0),
+                AVG(ov.mid),
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY ov.mid),
+                percentile_cont(0.25) WITHIN GROUP (ORDER BY ov.mid),
+                percentile_cont(0.75) WITHIN GROUP (ORDER BY ov.mid),
+                COALESCE(c.currency_counts, '{{}}'::JSONB),
+                NOW()
+            FROM employers e
+            LEFT JOIN open_vacancies ov ON ov.employer_id = e.id
+            LEFT JOIN currencies c ON c.employer_id = e.id
+            WHERE %(ids)s::VARCHAR[] IS NULL OR e.id = ANY(%(ids)s)
+            GROUP BY e.id, c.currency_counts
+            ON CONFLICT (employer_id) DO UPDATE SET
+                vacancy_count = EXCLUDED.vacancy_count,
+                salary_count = EXCLUDED.salary_count,
+                salary_sum = EXCLUDED.salary_sum,
+                avg_salary = EXCLUDED.avg_salary,
+                median_salary = EXCLUDED.median_salary,
+                p25_salary = EXCLUDED.p25_salary,
+                p75_salary = EXCLUDED.p75_salary,
+                currency_counts = EXCLUDED.currency_counts,
+                refreshed_at = EXCLUDED.refreshed_at
+            """,
+            {"ids": ids},
+        )
+
+
+def refresh_salary_stats(connection) -> None:
+    """Пересчитывает глобальную строку статистики.
+
+    Количество, сумма и распределение по валютам складываются из employer_stats
+    (размер — число работодателей), перцентили требуют прохода по зарплатам открытых вакансий
+    и поэтому считаются один раз на пакет загрузки, а не на каждый запрос из интерфейса.
+    """
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO salary_stats (
+                id, vacancy_count, salary_count, avg_salary,
+                median_salary, p25_salary, p75_salary, p90_salary, currency_counts, refreshed_at
+            )
+            SELECT
+                TRUE,
+                totals.vacancy_count,
+                totals.salary_count,
+                totals.salary_sum / NULLIF(totals.salary_count, 0),
+                pct.median_salary,
+                pct.p25_salary,
+                pct.p75_salary,
+                pct.p90_salary,
+                COALESCE(currencies.currency_counts, '{{}}'::JSONB),
+                NOW()
+            FROM (
+                SELECT
+                    COALESCE(SUM(vacancy_count), 0) AS vacancy_count,
+                    COALESCE(SUM(salary_count), 0) AS salary_count,
+                    COALESCE(SUM(salary_sum), 0) AS salary_sum
+                FROM employer_stats
+            ) totals,
+            (
+                SELECT
+                    percentile_cont(0.5) WITHIN GROUP (ORDER BY mid) AS median_salary,
+                    percentile_cont(0.25) WITHIN GROUP (ORDER BY mid) AS p25_salary,
+                    percentile_cont(0.75) WITHIN GROUP (ORDER BY mid) AS p75_salary,
+                    percentile_cont(0.9) WITHIN GROUP (ORDER BY mid) AS p90_salary
+                FROM (SELECT {SALARY_MID_SQL} AS mid FROM vacancies WHERE closed_at IS NULL) v
+            ) pct,
+            (
+                SELECT jsonb_object_agg(currency, total) AS currency_counts
+                FROM (
+                    SELECT key AS currency, SUM(value::INTEGER) AS total
+                    FROM employer_stats, jsonb_each_text(currency_counts)
+                    GROUP BY key
+                ) c
+            ) currencies
+            ON CONFLICT (id) DO UPDATE SET
+                vacancy_count = EXCLUDED.vacancy_count,
+                salary_count = EXCLUDED.salary_count,
+                avg_salary = EXCLUDED.avg_salary,
+                median_salary = EXCLUDED.median_salary,
+                p25_salary = EXCLUDED.p25_salary,
+                p75_salary = EXCLUDED.p75_salary,
+                p90_salary = EXCLUDED.p90_salary,
+                currency_counts = EXCLUDED.currency_counts,
+                refreshed_at = EXCLUDED.refreshed_at
+            """
+        )
+
+
+def refresh_statistics(connection, employer_ids: Optional[Iterable[str]] = None) -> None:
+    """Обновляет статистику по затронутым работодателям и глобальную строку в одной транзакции"""
+    try:
+        refresh_employer_stats(connection, employer_ids)
+        refresh_salary_stats(connection)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
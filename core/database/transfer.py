@@ -0,0 +1,309 @@
+"""Выгрузка и загрузка таблиц employers и vacancies в файлы.
+
+CSV идёт напрямую через COPY (сервер сам формирует поток), JSONL, Parquet и Arrow IPC —
+через серверный курсор порциями по chunk_size строк, поэтому память ограничена размером порции.
+Загрузка кладёт данные во временную таблицу и сливает их в рабочую одним INSERT ... ON CONFLICT.
+Встроенная БД (core/database/embedded.py) пишет и читает те же файлы порциями, CSV — модулем csv.
+"""
+
+import csv
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+from psycopg2.extras import execute_values
+from core.database.stats import refresh_statistics
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet/Arrow необязательны
+    pa = pa_ipc = pq = None
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv", "jsonl": ".jsonl"}
+
+# Порядок важен: вакансии ссылаются на работодателей
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "employers": ("id", "name", "location", "website"),
+    "vacancies": (
+        "id",
+        "employer_id",
+        "title",
+        "min_salary",
+        "max_salary",
+        "currency",
+        "url",
+        "description",
+        "published_at",
+        "content_hash",
+        "salary_rub_mid",
+        "updated_at",
+        "closed_at",
+    ),
+}
+
+# Типы столбцов для Parquet/Arrow (имя типа pyarrow); остальные столбцы — строки
+ARROW_TYPES = {
+    "min_salary": "int32",
+    "max_salary": "int32",
+    "salary_rub_mid": "float64",
+    "published_at": "timestamp",
+    "updated_at": "timestamp",
+    "closed_at": "timestamp",
+}
+
+# Слияние загруженных строк: как при обычной загрузке, меняются только отличающиеся записи
+MERGE_CONFLICT = {
+    "employers": """
+        ON CONFLICT (id) DO UPDATE SET
+            name = EXCLUDED.name,
+            location = EXCLUDED.location,
+            website = EXCLUDED.website
+        WHERE (employers.name, employers.location, employers.website)
+            IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.location, EXCLUDED.website)
+    """,
+    "vacancies": """
+        ON CONFLICT (id) DO UPDATE SET
+            employer_id = EXCLUDED.employer_id,
+            title = EXCLUDED.title,
+            min_salary = EXCLUDED.min_salary,
+            max_salary = EXCLUDED.max_salary,
+            currency = EXCLUDED.currency,
+            url = EXCLUDED.url,
+            description = EXCLUDED.description,
+            published_at = EXCLUDED.published_at,
+            content_hash = EXCLUDED.content_hash,
+            salary_rub_mid = EXCLUDED.salary_rub_mid,
+            updated_at = EXCLUDED.updated_at,
+            closed_at = EXCLUDED.closed_at
+        WHERE (vacancies.content_hash, vacancies.closed_at)
+            IS DISTINCT FROM (EXCLUDED.content_hash, EXCLUDED.closed_at)
+    """,
+}
+
+
+class TableTransferResult(NamedTuple):
+    """Итог по таблице: строк в файле, вставлено, обновлено, пропущено (без изменений или без работодателя)"""
+
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+
+def table_path(directory: str, table: str, fmt: str) -> str:
+    return os.path.join(directory, f"{table}{FORMATS[fmt]}")
+
+
+def detect_format(directory: str) -> Optional[str]:
+    """Определяет формат выгрузки по расширению файла таблицы employers"""
+    for fmt in FORMATS:
+        if os.path.exists(table_path(directory, "employers", fmt)):
+            return fmt
+    return None
+
+
+def default_format() -> str:
+    """Формат выгрузки по умолчанию: parquet, если установлен pyarrow, иначе csv"""
+    return "parquet" if pa is not None else "csv"
+
+
+def _require_arrow(fmt: str) -> None:
+    if fmt in ("parquet", "arrow") and pa is None:
+        raise ImportError(f"Для формата {fmt} установите пакет pyarrow")
+
+
+def _arrow_schema(table: str):
+    fields = []
+    for column in TABLE_COLUMNS[table]:
+        type_name = ARROW_TYPES.get(column, "string")
+        arrow_type = pa.timestamp("us", tz="UTC") if type_name == "timestamp" else pa.type_for_alias(type_name)
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _arrow_value(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _iter_chunks(connection, table: str, chunk_size: int) -> Iterator[List[tuple]]:
+    """Порции строк таблицы через серверный курсор"""
+    with connection.cursor(name=f"export_{table}_{uuid4().hex}") as cur:
+        cur.itersize = chunk_size
+        cur.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} ORDER BY id")
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+
+def _export_table(connection, table: str, path: str, fmt: str, chunk_size: int) -> int:
+    if fmt == "csv":
+        with connection.cursor() as cur, open(path, "w", encoding="utf-8", newline="") as f:
+            cur.copy_expert(
+                f"COPY (SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} ORDER BY id) "
+                "TO STDOUT WITH (FORMAT csv, HEADER true)",
+                f,
+            )
+            return cur.rowcount
+    return _write_chunks(_iter_chunks(connection, table, chunk_size), table, path, fmt)
+
+
+def _write_chunks(chunks: Iterator[List[tuple]], table: str, path: str, fmt: str) -> int:
+    """Записывает порции строк таблицы в файл выгрузки и возвращает число строк"""
+    columns = TABLE_COLUMNS[table]
+    total = 0
+    if fmt == "csv":
+        # Пустое поле — NULL, как в COPY ... FORMAT csv
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rows in chunks:
+                writer.writerows(tuple(_json_value(value) for value in row) for row in rows)
+                total += len(rows)
+        return total
+
+    if fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for rows in chunks:
+                f.writelines(
+                    json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+                total += len(rows)
+        return total
+
+    schema = _arrow_schema(table)
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa_ipc.new_file(path, schema)
+    try:
+        for rows in chunks:
+            data = {c: [_arrow_value(row[i]) for row in rows] for i, c in enumerate(columns)}
+            writer.write_batch(pa.RecordBatch.from_pydict(data, schema=schema))
+            total += len(rows)
+    finally:
+        writer.close()
+    return total
+
+
+def export_dataset(connection, directory: str, fmt: str = "csv", chunk_size: int = 20000) -> Dict[str, int]:
+    """Выгружает таблицы в directory/<таблица>.<формат>; возвращает число строк по таблицам.
+
+    Обе таблицы читаются в одной транзакции REPEATABLE READ, поэтому выгрузка согласована.
+    """
+    _require_arrow(fmt)
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    try:
+        with connection.cursor() as cur:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        for table in TABLE_COLUMNS:
+            counts[table] = _export_table(connection, table, table_path(directory, table, fmt), fmt, chunk_size)
+    finally:
+        connection.rollback()
+    return counts
+
+
+def _iter_file_chunks(path: str, table: str, fmt: str, chunk_size: int) -> Iterator[List[tuple]]:
+    """Порции строк из файла выгрузки в порядке столбцов TABLE_COLUMNS"""
+    columns = TABLE_COLUMNS[table]
+    if fmt in ("jsonl", "csv"):
+        rows = []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                records = ({c: value or None for c, value in record.items()} for record in csv.DictReader(f))
+            else:
+                records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                rows.append(tuple(record.get(c) for c in columns))
+                if len(rows) >= chunk_size:
+                    yield rows
+                    rows = []
+        if rows:
+            yield rows
+        return
+
+    if fmt == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(columns))
+    else:
+        reader = pa_ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        data = batch.to_pydict()
+        yield list(zip(*(data[c] for c in columns)))
+
+
+def _import_table(connection, table: str, path: str, fmt: str, chunk_size: int) -> TableTransferResult:
+    columns = TABLE_COLUMNS[table]
+    column_list = ", ".join(columns)
+    staging = f"import_{table}"
+    with connection.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA")
+        if fmt == "csv":
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                cur.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, HEADER true)", f)
+        else:
+            for rows in _iter_file_chunks(path, table, fmt, chunk_size):
+                execute_values(cur, f"INSERT INTO {staging} ({column_list}) VALUES %s", rows, page_size=chunk_size)
+
+        cur.execute(f"SELECT COUNT(*) FROM {staging}")
+        (total,) = cur.fetchone()
+
+        select_list = ", ".join("COALESCE(s.updated_at, NOW())" if c == "updated_at" else f"s.{c}" for c in columns)
+        # Вакансии без работодателя в БД пропускаются, а не роняют всю загрузку на внешнем ключе
+        orphan_filter = (
+            "WHERE EXISTS (SELECT 1 FROM employers e WHERE e.id = s.employer_id)" if table == "vacancies" else ""
+        )
+        cur.execute(
+            f"""
+            WITH merged(inserted) AS (
+                INSERT INTO {table} ({column_list})
+                SELECT DISTINCT ON (s.id) {select_list}
+                FROM {staging} s
+                {orphan_filter}
+                ORDER BY s.id
+                {MERGE_CONFLICT[table]}
+                RETURNING (xmax = 0)
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+            """
+        )
+        inserted, updated = cur.fetchone()
+    return TableTransferResult(rows=total, inserted=inserted, updated=updated, skipped=total - inserted - updated)
+
+
+def import_dataset(
+    connection, directory: str, fmt: Optional[str] = None, chunk_size: int = 20000
+) -> Dict[str, TableTransferResult]:
+    """Загружает выгрузку из directory в одной транзакции и пересчитывает статистику"""
+    fmt = fmt or detect_format(directory)
+    if fmt not in FORMATS:
+        raise ValueError(f"Не найдена выгрузка в {directory}")
+    _require_arrow(fmt)
+
+    results = {}
+    try:
+        for table in TABLE_COLUMNS:
+            path = table_path(directory, table, fmt)
+            if os.path.exists(path):
+                results[table] = _import_table(connection, table, path, fmt, chunk_size)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    refresh_statistics(connection)
+    return results
@@ -0,0 +1,258 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from core.database.db_manager import DBManager
+from core.services.columnar import DEFAULT_PERCENTILES, group_percentile, json_number, np, require_numpy
+from core.utils.config_loader import get_analytics_config
+
+# Версия формата файла снимка: при изменении состава массивов старые снимки пересобираются
+SNAPSHOT_FORMAT = 1
+
+ARRAY_FIELDS = (
+    "vacancy_ids",
+    "employer_codes",
+    "employer_ids",
+    "employer_names",
+    "currency_codes",
+    "currencies",
+    "salaries",
+    "titles",
+)
+
+# Слова названий вакансий: применяется к тексту в нижнем регистре
+TITLE_TOKEN_RE = re.compile(r"[a-zа-яё0-9+#]+")
+TITLE_STOPWORDS = frozenset({"и", "в", "на", "по", "с", "со", "для", "из", "от", "of", "and", "the", "in", "to"})
+
+# Снимки, уже загруженные в этом процессе: db_name -> снимок
+_snapshots: Dict[str, "VacancySnapshot"] = {}
+
+
+class VacancySnapshot:
+    """Колоночный снимок открытых вакансий в массивах NumPy.
+
+    Работодатель и валюта хранятся как категории: массив кодов и отсортированный массив значений.
+    Зарплата — salary_rub_mid (середина вилки в рублях, как Vacancy.get_avg_salary), NaN если не указана.
+    """
+
+    __slots__ = ["version"] + list(ARRAY_FIELDS)
+
+    def __init__(
+        self,
+        version: str,
+        vacancy_ids,
+        employer_codes,
+        employer_ids,
+        employer_names,
+        currency_codes,
+        currencies,
+        salaries,
+        titles,
+    ):
+        self.version = version
+        self.vacancy_ids = vacancy_ids
+        self.employer_codes = employer_codes
+        self.employer_ids = employer_ids
+        self.employer_names = employer_names
+        self.currency_codes = currency_codes
+        self.currencies = currencies
+        self.salaries = salaries
+        self.titles = titles
+
+    def __len__(self) -> int:
+        return len(self.vacancy_ids)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple], version: str = "") -> "VacancySnapshot":
+        """Собирает снимок из строк (id, employer_id, name, currency, salary_rub_mid, title)"""
+        require_numpy()
+        vacancy_ids, employers, currencies, salaries, titles = [], [], [], [], []
+        names: Dict[str, str] = {}
+        for vacancy_id, employer_id, name, currency, salary, title in rows:
+            vacancy_ids.append(vacancy_id)
+            employers.append(employer_id)
+            names[employer_id] = name or ""
+            currencies.append(currency or "")
+            salaries.append(np.nan if salary is None else float(salary))
+            titles.append(title or "")
+
+        employer_ids, employer_codes = np.unique(np.array(employers, dtype=str), return_inverse=True)
+        currency_values, currency_codes = np.unique(np.array(currencies, dtype=str), return_inverse=True)
+        return cls(
+            version,
+            np.array(vacancy_ids, dtype=str),
+            employer_codes.astype(np.int32),
+            employer_ids,
+            np.array([names[employer_id] for employer_id in employer_ids], dtype=str),
+            currency_codes.astype(np.int16),
+            currency_values,
+            np.array(salaries, dtype=np.float64),
+            np.array(titles, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: str, version: str) -> Optional["VacancySnapshot"]:
+        """Читает снимок с диска; None, если файла нет или он собран по другой версии данных"""
+        require_numpy()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["format"]) != SNAPSHOT_FORMAT or str(data["version"]) != version:
+                    return None
+                return cls(version, *(data[name] for name in ARRAY_FIELDS))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: str) -> None:
+        """Атомарно сохраняет снимок в npz (без pickle)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                format=np.array(SNAPSHOT_FORMAT),
+                version=np.array(self.version),
+                **{name: getattr(self, name) for name in ARRAY_FIELDS},
+            )
+        os.replace(tmp_path, path)
+
+    def _employer_code(self, employer_id: str) -> int:
+        code = int(np.searchsorted(self.employer_ids, employer_id))
+        if code >= len(self.employer_ids) or self.employer_ids[code] != employer_id:
+            raise KeyError(f"Работодатель {employer_id} отсутствует в снимке")
+        return code
+
+    def _employer_mask(self, employer_id: Optional[str]):
+        if employer_id is None:
+            return np.ones(len(self), dtype=bool)
+        return self.employer_codes == self._employer_code(employer_id)
+
+    def salaries_for(self, employer_id: Optional[str] = None):
+        """Указанные зарплаты в рублях (по всем работодателям, если employer_id не задан)"""
+        values = self.salaries[self._employer_mask(employer_id)]
+        return values[~np.isnan(values)]
+
+    def market_summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> dict:
+        """Сводка по рынку: количество вакансий, средняя зарплата и перцентили"""
+        values = self.salaries_for()
+        summary = {
+            "vacancy_count": len(self),
+            "salary_count": len(values),
+            "avg_salary": json_number(values.mean()) if len(values) else None,
+        }
+        points = np.percentile(values, percentiles) if len(values) else [np.nan] * len(percentiles)
+        summary.update({f"p{q:g}": json_number(value) for q, value in zip(percentiles, points)})
+        return summary
+
+    def employer_stats(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> List[dict]:
+        """Количество вакансий, средняя зарплата и перцентили по каждому работодателю за один проход"""
+        has_salary = ~np.isnan(self.salaries)
+        codes = self.employer_codes[has_salary]
+        values = self.salaries[has_salary]
+        # Сортировка по (работодатель, зарплата): группы идут подряд, внутри — по возрастанию
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+
+        size = len(self.employer_ids)
+        vacancy_counts = np.bincount(self.employer_codes, minlength=size)
+        salary_counts = np.bincount(codes, minlength=size)
+        salary_sums = np.bincount(codes, weights=values, minlength=size)
+        starts = np.cumsum(salary_counts) - salary_counts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = salary_sums / salary_counts
+        points = {q: group_percentile(values, starts, salary_counts, q) for q in percentiles}
+
+        rows = []
+        for code in np.argsort(-vacancy_counts, kind="stable"):
+            row = {
+                "employer_id": str(self.employer_ids[code]),
+                "name": str(self.employer_names[code]),
+                "vacancy_count": int(vacancy_counts[code]),
+                "salary_count": int(salary_counts[code]),
+                "avg_salary": json_number(means[code]),
+            }
+            row.update({f"p{q:g}": json_number(points[q][code]) for q in percentiles})
+            rows.append(row)
+        return rows
+
+    def salary_histogram(
+        self,
+        bins: Optional[int] = None,
+        employer_id: Optional[str] = None,
+        value_range: Optional[Tuple[float, float]] = None,
+    ) -> dict:
+        """Гистограмма зарплат в рублях: границы интервалов и количество вакансий в каждом"""
+        values = self.salaries_for(employer_id)
+        if not len(values):
+            return {"edges": [], "counts": []}
+        counts, edges = np.histogram(values, bins=bins or get_analytics_config()["histogram_bins"], range=value_range)
+        return {"edges": [json_number(edge) for edge in edges], "counts": counts.tolist()}
+
+    def title_keywords(self, top: Optional[int] = None, employer_id: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Самые частые слова в названиях вакансий"""
+        titles = self.titles[self._employer_mask(employer_id)]
+        tokens = TITLE_TOKEN_RE.findall("\n".join(titles.tolist()).lower())
+        if not tokens:
+            return []
+        words, counts = np.unique(np.array(tokens, dtype=str), return_counts=True)
+        keep = (np.char.str_len(words) > 1) & ~np.isin(words, list(TITLE_STOPWORDS))
+        words, counts = words[keep], counts[keep]
+        order = np.argsort(-counts, kind="stable")[: top or get_analytics_config()["top_keywords"]]
+        return [(str(words[i]), int(counts[i])) for i in order]
+
+    def currency_counts(self, employer_id: Optional[str] = None) -> Dict[str, int]:
+        """Количество вакансий по валютам вилки"""
+        codes = self.currency_codes[self._employer_mask(employer_id)]
+        counts = np.bincount(codes, minlength=len(self.currencies))
+        return {str(currency): int(count) for currency, count in zip(self.currencies, counts) if currency and count}
+
+    def compare_employers(
+        self, employer_ids: Sequence[str], percentiles: Sequence[float] = DEFAULT_PERCENTILES
+    ) -> dict:
+        """Сравнение работодателей между собой и с рынком (медиана относительно рыночной)"""
+        market = self.market_summary(percentiles)
+        stats = {row["employer_id"]: row for row in self.employer_stats(percentiles)}
+        employers = []
+        for employer_id in employer_ids:
+            self._employer_code(employer_id)
+            row = dict(stats[employer_id])
+            median, market_median = row.get("p50"), market.get("p50")
+            row["median_vs_market"] = round(median / market_median, 3) if median and market_median else None
+            row["currencies"] = self.currency_counts(employer_id)
+            employers.append(row)
+        return {"market": market, "employers": employers}
+
+
+def snapshot_path(db_name: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or get_analytics_config()["cache_dir"], f"analytics_{db_name}.npz")
+
+
+def load_snapshot(
+    db_name: str = "career_db", cache_dir: Optional[str] = None, refresh: bool = False
+) -> VacancySnapshot:
+    """Возвращает актуальный снимок вакансий: из памяти процесса, с диска или собранный из БД.
+
+    Версия снимка — salary_stats.refreshed_at, который загрузка обновляет после каждого пакета,
+    поэтому новые данные в БД автоматически делают сохранённый снимок устаревшим. Снимок сохраняется
+    на диск только после того, как строки из БД прочитаны полностью: обрыв чтения — ConnectionError.
+    """
+    require_numpy()
+    db = DBManager(db_name)
+    if not db.connect():
+        raise ConnectionError("Не удалось подключиться к базе данных")
+    try:
+        refreshed_at = db.get_stats_version()
+        version = refreshed_at.isoformat() if refreshed_at else ""
+        path = snapshot_path(db_name, cache_dir)
+
+        cached = _snapshots.get(db_name)
+        if not refresh and version and cached is not None and cached.version == version:
+            return cached
+        snapshot = None if refresh or not version else VacancySnapshot.load(path, version)
+        if snapshot is None:
+            snapshot = VacancySnapshot.from_rows(db.iter_vacancy_snapshot(), version)
+            if version:
+                snapshot.save(path)
+    finally:
+        db.disconnect()
+
+    _snapshots[db_name] = snapshot
+    return snapshot
@@ -1,103 +1,406 @@
 import requests
-from typing import List, Optional, Dict
-from core.utils.config_loader import get_api_config
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+from requests.adapters import HTTPAdapter
+from core.services.employer_index import EmployerIndex
+from core.services.errors import APIUnavailableError, CircuitOpenError, HeadHunterAPIError, RateLimitedError
+from core.services.http_cache import OfflineCacheMiss, ResponseCache
+from core.services.payload_archive import PayloadArchive, open_archive
+from core.services.rate_limiter import TokenBucket
+from core.services.resilience import CircuitBreaker, backoff_delay, parse_retry_after
+from core.utils.config_loader import get_api_config, get_cache_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY, endpoint_label
+
+# API отдаёт не больше 2000 результатов на один поисковый запрос (page * per_page)
+MAX_SEARCH_DEPTH = 2000
+VACANCIES_PER_PAGE = 100
+# Поиск вакансий ограничен последними 30 днями, меньше часа окно не дробим
+SEARCH_PERIOD = timedelta(days=30)
+MIN_DATE_SLICE = timedelta(hours=1)
+
+logger = get_logger(__name__)
+
+
+def parse_area_slices(data: Dict) -> List[str]:
+    """Извлекает ID регионов из кластеров поиска, если они покрывают всю выдачу"""
+    area_ids, covered = [], 0
+    for cluster in data.get("clusters") or []:
+        if cluster.get("id") != "area":
+            continue
+        for item in cluster.get("items", []):
+            area_id = parse_qs(urlparse(item.get("url", "")).query).get("area", [None])[0]
+            if area_id:
+                area_ids.append(area_id)
+                covered += item.get("count", 0)
+
+    # Если кластеры покрывают не всю выдачу, разбиение по регионам потеряет вакансии
+    return area_ids if covered >= data.get("found", 0) else []
+
+
+def split_date_window(params: Dict) -> List[Dict]:
+    """Делит окно дат публикации запроса пополам; пустой список, если окно уже минимальное"""
+    now = datetime.now().replace(microsecond=0)
+    date_from = datetime.fromisoformat(params.get("date_from", (now - SEARCH_PERIOD).isoformat()))
+    date_to = datetime.fromisoformat(params.get("date_to", now.isoformat()))
+    if date_to - date_from <= MIN_DATE_SLICE:
+        return []
+
+    middle = date_from + (date_to - date_from) / 2
+    return [
+        {**params, "date_from": window_from.isoformat(), "date_to": window_to.isoformat()}
+        for window_from, window_to in ((date_from, middle), (middle, date_to))
+    ]
+
+
+class VacancyListing:
+    """Полнота выдачи, которую обходит iter_vacancy_pages.
+
+    Выдача неполна, если не уместилась в лимит глубины даже после разбиения или если окна дат
+    покрыли только последние SEARCH_PERIOD: по такой выдаче нельзя закрывать отсутствующие вакансии.
+    """
+
+    __slots__ = ["complete", "reason"]
+
+    def __init__(self):
+        self.complete = True
+        self.reason: Optional[str] = None
+
+    def truncate(self, reason: str) -> None:
+        if self.complete:
+            self.complete = False
+            self.reason = reason
+
+
+def date_split_truncates(params: Dict) -> bool:
+    """Окна дат без заданного date_from покрывают только последние SEARCH_PERIOD, более ранние вакансии теряются"""
+    return "date_from" not in params
+
+
+def employer_vacancy_params(employer_id: str) -> Dict:
+    """Параметры поиска всех вакансий работодателя"""
+    params = {"employer_id": employer_id}
+    if employer_id == "39305":
+        params["host"] = "hh.ru"
+    return params
 
 
 class HeadHunterAPI:
     """Класс для работы с API HeadHunter"""
 
-    def __init__(self):
-        self.base_url = "https://api.hh.ru"
-        self.headers = {"User-Agent": get_api_config().get("user_agent")}
+    def __init__(
+        self,
+        rate_limiter: Optional[TokenBucket] = None,
+        base_url: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        employer_index: Optional[EmployerIndex] = None,
+        archive: Optional[PayloadArchive] = None,
+    ):
+        api_config = get_api_config()
+        self.base_url = base_url or api_config["base_url"]
+        self.headers = {"User-Agent": api_config.get("user_agent")}
         self.session = requests.Session()
+        # Пул соединений рассчитан на все рабочие потоки, иначе urllib3 закрывает лишние соединения
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=api_config["pool_maxsize"])
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = api_config["timeout"]
+        self.max_retries = api_config["max_retries"]
+        self.backoff_base = api_config["backoff_base"]
+        self.backoff_cap = api_config["backoff_cap"]
+        self.breaker_max_wait = api_config["breaker_max_wait"]
+        self.breaker = CircuitBreaker(api_config["breaker_threshold"], api_config["breaker_cooldown"])
+        self.rate_limiter = rate_limiter or TokenBucket(api_config["requests_per_second"])
+        # Кэш, архив и результаты поиска хранятся отдельно для каждого адреса API
+        self.cache = cache if cache is not None else self._create_cache(self.base_url)
+        # Локальный индекс названий: поиск в API только для неизвестных компаний
+        self.employer_index = (
+            employer_index if employer_index is not None else EmployerIndex.from_local_sources(base_url=self.base_url)
+        )
+        # Архив исходных ответов: из него таблицы перестраиваются без сети (команда reprocess)
+        self.archive = archive if archive is not None else open_archive(self.base_url)
+
+    @staticmethod
+    def _create_cache(base_url: Optional[str] = None) -> Optional[ResponseCache]:
+        """Создаёт дисковый кэш ответов адреса API base_url по настройкам (или None, если кэш выключен)"""
+        cache_config = get_cache_config(base_url)
+        if not cache_config["enabled"]:
+            return None
+        return ResponseCache(
+            cache_config["path"], cache_config["max_bytes"], cache_config["ttls"], cache_config["offline"]
+        )
+
+    def _request(
+        self, path: str, headers: Optional[Dict] = None, max_retries: Optional[int] = None, **kwargs
+    ) -> requests.Response:
+        """Выполняет сетевой GET-запрос с лимитом частоты, повторами и общим размыкателем.
+
+        Ответы 429 и 5xx, таймауты и обрывы соединения повторяются с экспоненциальной задержкой;
+        если попытки исчерпаны, бросается HeadHunterAPIError — вызывающий может вернуть задачу в очередь.
+        Остальные ответы (в том числе 4xx) возвращаются как есть.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.max_retries if max_retries is None else max_retries
+        error: HeadHunterAPIError = APIUnavailableError(f"Запрос {path} не выполнен", path)
+        endpoint = endpoint_label(path)
+
+        for attempt in range(retries + 1):
+            if not self.breaker.wait(self.breaker_max_wait):
+                raise CircuitOpenError(f"Запросы к API приостановлены после серии сбоев ({path})", path)
+            self.rate_limiter.acquire()
+            if attempt:
+                REGISTRY.inc("hh_http_retries_total", endpoint=endpoint)
+
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = self.session.get(
+                    f"{self.base_url}{path}", headers={**self.headers, **(headers or {})}, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                REGISTRY.observe(
+                    "hh_http_request_seconds", time.perf_counter() - started, endpoint=endpoint, status="error"
+                )
+                self.breaker.record_failure()
+                error = APIUnavailableError(f"Сетевая ошибка при запросе {path}: {e}", path)
+            else:
+                # Без stream=True тело уже прочитано: время включает загрузку ответа
+                REGISTRY.observe(
+                    "hh_http_request_seconds",
+                    time.perf_counter() - started,
+                    endpoint=endpoint,
+                    status=response.status_code,
+                )
+                REGISTRY.inc("hh_http_response_bytes_total", len(response.content), endpoint=endpoint)
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    # Троттлинг касается всех потоков: приостанавливаем их разом
+                    self.breaker.trip(retry_after or self.breaker.cooldown)
+                    error = RateLimitedError(f"Превышен лимит запросов к API ({path})", path, retry_after)
+                elif response.status_code >= 500:
+                    self.breaker.record_failure()
+                    error = APIUnavailableError(
+                        f"API вернул {response.status_code} на запрос {path}", path, response.status_code
+                    )
+                else:
+                    self.breaker.record_success()
+                    return response
+
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap, retry_after))
+        raise error
+
+    def _get(self, path: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        """Выполняет GET-запрос через кэш: свежий ответ отдаётся с диска, устаревший ревалидируется"""
+        if self.cache is None:
+            return self._request(path, params=params, **kwargs)
+
+        key = self.cache.make_key(path, params)
+        cached = self.cache.lookup(key)
+        if cached and self.cache.is_fresh(cached, path):
+            self.cache.count(hits=1)
+            return cached.to_response()
+        if self.cache.offline:
+            self.cache.count(misses=1)
+            raise OfflineCacheMiss(f"Ответ на {key} отсутствует в кэше (офлайн-режим)")
+
+        conditional = {}
+        if cached and cached.etag:
+            conditional["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            conditional["If-Modified-Since"] = cached.last_modified
+
+        response = self._request(path, headers=conditional, params=params, **kwargs)
+        if response.status_code == 304 and cached:
+            self.cache.count(hits=1, revalidated=1)
+            self.cache.touch(key)
+            return cached.to_response()
+
+        self.cache.count(misses=1)
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
+
+    @staticmethod
+    def _json(response: requests.Response, path: str):
+        """Разбирает JSON ответа, замеряя время разбора"""
+        with REGISTRY.timer("hh_json_decode_seconds", endpoint=endpoint_label(path)):
+            return response.json()
 
     def test_connection(self) -> bool:
         """Проверяет доступность API"""
+        if self.cache is not None and self.cache.offline:
+            return True
         try:
-            response = self.session.get(f"{self.base_url}/vacancies", headers=self.headers)
+            response = self._request("/vacancies", max_retries=1, params={"per_page": 0})
             return response.status_code == 200
-        except requests.RequestException:
+        except (requests.RequestException, HeadHunterAPIError):
             return False
 
     def get_employer_id_by_name(self, name: str) -> Optional[str]:
-        """Ищет ID работодателя по названию с улучшенным поиском"""
-        # Сначала проверяем известные компании
-        known_id = self.get_known_employer_id(name)
-        if known_id:
-            return known_id
+        """Ищет ID работодателя по названию: сначала в локальном индексе, затем одним запросом к API.
+
+        Временные сбои API пробрасываются как HeadHunterAPIError, None означает «не найдено».
+        """
+        match = self.employer_index.lookup(name)
+        if match:
+            return match.employer_id
+        if self.employer_index.is_recent_miss(name):
+            return None
 
-        # Если не найдено в известных, ищем через API
         try:
-            # Пробуем разные варианты написания названия
-            search_queries = [name, name + " компания", name + " группа"]
+            params = {"text": name, "per_page": 20, "only_with_vacancies": True}
+            response = self._get("/employers", params=params, timeout=10)
+            response.raise_for_status()
+            employer = self.employer_index.best_candidate(name, self._json(response, "/employers").get("items", []))
+        except HeadHunterAPIError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка поиска работодателя {name}: {e}", extra={"employer_name": name})
+            return None
 
-            for query in search_queries:
-                params = {"text": query, "per_page": 1, "only_with_vacancies": True}
-                response = self.session.get(
-                    f"{self.base_url}/employers", params=params, headers=self.headers, timeout=10
-                )
-                response.raise_for_status()
-                data = response.json()
-                items = data.get("items", [])
+        # Результат (и «не найдено») запоминается на диске: повторный запуск обойдётся без сети
+        self.employer_index.remember(name, employer)
+        return employer.get("id") if employer else None
 
-                if items:
-                    # Берем первый результат
-                    employer = items[0]
-                    # Проверяем, что название хотя бы частично совпадает
-                    if name.lower() in employer.get("name", "").lower():
-                        return employer.get("id")
+    def _fetch_vacancy_page(self, params: Dict, page: int) -> Dict:
+        """Запрашивает одну страницу поиска вакансий"""
+        params = {**params, "page": page}
+        response = self._get("/vacancies", params=params, timeout=15)
+        response.raise_for_status()
+        data = self._json(response, "/vacancies")
+        if self.archive is not None:
+            self.archive.append("vacancy_page", ResponseCache.make_key("/vacancies", params), data)
+        return data
 
-            return None
-        except Exception as e:
-            print(f"Ошибка поиска работодателя {name}: {e}")
-            return None
+    def search_vacancies_page(self, params: Dict, page: int = 0, clusters: bool = False) -> Dict:
+        """Одна страница поиска вакансий как есть (found, pages, items; с clusters — и кластеры выдачи)"""
+        params = {"per_page": VACANCIES_PER_PAGE, **params}
+        if clusters:
+            params["clusters"] = "true"
+        return self._fetch_vacancy_page(params, page)
 
-    def get_vacancies_by_employer_id(self, employer_id: str, per_page: int = 20) -> List[Dict]:
-        """Получает вакансии работодателя по ID"""
+    def _get_area_slices(self, params: Dict) -> List[str]:
+        """Возвращает ID регионов из кластеров поиска, если они покрывают всю выдачу"""
         try:
-            params = {"employer_id": employer_id, "per_page": per_page}
-            if employer_id == "39305":
-                params["host"] = "hh.ru"
-
-            response = self.session.get(f"{self.base_url}/vacancies", params=params, headers=self.headers, timeout=15)
+            response = self._get("/vacancies", params={**params, "per_page": 0, "clusters": "true"}, timeout=15)
             response.raise_for_status()
-            data = response.json()
-            return data.get("items", [])
+            data = self._json(response, "/vacancies")
+        except HeadHunterAPIError:
+            raise
         except Exception as e:
-            print(f"Ошибка получения вакансий для работодателя {employer_id}: {e}")
+            logger.error(f"Ошибка получения кластеров по регионам ({params}): {e}", extra={"params": params})
+            return []
+
+        return parse_area_slices(data)
+
+    def _iter_sliced_pages(self, params: Dict, listing: VacancyListing) -> Iterator[List[Dict]]:
+        """Обходит ограничение глубины выдачи, разбивая запрос по регионам и датам публикации"""
+        if "area" not in params:
+            area_ids = self._get_area_slices(params)
+            if area_ids:
+                for area_id in area_ids:
+                    yield from self.iter_vacancy_pages({**params, "area": area_id}, listing=listing)
+                return
+
+        windows = split_date_window(params)
+        if not windows:
+            logger.warning(
+                f"⚠️ Выдача {params} не помещается в {MAX_SEARCH_DEPTH} результатов, часть вакансий пропущена",
+                extra={"params": params},
+            )
+            listing.truncate(f"выдача не помещается в {MAX_SEARCH_DEPTH} результатов")
+            yield from self.iter_vacancy_pages(params, split=False, listing=listing)
+            return
+        if date_split_truncates(params):
+            listing.truncate(f"окна дат покрывают только последние {SEARCH_PERIOD.days} дней")
+
+        for window_params in windows:
+            yield from self.iter_vacancy_pages(window_params, listing=listing)
+
+    def iter_vacancy_pages(
+        self, params: Dict, split: bool = True, listing: Optional[VacancyListing] = None
+    ) -> Iterator[List[Dict]]:
+        """Постранично отдаёт результаты поиска вакансий, не загружая всю выдачу в память.
+
+        Ошибка получения любой страницы пробрасывается вызывающему: неполная выдача
+        не должна выглядеть как полная (иначе пропавшие вакансии будут закрыты). Если выдачу
+        не удалось получить целиком без ошибок, об этом сообщает listing.complete.
+        """
+        listing = listing if listing is not None else VacancyListing()
+        params = {"per_page": VACANCIES_PER_PAGE, **params}
+        first_page = self._fetch_vacancy_page(params, 0)
+
+        if split and first_page.get("found", 0) > MAX_SEARCH_DEPTH:
+            yield from self._iter_sliced_pages(params, listing)
+            return
+
+        yield first_page.get("items", [])
+        for page in range(1, first_page.get("pages", 1)):
+            yield self._fetch_vacancy_page(params, page).get("items", [])
+
+    def iter_vacancies_by_employer_id(
+        self, employer_id: str, listing: Optional[VacancyListing] = None
+    ) -> Iterator[List[Dict]]:
+        """Постранично отдаёт все вакансии работодателя (полноту выдачи сообщает listing)"""
+        return self.iter_vacancy_pages(employer_vacancy_params(employer_id), listing=listing)
+
+    def get_vacancies_by_employer_id(self, employer_id: str) -> List[Dict]:
+        """Получает все вакансии работодателя по ID (временные сбои API пробрасываются)"""
+        try:
+            return [item for page in self.iter_vacancies_by_employer_id(employer_id) for item in page]
+        except HeadHunterAPIError:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Ошибка получения вакансий для работодателя {employer_id}: {e}", extra={"employer_id": employer_id}
+            )
             return []
 
     def get_employer_info(self, employer_id: str) -> Optional[Dict]:
-        """Получает информацию о работодателе по ID"""
+        """Получает информацию о работодателе по ID (None — работодатель не найден)"""
         try:
-            response = self.session.get(f"{self.base_url}/employers/{employer_id}", headers=self.headers, timeout=10)
+            response = self._get(f"/employers/{employer_id}", timeout=10)
             response.raise_for_status()
-            return response.json()
+            data = self._json(response, "/employers/{id}")
+            if self.archive is not None:
+                self.archive.append("employer", employer_id, data)
+            return data
+        except HeadHunterAPIError:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Ошибка получения информации о работодателе {employer_id}: {e}", extra={"employer_id": employer_id}
+            )
+            return None
+
+    def get_vacancy_details(self, vacancy_id: str) -> Optional[Dict]:
+        """Получает полную вакансию по ID (None — вакансия удалена или в архиве).
+
+        Временные сбои API пробрасываются как HeadHunterAPIError, прочие ошибки HTTP — как requests.HTTPError.
+        """
+        response = self._get(f"/vacancies/{vacancy_id}", timeout=10)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = self._json(response, "/vacancies/{id}")
+        if self.archive is not None:
+            self.archive.append("vacancy", vacancy_id, data)
+        return None if data.get("archived") else data
+
+    def get_dictionaries(self) -> Optional[Dict]:
+        """Получает справочники hh.ru (в том числе курсы валют)"""
+        try:
+            response = self._get("/dictionaries", timeout=10)
+            response.raise_for_status()
+            return self._json(response, "/dictionaries")
         except Exception as e:
-            print(f"Ошибка получения информации о работодателе {employer_id}: {e}")
+            logger.error(f"Ошибка получения справочников: {e}")
             return None
 
     def get_known_employer_id(self, name: str) -> Optional[str]:
-        """Возвращает ID для известных компаний по предопределенному списку"""
-        known_companies = {
-            "яндекс": "1740",
-            "yandex": "1740",
-            "сбербанк": "3529",
-            "sberbank": "3529",
-            "sber": "3529",
-            "газпром": "39305",
-            "gazprom": "39305",
-            "x5": "6093775",
-            "x5 group": "6093775",
-            "лср": "1473868",
-            "lsr": "1473868",
-            "vk": "15478",
-            "вконтакте": "15478",
-        }
-
-        # Ищем в разных вариантах написания
-        for key, value in known_companies.items():
-            if key in name.lower():
-                return value
-
-        return None
+        """Возвращает ID компании из локального индекса названий (без обращения к API)"""
+        match = self.employer_index.lookup(name)
+        return match.employer_id if match else None
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional
+from core.services.api import (
+    MAX_SEARCH_DEPTH,
+    SEARCH_PERIOD,
+    VACANCIES_PER_PAGE,
+    VacancyListing,
+    date_split_truncates,
+    employer_vacancy_params,
+    parse_area_slices,
+    split_date_window,
+)
+from core.services.http_cache import ResponseCache
+from core.services.payload_archive import open_archive
+from core.services.rate_limiter import AsyncTokenBucket
+from core.utils.config_loader import get_api_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY, endpoint_label
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - асинхронный режим необязателен
+    aiohttp = None
+
+logger = get_logger(__name__)
+
+
+class AsyncHeadHunterAPI:
+    """Асинхронный клиент API HeadHunter (aiohttp) для параллельной загрузки"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, base_url: Optional[str] = None):
+        if aiohttp is None:
+            raise ImportError("Для асинхронной загрузки установите пакет aiohttp")
+        api_config = get_api_config()
+        self.base_url = base_url or api_config["base_url"]
+        self.headers = {"User-Agent": api_config.get("user_agent")}
+        self.rate_limiter = AsyncTokenBucket(api_config["requests_per_second"])
+        self.max_concurrency = max_concurrency or api_config["max_concurrency"]
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self.archive = open_archive(self.base_url)
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=30),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.max_concurrency),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.session.close()
+
+    async def _get(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """Выполняет GET-запрос с учётом лимита частоты и числа одновременных запросов"""
+        await self.rate_limiter.acquire()
+        endpoint = endpoint_label(path)
+        async with self.semaphore:
+            started = time.perf_counter()
+            async with self.session.get(f"{self.base_url}{path}", params=params) as response:
+                body = await response.read()
+            REGISTRY.observe(
+                "hh_http_request_seconds", time.perf_counter() - started, endpoint=endpoint, status=response.status
+            )
+            REGISTRY.inc("hh_http_response_bytes_total", len(body), endpoint=endpoint)
+            response.raise_for_status()
+        with REGISTRY.timer("hh_json_decode_seconds", endpoint=endpoint):
+            return json.loads(body)
+
+    async def test_connection(self) -> bool:
+        """Проверяет доступность API"""
+        try:
+            await self._get("/vacancies", {"per_page": 0})
+            return True
+        except Exception:
+            return False
+
+    async def _archive(self, kind: str, key: str, data: Dict) -> None:
+        """Сохраняет ответ в архив; запись блока на диск идёт вне цикла событий"""
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.append, kind, key, data)
+
+    async def get_employer_info(self, employer_id: str) -> Optional[Dict]:
+        """Получает информацию о работодателе по ID"""
+        try:
+            data = await self._get(f"/employers/{employer_id}")
+            await self._archive("employer", employer_id, data)
+            return data
+        except Exception as e:
+            logger.error(
+                f"Ошибка получения информации о работодателе {employer_id}: {e}", extra={"employer_id": employer_id}
+            )
+            return None
+
+    async def _fetch_vacancy_page(self, params: Dict, page: int) -> Dict:
+        """Запрашивает одну страницу поиска вакансий"""
+        params = {**params, "page": page}
+        data = await self._get("/vacancies", params)
+        await self._archive("vacancy_page", ResponseCache.make_key("/vacancies", params), data)
+        return data
+
+    async def iter_vacancy_pages(
+        self, params: Dict, split: bool = True, listing: Optional[VacancyListing] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """Асинхронно отдаёт страницы выдачи; страницы после первой запрашиваются параллельно.
+
+        Как и в синхронном клиенте, ошибка любой страницы пробрасывается вызывающему,
+        а неполноту выдачи сообщает listing.complete.
+        """
+        listing = listing if listing is not None else VacancyListing()
+        params = {"per_page": VACANCIES_PER_PAGE, **{key: str(value) for key, value in params.items()}}
+        first_page = await self._fetch_vacancy_page(params, 0)
+
+        if split and first_page.get("found", 0) > MAX_SEARCH_DEPTH:
+            async for page in self._iter_sliced_pages(params, listing):
+                yield page
+            return
+
+        yield first_page.get("items", [])
+        pending = [
+            asyncio.ensure_future(self._fetch_vacancy_page(params, page))
+            for page in range(1, first_page.get("pages", 1))
+        ]
+        try:
+            for task in pending:
+                yield (await task).get("items", [])
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _iter_sliced_pages(self, params: Dict, listing: VacancyListing) -> AsyncIterator[List[Dict]]:
+        """Обходит ограничение глубины выдачи, разбивая запрос по регионам и датам публикации"""
+        if "area" not in params:
+            try:
+                area_ids = parse_area_slices(
+                    await self._get("/vacancies", {**params, "per_page": 0, "clusters": "true"})
+                )
+            except Exception as e:
+                logger.error(f"Ошибка получения кластеров по регионам ({params}): {e}", extra={"params": params})
+                area_ids = []
+            if area_ids:
+                for area_id in area_ids:
+                    async for page in self.iter_vacancy_pages({**params, "area": area_id}, listing=listing):
+                        yield page
+                return
+
+        windows = split_date_window(params)
+        if not windows:
+            logger.warning(
+                f"⚠️ Выдача {params} не помещается в {MAX_SEARCH_DEPTH} результатов, часть вакансий пропущена",
+                extra={"params": params},
+            )
+            listing.truncate(f"выдача не помещается в {MAX_SEARCH_DEPTH} результатов")
+            windows, split = [params], False
+        else:
+            if date_split_truncates(params):
+                listing.truncate(f"окна дат покрывают только последние {SEARCH_PERIOD.days} дней")
+            split = True
+
+        for window_params in windows:
+            async for page in self.iter_vacancy_pages(window_params, split=split, listing=listing):
+                yield page
+
+    def iter_vacancies_by_employer_id(
+        self, employer_id: str, listing: Optional[VacancyListing] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """Асинхронно отдаёт все вакансии работодателя постранично (полноту выдачи сообщает listing)"""
+        return self.iter_vacancy_pages(employer_vacancy_params(employer_id), listing=listing)
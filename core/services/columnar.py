@@ -0,0 +1,32 @@
+"""Общие вычисления над колоночными снимками в массивах NumPy (аналитика вакансий и индекс навыков)"""
+
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - аналитика необязательна
+    np = None
+
+DEFAULT_PERCENTILES = (25, 50, 75)
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise ImportError("Для аналитики установите пакет numpy")
+
+
+def json_number(value) -> Optional[float]:
+    """NaN → None, остальное — float с округлением до копеек (для JSON и вывода)"""
+    value = float(value)
+    return None if value != value else round(value, 2)
+
+
+def group_percentile(values, starts, counts, q: float):
+    """Перцентиль по группам отсортированного массива (линейная интерполяция, как percentile_cont)"""
+    result = np.full(len(counts), np.nan)
+    present = counts > 0
+    position = starts[present] + (counts[present] - 1) * (q / 100.0)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.ceil(position).astype(np.intp)
+    result[present] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return result
@@ -0,0 +1,260 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from core.data_models.employer import Employer
+from core.data_models.vacancy import Vacancy
+from core.database.crawl_state import CrawlCheckpoint, CrawlSlice, slice_key
+from core.database.db_manager import DBManager
+from core.services.api import MAX_SEARCH_DEPTH, SEARCH_PERIOD, HeadHunterAPI, parse_area_slices, split_date_window
+from core.services.currency import CurrencyConverter
+from core.services.errors import HeadHunterAPIError, RateLimitedError
+from core.utils.config_loader import get_crawler_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+
+def search_criteria(text: Optional[str] = None, areas: Sequence[str] = (), roles: Sequence[str] = ()) -> Dict:
+    """Параметры поиска /vacancies по тексту, регионам и профессиональным ролям"""
+    params = {}
+    if text:
+        params["text"] = text
+    if areas:
+        params["area"] = list(areas)
+    if roles:
+        params["professional_role"] = list(roles)
+    return params
+
+
+def crawl_params(criteria: Dict, now: Optional[datetime] = None) -> Dict:
+    """Параметры корневого среза обхода: критерии и окно дат за весь доступный период поиска"""
+    now = (now or datetime.now()).replace(microsecond=0)
+    return {**criteria, "date_from": (now - SEARCH_PERIOD).isoformat(), "date_to": now.isoformat()}
+
+
+def default_crawl_name(criteria: Dict) -> str:
+    """Имя обхода по критериям: повторный запуск с теми же критериями продолжает незавершённый обход"""
+    return f"crawl:{slice_key(criteria)}"
+
+
+class SliceResult(NamedTuple):
+    """Итог обработки одного среза выдачи"""
+
+    status: str
+    found: int = 0
+    fetched: int = 0
+    saved: int = 0
+    updated: int = 0
+    employers: int = 0
+    new_slices: int = 0
+    error: Optional[str] = None
+    employer_ids: Tuple[str, ...] = ()
+
+
+class CrawlSummary(NamedTuple):
+    """Итоги обхода: срезы по итогам, вакансии и найденные работодатели"""
+
+    crawl_id: int
+    slices_done: int = 0
+    slices_split: int = 0
+    slices_failed: int = 0
+    slices_retried: int = 0
+    slices_truncated: int = 0
+    vacancies_found: int = 0
+    vacancies_saved: int = 0
+    vacancies_updated: int = 0
+    employers_discovered: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class MarketCrawler:
+    """Обход всего рынка по поисковому запросу /vacancies, а не по списку работодателей.
+
+    API отдаёт не больше 2000 результатов на запрос, поэтому выдача, которая не помещается целиком,
+    рекурсивно делится на срезы: сначала по регионам (кластеры выдачи), затем пополам по окну дат
+    публикации, пока каждый срез не поместится. Срезы хранятся в crawl_slices и обрабатываются пулом
+    потоков; прерванный обход продолжается с незавершённых срезов. Работодатели из выдачи добавляются
+    в employers автоматически. Вакансии, пропавшие из выдачи, обход не закрывает: срез — не вся
+    выдача работодателя.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "career_db",
+        api: Optional[HeadHunterAPI] = None,
+        converter: Optional[CurrencyConverter] = None,
+        workers: Optional[int] = None,
+    ):
+        config = get_crawler_config()
+        self.db_name = db_name
+        self.api = api or HeadHunterAPI()
+        self.converter = converter or CurrencyConverter.from_fixture()
+        self.workers = workers or config["workers"]
+        self.checkpoint = CrawlCheckpoint(db_name, config["max_attempts"], config["retry_delay"])
+        self.stale_claim_timeout = config["stale_claim_timeout"]
+
+    @staticmethod
+    def plan_children(params: Dict, first_page: Dict) -> List[Dict]:
+        """Дочерние срезы для выдачи больше MAX_SEARCH_DEPTH; пустой список, если делить уже нельзя"""
+        if "area" not in params:
+            area_ids = parse_area_slices(first_page)
+            if area_ids:
+                return [{**params, "area": area_id} for area_id in area_ids]
+        return split_date_window(params)
+
+    def _build_page(self, items: List[Dict]):
+        """Модели вакансий и работодателей страницы выдачи (вакансии анонимных работодателей пропускаются)"""
+        with REGISTRY.timer("ingest_parse_seconds"):
+            employers = {}
+            vacancies = []
+            for item in items:
+                employer_data = item.get("employer") or {}
+                if not employer_data.get("id"):
+                    continue
+                employers.setdefault(employer_data["id"], Employer.from_api_response(employer_data))
+                vacancy = Vacancy.from_api_response(item)
+                vacancy.salary_rub_mid = self.converter.salary_mid_rub(vacancy)
+                vacancies.append(vacancy)
+        return list(employers.values()), vacancies
+
+    def _save_slice(self, db: DBManager, params: Dict, first_page: Dict) -> SliceResult:
+        """Постранично сохраняет выдачу среза: сначала работодателей страницы, затем её вакансии"""
+        fetched = saved = updated = discovered = 0
+        employer_ids: Set[str] = set()
+        page_data = first_page
+        for page in range(max(first_page.get("pages", 1), 1)):
+            if page:
+                page_data = self.api.search_vacancies_page(params, page)
+            employers, vacancies = self._build_page(page_data.get("items", []))
+            if employers:
+                discovered += db.save_discovered_employers_bulk(employers).inserted
+                employer_ids.update(employer.id for employer in employers)
+            result = db.save_vacancies_bulk(vacancies)
+            if result.failed:
+                raise RuntimeError(f"не удалось сохранить {result.failed} вакансий среза")
+            fetched += len(vacancies)
+            saved += result.inserted
+            updated += result.updated
+        return SliceResult(
+            "done", first_page.get("found", 0), fetched, saved, updated, discovered, employer_ids=tuple(employer_ids)
+        )
+
+    def _process_slice(self, item: CrawlSlice) -> SliceResult:
+        """Обрабатывает срез: делит его на дочерние или загружает целиком (выполняется в рабочем потоке)"""
+        try:
+            first_page = self.api.search_vacancies_page(item.params, clusters="area" not in item.params)
+            found = first_page.get("found", 0)
+            truncated = False
+            if found > MAX_SEARCH_DEPTH:
+                children = self.plan_children(item.params, first_page)
+                if children:
+                    return SliceResult("split", found, new_slices=self.checkpoint.split(item, found, children))
+                truncated = True
+                logger.warning(
+                    f"⚠️ Срез {item.key} не помещается в {MAX_SEARCH_DEPTH} результатов ({found}),"
+                    " часть вакансий пропущена",
+                    extra={"slice": item.key, "found": found},
+                )
+
+            db = DBManager(self.db_name)
+            if not db.connect():
+                raise ConnectionError("не удалось подключиться к базе данных")
+            try:
+                result = self._save_slice(db, item.params, first_page)
+            finally:
+                db.disconnect()
+            self.checkpoint.complete(item, found, result.fetched)
+            return result._replace(status="truncated") if truncated else result
+        except HeadHunterAPIError as e:
+            retry_after = e.retry_after if isinstance(e, RateLimitedError) else None
+            requeued = self.checkpoint.fail(item, str(e), retryable=True, retry_after=retry_after)
+            return SliceResult("retried" if requeued else "failed", error=str(e))
+        except Exception as e:
+            self.checkpoint.fail(item, str(e), retryable=False)
+            return SliceResult("failed", error=str(e))
+
+    def run(self, name: str, params: Dict) -> CrawlSummary:
+        """Обходит выдачу поиска params; обход с тем же именем продолжается с места остановки"""
+        started = time.monotonic()
+        crawl_id, params = self.checkpoint.open_crawl(name, params)
+        released = self.checkpoint.release_stale(crawl_id, self.stale_claim_timeout)
+        retried = self.checkpoint.retry_failed(crawl_id)
+        progress = self.checkpoint.progress(crawl_id)
+        logger.info(
+            f"🧭 Обход #{crawl_id} «{name}»: загружено срезов {progress.get('done', 0)},"
+            f" вакансий {progress['vacancies']}, возвращено в очередь после сбоя: {released},"
+            f" повторяются срезы с ошибкой: {retried}",
+            extra={"crawl_id": crawl_id, "progress": progress},
+        )
+
+        counts = dict.fromkeys(
+            ("done", "split", "failed", "retried", "truncated", "found", "saved", "updated", "employers"), 0
+        )
+        touched: Set[str] = set()
+
+        def collect(result: SliceResult) -> None:
+            counts[result.status] += 1
+            counts["found"] += result.fetched
+            counts["saved"] += result.saved
+            counts["updated"] += result.updated
+            counts["employers"] += result.employers
+            touched.update(result.employer_ids)
+            REGISTRY.inc("crawl_slices_total", result=result.status)
+            if result.error:
+                logger.warning(f"⚠️ Срез не загружен ({result.status}): {result.error}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight: Set[Future] = set()
+            while True:
+                # Дочерние срезы появляются в очереди по мере разбиения, поэтому захват идёт до её опустошения
+                while len(in_flight) < self.workers:
+                    item = self.checkpoint.claim(crawl_id)
+                    if item is None:
+                        break
+                    in_flight.add(executor.submit(self._process_slice, item))
+                if not in_flight:
+                    # Срезы после временного сбоя доступны не сразу: ждём ближайший, а не завершаем запуск
+                    delay = self.checkpoint.seconds_until_available(crawl_id)
+                    if delay is None:
+                        break
+                    logger.info(f"⏳ Повтор срезов после временных сбоев API через {delay:.0f} с")
+                    time.sleep(delay)
+                    continue
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+
+        if touched:
+            with DBManager(self.db_name) as db:
+                if db.connection is not None:
+                    db.refresh_stats(touched)
+
+        summary = CrawlSummary(
+            crawl_id,
+            slices_done=counts["done"] + counts["truncated"],
+            slices_split=counts["split"],
+            slices_failed=counts["failed"],
+            slices_retried=counts["retried"],
+            slices_truncated=counts["truncated"],
+            vacancies_found=counts["found"],
+            vacancies_saved=counts["saved"],
+            vacancies_updated=counts["updated"],
+            employers_discovered=counts["employers"],
+            elapsed_seconds=round(time.monotonic() - started, 3),
+        )
+        progress = self.checkpoint.progress(crawl_id)
+        finished = self.checkpoint.finish_if_done(crawl_id)
+        logger.info(
+            f"🧭 Обход #{crawl_id} {'завершён' if finished else 'не завершён'}: срезов загружено"
+            f" {summary.slices_done}, разделено {summary.slices_split}, с ошибкой {summary.slices_failed};"
+            f" вакансий {summary.vacancies_found} (новых {summary.vacancies_saved}, обновлено"
+            f" {summary.vacancies_updated}), новых работодателей {summary.employers_discovered}"
+            f" за {summary.elapsed_seconds:.1f} с",
+            extra={"crawl": summary.to_dict(), "progress": progress, "finished": finished},
+        )
+        return summary
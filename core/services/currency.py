@@ -0,0 +1,66 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+# Офлайн-снимок раздела currency из /dictionaries hh.ru
+CURRENCY_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "currency_rates.json")
+# Как часто обновлять курсы из API
+RATES_MAX_AGE = timedelta(days=1)
+
+
+class CurrencyConverter:
+    """Пересчёт зарплат в рубли по курсам из справочника hh.ru.
+
+    В справочнике rate — сколько единиц валюты стоит один рубль, поэтому сумма в рублях = amount / rate.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = {code: float(rate) for code, rate in rates.items() if rate}
+
+    @classmethod
+    def from_dictionaries(cls, data: dict) -> "CurrencyConverter":
+        """Создаёт конвертер из ответа /dictionaries"""
+        return cls({item["code"]: item.get("rate") for item in data.get("currency", []) if item.get("code")})
+
+    @classmethod
+    def from_fixture(cls, path: str = CURRENCY_FIXTURE_PATH) -> "CurrencyConverter":
+        """Создаёт конвертер из локального снимка справочника (работает без сети)"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dictionaries(json.load(f))
+
+    def to_rub(self, amount: Optional[float], currency: Optional[str]) -> Optional[float]:
+        """Переводит сумму в рубли; None, если сумма или курс неизвестны"""
+        if amount is None:
+            return None
+        rate = self.rates.get(currency or "RUR")
+        return round(amount / rate, 2) if rate else None
+
+    def salary_mid_rub(self, vacancy) -> Optional[float]:
+        """Середина вилки в рублях; при одной границе берётся она (как в Vacancy.get_avg_salary)"""
+        if not vacancy.min_salary and not vacancy.max_salary:
+            return None
+        return self.to_rub(vacancy.get_avg_salary(), vacancy.currency)
+
+
+def load_currency_converter(db, api=None, max_age: timedelta = RATES_MAX_AGE) -> CurrencyConverter:
+    """Возвращает конвертер по кэшированным в БД курсам, обновляя их из API при устаревании.
+
+    Без сети используются ранее сохранённые курсы, а при их отсутствии — локальный снимок справочника.
+    """
+    rates, updated_at = db.get_exchange_rates()
+    if rates and updated_at and datetime.now(timezone.utc) - updated_at < max_age:
+        return CurrencyConverter(rates)
+
+    dictionaries = api.get_dictionaries() if api else None
+    if dictionaries:
+        converter = CurrencyConverter.from_dictionaries(dictionaries)
+    elif rates:
+        converter = CurrencyConverter(rates)
+    else:
+        converter = CurrencyConverter.from_fixture()
+
+    # Смена курсов меняет рублёвые зарплаты всех вакансий, а значит и всю статистику
+    if converter.rates != rates and db.save_exchange_rates(converter.rates):
+        db.refresh_stats()
+    return converter
@@ -1,129 +1,571 @@
+import asyncio
+import logging
 import time
-import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Iterable, List, Optional, Tuple
 from core.data_models.employer import Employer
 from core.data_models.vacancy import Vacancy
-from core.database.db_manager import DBManager
-from core.services.api import HeadHunterAPI
+from core.database.async_writer import AsyncDBWriter
+from core.database.db_manager import DBManager, postgres_enabled
+from core.database.job_queue import JobQueue
+from core.services.api import HeadHunterAPI, VacancyListing
+from core.services.async_api import AsyncHeadHunterAPI
+from core.services.errors import HeadHunterAPIError
+from core.services.crawler import CrawlSummary, MarketCrawler
+from core.services.currency import CurrencyConverter, load_currency_converter
+from core.services.enricher import EnrichmentSummary, VacancyEnricher
+from core.services.reprocessor import ArchiveReprocessor, ReprocessSummary
+from core.utils.config_loader import get_ingestion_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+
+class EmployerLoadResult:
+    """Результат загрузки одного работодателя"""
+
+    __slots__ = [
+        "employer_id",
+        "messages",
+        "retryable",
+        "success",
+        "vacancies_found",
+        "vacancies_saved",
+        "vacancies_updated",
+        "vacancies_skipped",
+        "vacancies_closed",
+    ]
+
+    def __init__(self):
+        self.employer_id: Optional[str] = None
+        self.messages: List[str] = []
+        # Сбой был временным (троттлинг, недоступность API) — компанию стоит вернуть в очередь
+        self.retryable = False
+        self.success = False
+        self.vacancies_found = 0
+        self.vacancies_saved = 0
+        self.vacancies_updated = 0
+        self.vacancies_skipped = 0
+        self.vacancies_closed = 0
+
+    def log(self, message: str) -> None:
+        """Добавляет строку в отчёт по работодателю"""
+        self.messages.append(message)
+
+
+class LoadSummary:
+    """Итоги загрузки: счётчики по всем работодателям и скорость"""
+
+    __slots__ = [
+        "started",
+        "processed",
+        "succeeded",
+        "vacancies_found",
+        "vacancies_saved",
+        "vacancies_updated",
+        "pending_stats",
+    ]
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.processed = 0
+        self.succeeded = 0
+        self.vacancies_found = 0
+        self.vacancies_saved = 0
+        self.vacancies_updated = 0
+        # Работодатели, по которым ещё не пересчитана материализованная статистика
+        self.pending_stats: List[str] = []
+
+    def add(self, result: EmployerLoadResult) -> None:
+        """Учитывает результат загрузки одного работодателя"""
+        self.processed += 1
+        self.succeeded += result.success
+        self.vacancies_found += result.vacancies_found
+        self.vacancies_saved += result.vacancies_saved
+        self.vacancies_updated += result.vacancies_updated
+        if result.employer_id:
+            self.pending_stats.append(result.employer_id)
+
+    def report(self) -> None:
+        """Выводит итоговую сводку в журнал (в JSON-формате — с полями to_dict)"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        logger.info(
+            f"\n📊 Обработано компаний: {self.processed} (успешно: {self.succeeded}) за {elapsed:.1f} с\n"
+            f"📊 Вакансий получено: {self.vacancies_found}, новых: {self.vacancies_saved},"
+            f" обновлено: {self.vacancies_updated}\n"
+            f"📊 Скорость: {self.processed / elapsed:.2f} компаний/с,"
+            f" {self.vacancies_found / elapsed:.2f} вакансий/с",
+            extra={"summary": self.to_dict()},
+        )
+
+    def to_dict(self) -> dict:
+        """Сводка в виде словаря для машиночитаемого вывода"""
+        return {
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.processed - self.succeeded,
+            "vacancies_found": self.vacancies_found,
+            "vacancies_saved": self.vacancies_saved,
+            "vacancies_updated": self.vacancies_updated,
+            "elapsed_seconds": round(time.monotonic() - self.started, 3),
+        }
 
 
 class DataProcessor:
     """Обработчик данных: API → База данных"""
 
-    def __init__(self, db_name: str = "career_db"):
+    def __init__(self, db_name: str = "career_db", workers: Optional[int] = None):
         self.api = HeadHunterAPI()
         self.db_name = db_name
-        self.vacancies_per_employer = 20
+        ingestion_config = get_ingestion_config()
+        self.workers = workers or ingestion_config["workers"]
+        self.stats_batch_size = ingestion_config["stats_batch_size"]
+        self.write_queue_size = ingestion_config["write_queue_size"]
+        self.max_requeue_rounds = ingestion_config["max_requeue_rounds"]
+        self.requeue_delay = ingestion_config["requeue_delay"]
+        self.stale_claim_timeout = ingestion_config["stale_claim_timeout"]
+        self.converter = CurrencyConverter.from_fixture()
+        # Сводки последнего запуска (для неинтерактивного CLI)
+        self.last_summary: Optional[LoadSummary] = None
+        self.last_enrichment: Optional[EnrichmentSummary] = None
+        self.last_crawl: Optional[CrawlSummary] = None
+        self.last_reprocess: Optional[ReprocessSummary] = None
+
+    def _load_employer(
+        self, employer_id: str, result: EmployerLoadResult, name: Optional[str] = None
+    ) -> EmployerLoadResult:
+        """Загружает работодателя и его вакансии (выполняется в рабочем потоке)"""
+        # Получаем информацию о компании
+        employer_info = self.api.get_employer_info(employer_id)
+        if not employer_info:
+            if name:
+                result.log(f"⚠️ Не удалось получить информацию о компании: {name} ({employer_id})")
+            else:
+                result.log(f"⚠️ Не удалось получить информацию о компании с ID: {employer_id}")
+            return result
+        if name:
+            result.log(f"📄 Получена информация о компании: {employer_info.get('name')}")
+
+        # Соединение берётся из общего пула только на время записи данных работодателя
+        db = DBManager(self.db_name)
+        if not db.connect():
+            raise ConnectionError("не удалось подключиться к базе данных")
+        try:
+            return self._save_employer_data(db, employer_id, employer_info, result)
+        finally:
+            db.disconnect()
+
+    def _build_vacancies(self, page: List[dict]) -> List[Vacancy]:
+        """Строит модели вакансий страницы выдачи и пересчитывает зарплаты в рубли"""
+        with REGISTRY.timer("ingest_parse_seconds"):
+            vacancies = [Vacancy.from_api_response(vacancy_data) for vacancy_data in page]
+            for vacancy in vacancies:
+                vacancy.salary_rub_mid = self.converter.salary_mid_rub(vacancy)
+        return vacancies
+
+    def _save_employer_data(
+        self, db: DBManager, employer_id: str, employer_info: dict, result: EmployerLoadResult
+    ) -> EmployerLoadResult:
+        """Сохраняет работодателя и постранично загружает его вакансии"""
+        employer = Employer.from_api_response(employer_info)
+        if not db.save_employer(employer):
+            result.log(f"❌ Ошибка сохранения работодателя: {employer.name} ({employer_id})")
+            return result
+        result.employer_id = employer.id
+        result.log(f"💾 Работодатель сохранен: {employer.name}")
+
+        # Получаем вакансии постранично и сохраняем каждую страницу одним пакетом
+        seen_ids = []
+        listing = VacancyListing()
+        for page in self.api.iter_vacancies_by_employer_id(employer_id, listing):
+            vacancies = self._build_vacancies(page)
+            seen_ids.extend(vacancy.id for vacancy in vacancies)
+            result.vacancies_found += len(vacancies)
+            saved = db.save_vacancies_bulk(vacancies)
+            result.vacancies_saved += saved.inserted
+            result.vacancies_updated += saved.updated
+            result.vacancies_skipped += saved.skipped
+        result.log(f"📋 Получено вакансий: {result.vacancies_found}")
+
+        if listing.complete:
+            # Выдача получена полностью: всё, чего в ней нет, на hh.ru уже закрыто
+            result.vacancies_closed = db.close_missing_vacancies(employer_id, seen_ids)
+        else:
+            self._log_incomplete(listing, result)
+        result.log(
+            f"💾 Новых вакансий: {result.vacancies_saved}, обновлено: {result.vacancies_updated},"
+            f" без изменений: {result.vacancies_skipped}, закрыто: {result.vacancies_closed}"
+        )
+        result.success = True
+        return result
+
+    @staticmethod
+    def _log_incomplete(listing: VacancyListing, result: EmployerLoadResult) -> None:
+        """Неполная выдача: отсутствие вакансии в ней не значит, что вакансия закрыта"""
+        result.log(f"⚠️ Выдача вакансий неполная ({listing.reason}): отсутствующие вакансии не закрываются")
+
+    def _process_id(self, employer_id: str) -> EmployerLoadResult:
+        """Обрабатывает компанию по ID"""
+        result = EmployerLoadResult()
+        result.log(f"\n🔍 Обработка компании с ID: {employer_id}")
+        try:
+            return self._load_employer(employer_id, result)
+        except HeadHunterAPIError as e:
+            result.retryable = True
+            result.log(f"⏳ Временный сбой API для компании {employer_id}: {e}")
+            return result
+        except Exception as e:
+            result.log(f"⛔ Ошибка при обработке компании {employer_id}: {e}")
+            return result
+
+    def _process_name(self, name: str) -> EmployerLoadResult:
+        """Обрабатывает компанию по названию"""
+        result = EmployerLoadResult()
+        result.log(f"\n🔍 Обработка компании: {name}")
+        try:
+            # Поиск ID компании
+            employer_id = self.api.get_employer_id_by_name(name)
+            if not employer_id:
+                result.log(f"⚠️ Не найден ID для компании: {name}")
+                return result
+            result.log(f"✅ Найден ID компании: {employer_id}")
+            return self._load_employer(employer_id, result, name)
+        except HeadHunterAPIError as e:
+            result.retryable = True
+            result.log(f"⏳ Временный сбой API для компании {name}: {e}")
+            return result
+        except Exception as e:
+            result.log(f"⛔ Ошибка при обработке компании {name}: {e}")
+            return result
+
+    def _handle_result(self, result: EmployerLoadResult, summary: "LoadSummary") -> None:
+        """Выводит отчёт по работодателю и обновляет статистику по заполнении пакета"""
+        self._log_result(result)
+        summary.add(result)
+        if len(summary.pending_stats) >= self.stats_batch_size:
+            self._refresh_stats(summary.pending_stats)
+            summary.pending_stats = []
+
+    @staticmethod
+    def _log_result(result: EmployerLoadResult, *extra_messages: str) -> None:
+        """Выводит отчёт по работодателю одной записью журнала"""
+        logger.log(
+            logging.INFO if result.success else logging.WARNING,
+            "\n".join(result.messages + list(extra_messages)),
+            extra={
+                "employer_id": result.employer_id,
+                "success": result.success,
+                "retryable": result.retryable,
+                "vacancies_found": result.vacancies_found,
+                "vacancies_saved": result.vacancies_saved,
+                "vacancies_updated": result.vacancies_updated,
+                "vacancies_closed": result.vacancies_closed,
+            },
+        )
+
+    def _finish(self, summary: "LoadSummary") -> bool:
+        """Обновляет статистику по последнему пакету и выводит итоговую сводку"""
+        self._refresh_stats(summary.pending_stats)
+        summary.pending_stats = []
+        summary.report()
+        self.last_summary = summary
+        if self.api.cache is not None:
+            logger.info(f"📊 Кэш ответов API: {self.api.cache.summary()}")
+        return True
+
+    def _run(self, items: Iterable[str], worker: Callable[[str], EmployerLoadResult]) -> bool:
+        """Параллельно обрабатывает компании пулом потоков и выводит итоговую статистику"""
+        summary = LoadSummary()
+        pending = list(items)
+        for round_number in range(self.max_requeue_rounds + 1):
+            if round_number:
+                logger.info(f"\n🔁 Повторная обработка {len(pending)} компаний после временных сбоев API")
+                time.sleep(self.requeue_delay)
+
+            requeue = []
+            last_round = round_number == self.max_requeue_rounds
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(worker, item): item for item in pending}
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result.retryable and not last_round:
+                        self._log_result(result, "🔁 Компания возвращена в очередь")
+                        requeue.append(futures[future])
+                    else:
+                        self._handle_result(result, summary)
+
+            pending = requeue
+            if not pending:
+                break
+        return self._finish(summary)
+
+    async def _run_async(self, employer_ids: Iterable[str], api: AsyncHeadHunterAPI, writer: AsyncDBWriter) -> bool:
+        """Загружает компании асинхронно: сетевые запросы и запись в БД идут параллельно через очередь"""
+        summary = LoadSummary()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.write_queue_size)
+        employer_slots = asyncio.Semaphore(api.max_concurrency)
+
+        async def fetch(employer_id: str) -> EmployerLoadResult:
+            result = EmployerLoadResult()
+            result.log(f"\n🔍 Обработка компании с ID: {employer_id}")
+            async with employer_slots:
+                try:
+                    employer_info = await api.get_employer_info(employer_id)
+                    if not employer_info:
+                        result.log(f"⚠️ Не удалось получить информацию о компании с ID: {employer_id}")
+                        return result
+                    await queue.put((result, "employer", Employer.from_api_response(employer_info)))
+
+                    seen_ids: List[str] = []
+                    listing = VacancyListing()
+                    async for page in api.iter_vacancies_by_employer_id(employer_id, listing):
+                        vacancies = self._build_vacancies(page)
+                        seen_ids.extend(vacancy.id for vacancy in vacancies)
+                        result.vacancies_found += len(vacancies)
+                        await queue.put((result, "vacancies", vacancies))
+                    await queue.put((result, "close", (seen_ids, listing)))
+                except Exception as e:
+                    result.log(f"⛔ Ошибка при обработке компании {employer_id}: {e}")
+
+                # Отчёт выводим только после того, как писатель обработал все данные работодателя
+                flushed = asyncio.get_running_loop().create_future()
+                await queue.put((result, "flush", flushed))
+                await flushed
+                return result
+
+        async def write() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                result, kind, payload = item
+                if kind == "employer":
+                    if (await writer.save_employers_bulk([payload])).failed:
+                        result.log(f"❌ Ошибка сохранения работодателя: {payload.name} ({payload.id})")
+                    else:
+                        result.employer_id = payload.id
+                        result.log(f"💾 Работодатель сохранен: {payload.name}")
+                elif kind == "vacancies" and result.employer_id:
+                    saved = await writer.save_vacancies_bulk(payload)
+                    result.vacancies_saved += saved.inserted
+                    result.vacancies_updated += saved.updated
+                    result.vacancies_skipped += saved.skipped
+                elif kind == "close" and result.employer_id:
+                    seen_ids, listing = payload
+                    if listing.complete:
+                        result.vacancies_closed = await writer.close_missing_vacancies(result.employer_id, seen_ids)
+                    else:
+                        self._log_incomplete(listing, result)
+                    result.log(f"📋 Получено вакансий: {result.vacancies_found}")
+                    result.log(
+                        f"💾 Новых вакансий: {result.vacancies_saved}, обновлено: {result.vacancies_updated},"
+                        f" без изменений: {result.vacancies_skipped}, закрыто: {result.vacancies_closed}"
+                    )
+                    result.success = True
+                elif kind == "flush":
+                    payload.set_result(None)
+
+        writer_task = asyncio.create_task(write())
+        try:
+            for completed in asyncio.as_completed([fetch(employer_id) for employer_id in employer_ids]):
+                result = await completed
+                await asyncio.to_thread(self._handle_result, result, summary)
+        finally:
+            await queue.put(None)
+            await writer_task
+        return await asyncio.to_thread(self._finish, summary)
 
-    def load_by_names(self, company_names: list) -> bool:
-        """Загружает данные по списку названий компаний"""
+    def _refresh_stats(self, employer_ids: List[str]) -> None:
+        """Пересчитывает статистику по работодателям из завершённого пакета"""
+        if not employer_ids:
+            return
+        db = DBManager(self.db_name)
+        if not db.connect():
+            return
+        try:
+            db.refresh_stats(employer_ids)
+        finally:
+            db.disconnect()
+
+    def _check_database(self) -> bool:
+        """Проверяет доступность БД и подгружает курсы валют перед запуском рабочих потоков"""
+        db = DBManager(self.db_name)
+        if not db.connect():
+            return False
+        try:
+            self.converter = load_currency_converter(db, self.api)
+            # Названия уже загруженных работодателей дополняют локальный индекс
+            self.api.employer_index.add_many(db.get_employers(), "db")
+        finally:
+            db.disconnect()
+        return True
+
+    def _process_queue_item(self, job_queue: JobQueue, job_id: int) -> Optional[Tuple[EmployerLoadResult, bool]]:
+        """Захватывает и обрабатывает одну компанию из очереди задания (выполняется в рабочем потоке)"""
+        item = job_queue.claim(job_id)
+        if item is None:
+            return None
+
+        worker = self._process_id if item.key_type == "id" else self._process_name
+        result = worker(item.key)
+        if result.success:
+            job_queue.complete(item)
+            return result, False
+
+        requeued = job_queue.fail(item, result.messages[-1].strip(), result.retryable)
+        if requeued:
+            result.log(f"🔁 Компания возвращена в очередь (попытка {item.attempts} из {job_queue.max_attempts})")
+        return result, requeued
+
+    @staticmethod
+    def _job_queue_available() -> bool:
+        """Очередь заданий хранится в PostgreSQL; во встроенной БД компании обрабатываются без неё"""
+        if postgres_enabled():
+            return True
+        logger.warning("⚠️ Очередь заданий доступна только в PostgreSQL, компании обрабатываются без неё")
+        return False
+
+    def _run_job(self, job_name: str, items: Iterable[str], key_type: str) -> bool:
+        """Обрабатывает компании через персистентную очередь: прерванное задание продолжается с места остановки"""
+        job_queue = JobQueue(self.db_name, max_attempts=self.max_requeue_rounds + 1, retry_delay=self.requeue_delay)
+        job_id = job_queue.open_job(job_name, items, key_type)
+        released = job_queue.release_stale(job_id, self.stale_claim_timeout)
+        progress = job_queue.progress(job_id)
+        logger.info(
+            f"📦 Задание #{job_id} «{job_name}»: выполнено {progress.get('done', 0)} из {sum(progress.values())},"
+            f" возвращено в очередь после сбоя: {released}",
+            extra={"job_id": job_id, "progress": progress},
+        )
+
+        summary = LoadSummary()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                in_flight = {
+                    executor.submit(self._process_queue_item, job_queue, job_id) for _ in range(self.workers)
+                }
+                while in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        outcome = future.result()
+                        if outcome is None:
+                            # Доступных элементов для этого рабочего нет, новый захват не нужен
+                            continue
+                        result, requeued = outcome
+                        if requeued:
+                            self._log_result(result)
+                        else:
+                            self._handle_result(result, summary)
+                        in_flight.add(executor.submit(self._process_queue_item, job_queue, job_id))
+
+                # Возвращённые после сбоя компании доступны не сразу: ждём ближайшую, а не бросаем задание
+                delay = job_queue.seconds_until_available(job_id)
+                if delay is None:
+                    break
+                logger.info(f"⏳ Повторная обработка компаний после временных сбоев API через {delay:.0f} с")
+                time.sleep(delay)
+
+        progress = job_queue.progress(job_id)
+        if job_queue.finish_if_done(job_id):
+            logger.info(f"\n📦 Задание #{job_id} завершено: {progress}", extra={"job_id": job_id, "progress": progress})
+        else:
+            logger.info(
+                f"\n📦 Задание #{job_id} ещё не завершено (его обрабатывают другие процессы): {progress}",
+                extra={"job_id": job_id, "progress": progress},
+            )
+        return self._finish(summary)
+
+    def load_by_names(self, company_names: list, job_name: Optional[str] = None) -> bool:
+        """Загружает данные по списку названий компаний (через очередь задания, если задано job_name)"""
         if not self.api.test_connection():
-            print("❌ Ошибка подключения к API HeadHunter")
+            logger.error("❌ Ошибка подключения к API HeadHunter")
             return False
 
         try:
-            db = DBManager(self.db_name)
-            if not db.connect():
-                print("❌ Не удалось подключиться к базе данных")
+            if not self._check_database():
+                logger.error("❌ Не удалось подключиться к базе данных")
                 return False
+            if job_name and self._job_queue_available():
+                return self._run_job(job_name, company_names, "name")
+            return self._run(company_names, self._process_name)
+        except Exception as e:
+            logger.exception(f"⛔ Критическая ошибка в DataProcessor: {e}")
+            return False
 
-            for name in company_names:
-                print(f"\n🔍 Обработка компании: {name}")
-
-                # Поиск ID компании
-                employer_id = self.api.get_employer_id_by_name(name)
-                if not employer_id:
-                    print(f"⚠️ Не найден ID для компании: {name}")
-                    continue
-                print(f"✅ Найден ID компании: {employer_id}")
-
-                # Получение информации о компании
-                employer_info = self.api.get_employer_info(employer_id)
-                if not employer_info:
-                    print(f"⚠️ Не удалось получить информацию о компании: {name} ({employer_id})")
-                    continue
-                print(f"📄 Получена информация о компании: {employer_info.get('name')}")
-
-                # Создание и сохранение работодателя
-                employer = Employer.from_api_response(employer_info)
-                if not db.save_employer(employer):
-                    print(f"❌ Ошибка сохранения работодателя: {name}")
-                    continue
-                print(f"💾 Работодатель сохранен: {employer.name}")
-
-                # Получение вакансий
-                vacancies_data = self.api.get_vacancies_by_employer_id(
-                    employer_id, per_page=self.vacancies_per_employer
-                )
-                print(f"📋 Получено вакансий: {len(vacancies_data)}")
-
-                # Сохранение вакансий
-                saved_count = 0
-                for vacancy_data in vacancies_data:
-                    vacancy = Vacancy.from_api_response(vacancy_data)
-                    if db.save_vacancy(vacancy):
-                        saved_count += 1
-
-                print(f"💾 Сохранено вакансий: {saved_count}/{len(vacancies_data)}")
-                time.sleep(0.5)
+    async def load_by_ids_async(self, employer_ids: list, max_concurrency: Optional[int] = None) -> bool:
+        """Загружает данные по списку ID компаний асинхронным движком (aiohttp + asyncpg)"""
+        if not postgres_enabled():
+            logger.error("❌ Асинхронная загрузка требует PostgreSQL (asyncpg), используйте обычную загрузку")
+            return False
 
-            return True
+        try:
+            if not await asyncio.to_thread(self._check_database):
+                logger.error("❌ Критическая ошибка: не удалось подключиться к БД")
+                return False
+
+            async with AsyncHeadHunterAPI(max_concurrency) as api, AsyncDBWriter(self.db_name) as writer:
+                if not await api.test_connection():
+                    logger.error("❌ Ошибка подключения к API")
+                    return False
+                return await self._run_async(employer_ids, api, writer)
         except Exception as e:
-            print(f"⛔ Критическая ошибка в DataProcessor: {e}")
-            traceback.print_exc()
+            logger.exception(f"⛔ Критическая ошибка при асинхронной обработке: {e}")
             return False
-        finally:
-            if db:
-                db.disconnect()
 
-    def load_by_ids(self, employer_ids: list) -> bool | None:
-        """Загружает данные по списку ID компаний"""
+    def load_by_ids(self, employer_ids: list, job_name: Optional[str] = None) -> bool:
+        """Загружает данные по списку ID компаний (через очередь задания, если задано job_name)"""
         if not self.api.test_connection():
-            print("❌ Ошибка подключения к API")
+            logger.error("❌ Ошибка подключения к API")
             return False
 
         try:
-            db = DBManager(self.db_name)
-            if not db.connect():
-                print("❌ Критическая ошибка: не удалось подключиться к БД")
+            if not self._check_database():
+                logger.error("❌ Критическая ошибка: не удалось подключиться к БД")
                 return False
+            if job_name and self._job_queue_available():
+                return self._run_job(job_name, employer_ids, "id")
+            return self._run(employer_ids, self._process_id)
+        except Exception as e:
+            logger.exception(f"⛔ Критическая ошибка при обработке: {e}")
+            return False
 
-            for employer_id in employer_ids:
-                print(f"\n🔍 Обработка компании с ID: {employer_id}")
-
-                # Получаем информацию о компании
-                employer_info = self.api.get_employer_info(employer_id)
-                if not employer_info:
-                    print(f"⚠️ Не удалось получить информацию о компании с ID: {employer_id}")
-                    continue
-
-                # Создаем объект работодателя
-                employer = Employer.from_api_response(employer_info)
-                if not db.save_employer(employer):
-                    print(f"❌ Ошибка сохранения работодателя: {employer.name} ({employer_id})")
-                    continue
-                print(f"💾 Работодатель сохранен: {employer.name}")
-
-                # Получаем вакансии компании
-                vacancies_data = self.api.get_vacancies_by_employer_id(
-                    employer_id, per_page=self.vacancies_per_employer
-                )
-                print(f"📋 Получено вакансий: {len(vacancies_data)}")
-
-                # Сохраняем вакансии
-                saved_count = 0
-                for vacancy_data in vacancies_data:
-                    vacancy = Vacancy.from_api_response(vacancy_data)
-                    if db.save_vacancy(vacancy):
-                        saved_count += 1
-
-                print(f"💾 Сохранено вакансий: {saved_count}/{len(vacancies_data)}")
-                time.sleep(0.5)
+    def enrich(self, employer_ids: Optional[list] = None, limit: Optional[int] = None) -> bool:
+        """Загружает подробности новых и изменившихся вакансий: полное описание, навыки, условия работы"""
+        try:
+            self.last_enrichment = VacancyEnricher(self.db_name, self.api).run(employer_ids, limit)
+            return True
+        except Exception as e:
+            logger.exception(f"⛔ Ошибка загрузки подробностей вакансий: {e}")
+            return False
 
+    def reprocess(self, since: Optional[str] = None, workers: Optional[int] = None) -> bool:
+        """Перестраивает работодателей и вакансии из архива ответов API без сети (см. ArchiveReprocessor)"""
+        try:
+            self.last_reprocess = ArchiveReprocessor(self.db_name, self.api.archive, workers).run(since)
             return True
         except Exception as e:
-            print(f"⛔ Критическая ошибка при обработке: {e}")
-            traceback.print_exc()
+            logger.exception(f"⛔ Ошибка повторной обработки архива: {e}")
             return False
-        finally:
-            if db:
-                db.disconnect()
+
+    def crawl(self, name: str, params: dict, workers: Optional[int] = None) -> bool:
+        """Обходит весь рынок по поисковому запросу (срезы с контрольными точками, см. MarketCrawler)"""
+        if not postgres_enabled():
+            logger.error("❌ Обход рынка требует PostgreSQL: контрольные точки срезов хранятся в нём")
+            return False
+
+        if not self.api.test_connection():
+            logger.error("❌ Ошибка подключения к API")
+            return False
+
+        try:
+            if not self._check_database():
+                logger.error("❌ Критическая ошибка: не удалось подключиться к БД")
+                return False
+            crawler = MarketCrawler(self.db_name, self.api, self.converter, workers)
+            self.last_crawl = crawler.run(name, params)
+        except Exception as e:
+            logger.exception(f"⛔ Ошибка обхода рынка: {e}")
+            return False
+        if self.api.cache is not None:
+            logger.info(f"📊 Кэш ответов API: {self.api.cache.summary()}")
+        return True
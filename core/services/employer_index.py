@@ -0,0 +1,388 @@
+"""Локальный индекс названий работодателей.
+
+Собирает пары «название → ID» из всех локальных источников (БД, data/companies.json,
+PREDEFINED_EMPLOYERS, комментарии employers.txt, сохранённые результаты поиска в API),
+нормализует и транслитерирует ключи и находит работодателя точным или нечётким совпадением.
+Поиск в API нужен только для названий, которых нет ни в одном источнике.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from difflib import SequenceMatcher, get_close_matches
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from core.utils.config_loader import get_employer_index_config
+from core.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Предопределенные ID известных компаний (можно расширять)
+PREDEFINED_EMPLOYERS = {
+    "yandex": "1740",  # Яндекс
+    "sber": "3529",  # Сбер
+    "tinkoff": "78638",  # Тинькофф
+    "vk": "41862",  # VK
+    "alfa": "80",  # Альфа-Банк
+    "mts": "15478",  # МТС
+    "megafon": "3776",  # МегаФон
+    "ozon": "907345",  # Ozon
+    "kaspersky": "2180",  # Лаборатория Касперского
+    "sbertech": "87021",  # СберТех
+}
+
+# Варианты написания, которые раньше проверял HeadHunterAPI.get_known_employer_id
+KNOWN_EMPLOYERS = {
+    "яндекс": "1740",
+    "yandex": "1740",
+    "сбербанк": "3529",
+    "sberbank": "3529",
+    "sber": "3529",
+    "газпром": "39305",
+    "gazprom": "39305",
+    "x5": "6093775",
+    "x5 group": "6093775",
+    "лср": "1473868",
+    "lsr": "1473868",
+    "vk": "15478",
+    "вконтакте": "15478",
+}
+
+# Источники по убыванию доверия: при конфликте побеждает ID из более надёжного источника
+SOURCE_PRIORITY = ("api", "db", "known", "companies.json", "predefined", "employers.txt")
+# Списки псевдонимов («sber», «x5 group»): дают ID, но не отображаемое название
+ALIAS_SOURCES = frozenset({"known", "predefined"})
+# Источники, которые разрешают расхождение; без них спорное название ищется в API
+TRUSTED_SOURCES = frozenset({"api", "db"})
+
+# Организационно-правовые формы и общие слова, не влияющие на сопоставление
+LEGAL_FORMS = frozenset(
+    {"ооо", "оао", "зао", "пао", "ао", "ип", "нко", "llc", "ltd", "inc", "plc", "gmbh"}
+    | {"компания", "группа", "company", "group"}
+)
+NAME_TOKEN_RE = re.compile(r"[a-zа-я0-9]+")
+
+TRANSLIT = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z", "и": "i",
+        "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s",
+        "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+        "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    }
+)  # fmt: skip
+
+
+def normalize_name(name: str) -> str:
+    """Нижний регистр, ё → е, без кавычек, пунктуации и организационно-правовых форм"""
+    tokens = NAME_TOKEN_RE.findall((name or "").lower().replace("ё", "е"))
+    meaningful = [token for token in tokens if token not in LEGAL_FORMS]
+    return " ".join(meaningful or tokens)
+
+
+def transliterate(text: str) -> str:
+    """Латинская запись кириллического ключа («яндекс» → «yandeks»), «ks» сводится к «x»"""
+    return text.translate(TRANSLIT).replace("ks", "x")
+
+
+def name_keys(name: str) -> List[str]:
+    """Ключи индекса для названия: нормализованный и транслитерированный"""
+    key = normalize_name(name)
+    if not key:
+        return []
+    latin = transliterate(key)
+    return [key] if latin == key else [key, latin]
+
+
+def name_similarity(left: str, right: str) -> float:
+    """Сходство названий после нормализации и транслитерации (0..1)"""
+    return SequenceMatcher(None, transliterate(normalize_name(left)), transliterate(normalize_name(right))).ratio()
+
+
+class IndexMatch(NamedTuple):
+    """Найденный работодатель: ID, название, источник и степень совпадения (1.0 — точное)"""
+
+    employer_id: str
+    name: str
+    source: str
+    score: float
+
+
+class EmployerIndex:
+    """Индекс «название → ID работодателя» с нечётким поиском и сохраняемым кэшем поиска в API"""
+
+    __slots__ = [
+        "_candidates",
+        "_primary",
+        "_contested",
+        "_names",
+        "_misses",
+        "_lookups",
+        "_lock",
+        "cache_path",
+        "fuzzy_cutoff",
+        "miss_ttl",
+    ]
+
+    def __init__(self, cache_path: Optional[str] = None, fuzzy_cutoff: float = 0.88, miss_ttl: float = 7 * 24 * 3600):
+        # ключ → {ID → источники}
+        self._candidates: Dict[str, Dict[str, set]] = {}
+        # Нормализованные (не транслитерированные) ключи — по ним строится отчёт о расхождениях
+        self._primary: set = set()
+        # ID, участвующие в расхождениях источников (пересчитываются после добавления названий)
+        self._contested: Optional[set] = None
+        # ID → (название, источник) из самого надёжного источника
+        self._names: Dict[str, Tuple[str, str]] = {}
+        # Сохраняемые результаты поиска в API: ключ → {"id", "name", "checked_at"}
+        self._lookups: Dict[str, dict] = {}
+        self._misses: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.cache_path = cache_path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.miss_ttl = miss_ttl
+
+    def add(self, name: str, employer_id: str, source: str) -> None:
+        """Добавляет название работодателя из источника source"""
+        if not name or not employer_id:
+            return
+        employer_id = str(employer_id)
+        keys = name_keys(name)
+        if not keys:
+            return
+        with self._lock:
+            self._primary.add(keys[0])
+            self._contested = None
+            for key in keys:
+                self._candidates.setdefault(key, {}).setdefault(employer_id, set()).add(source)
+            known = self._names.get(employer_id)
+            if known is None or _display_rank(source) < _display_rank(known[1]):
+                self._names[employer_id] = (name, source)
+
+    def add_many(self, pairs: Iterable[Tuple[str, str]], source: str) -> None:
+        """Добавляет пары (ID, название)"""
+        for employer_id, name in pairs:
+            self.add(name, employer_id, source)
+
+    @staticmethod
+    def _rank(sources: Iterable[str]) -> int:
+        return min(SOURCE_PRIORITY.index(source) for source in sources)
+
+    def _best(self, candidates: Dict[str, set], score: float) -> IndexMatch:
+        employer_id = min(candidates, key=lambda candidate: self._rank(candidates[candidate]))
+        source = SOURCE_PRIORITY[self._rank(candidates[employer_id])]
+        return IndexMatch(employer_id, self._names[employer_id][0], source, score)
+
+    def _exact_candidates(self, keys: List[str]) -> Dict[str, set]:
+        """Кандидаты по всем точным ключам названия вместе: «Сбер» и «Sber» дают один и тот же ответ"""
+        candidates: Dict[str, set] = {}
+        for key in keys:
+            for employer_id, sources in self._candidates.get(key, {}).items():
+                candidates.setdefault(employer_id, set()).update(sources)
+        return candidates
+
+    def _scan(self) -> Tuple[List[Tuple[str, Dict[str, set]]], List[Tuple[str, Dict[str, set]]]]:
+        """Расхождения источников (вызывается под блокировкой): названия с разными ID и ID с разными названиями"""
+        by_name, by_id = [], []
+        names_by_id: Dict[str, Dict[str, set]] = {}
+        for key in sorted(self._primary):
+            candidates = self._exact_candidates(name_keys(key))
+            if len(candidates) > 1:
+                by_name.append((key, candidates))
+            for employer_id, sources in candidates.items():
+                names_by_id.setdefault(employer_id, {}).setdefault(key, set()).update(sources)
+        for employer_id, names in sorted(names_by_id.items()):
+            if _distinct_names(names):
+                by_id.append((employer_id, names))
+        return by_name, by_id
+
+    def _resolve(self, candidates: Dict[str, set], score: float) -> Optional[IndexMatch]:
+        """Лучший кандидат; None, если источники расходятся и ни БД, ни API не подтверждают ни один ID"""
+        match = self._best(candidates, score)
+        if match.source in TRUSTED_SOURCES:
+            return match
+        if self._contested is None:
+            by_name, by_id = self._scan()
+            self._contested = {employer_id for _, ids in by_name for employer_id in ids}
+            self._contested.update(employer_id for employer_id, _ in by_id)
+        if len(candidates) > 1 or not self._contested.isdisjoint(candidates):
+            return None
+        return match
+
+    def lookup(self, name: str) -> Optional[IndexMatch]:
+        """Точное совпадение по нормализованному или транслитерированному ключу, затем нечёткое.
+
+        Спорное название (источники дают разные ID или ID записан под названиями разных компаний)
+        без подтверждения из БД или API не разрешается: вызывающий ищет его в API.
+        """
+        keys = name_keys(name)
+        if not keys:
+            return None
+        with self._lock:
+            candidates = self._exact_candidates(keys)
+            if candidates:
+                return self._resolve(candidates, 1.0)
+            matches = get_close_matches(keys[-1], list(self._candidates), n=1, cutoff=self.fuzzy_cutoff)
+            if not matches:
+                return None
+            score = round(SequenceMatcher(None, keys[-1], matches[0]).ratio(), 3)
+            return self._resolve(self._candidates[matches[0]], score)
+
+    def is_recent_miss(self, name: str) -> bool:
+        """Поиск этого названия в API недавно ничего не нашёл"""
+        checked_at = self._misses.get(normalize_name(name))
+        return checked_at is not None and time.time() - checked_at < self.miss_ttl
+
+    def best_candidate(self, name: str, items: List[Dict]) -> Optional[Dict]:
+        """Выбирает работодателя из выдачи /employers: точное совпадение, затем самое похожее название"""
+        key = normalize_name(name)
+        scored = []
+        for item in items:
+            item_key = normalize_name(item.get("name", ""))
+            if item_key == key:
+                return item
+            scored.append((name_similarity(name, item.get("name", "")), key in item_key, item))
+        if not scored:
+            return None
+        score, contains, item = max(scored, key=lambda entry: entry[0])
+        if score >= self.fuzzy_cutoff:
+            return item
+        # Как и раньше, принимаем первого работодателя, название которого содержит искомое
+        return next((item for _, contains, item in scored if contains), None)
+
+    def remember(self, name: str, employer: Optional[Dict]) -> None:
+        """Сохраняет результат поиска в API (в том числе «не найдено») в индекс и на диск"""
+        key = normalize_name(name)
+        if not key:
+            return
+        if employer:
+            # Сначала официальное название: оно станет отображаемым для этого ID
+            self.add(employer.get("name", ""), employer["id"], "api")
+            self.add(name, employer["id"], "api")
+        with self._lock:
+            checked_at = time.time()
+            if employer:
+                self._lookups[key] = {"id": employer["id"], "name": employer.get("name", ""), "checked_at": checked_at}
+                self._misses.pop(key, None)
+            else:
+                self._lookups[key] = {"id": None, "name": None, "checked_at": checked_at}
+                self._misses[key] = checked_at
+        self.save()
+
+    def load_cache(self) -> None:
+        """Загружает сохранённые результаты поиска в API"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                lookups = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать кэш поиска работодателей: {e}")
+            return
+        for key, entry in lookups.items():
+            self._lookups[key] = entry
+            if entry.get("id"):
+                self.add(entry.get("name") or "", entry["id"], "api")
+                self.add(key, entry["id"], "api")
+            else:
+                self._misses[key] = entry.get("checked_at", 0)
+
+    def save(self) -> None:
+        """Атомарно записывает результаты поиска в API на диск"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            snapshot = dict(self._lookups)
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш поиска работодателей: {e}")
+
+    def conflicts(self) -> List[dict]:
+        """Расхождения источников: одно название с разными ID и один ID с разными названиями.
+
+        Названия сравниваются по тем же ключам, что и в lookup; chosen — ответ lookup
+        (None — название будет искаться в API).
+        """
+        report = []
+        with self._lock:
+            by_name, by_id = self._scan()
+            for key, candidates in by_name:
+                match = self._resolve(candidates, 1.0)
+                report.append(
+                    {
+                        "kind": "name",
+                        "key": key,
+                        "chosen": match.employer_id if match else None,
+                        "candidates": {employer_id: sorted(s) for employer_id, s in candidates.items()},
+                    }
+                )
+            for employer_id, names in by_id:
+                report.append(
+                    {
+                        "kind": "id",
+                        "key": employer_id,
+                        "chosen": self._names[employer_id][0],
+                        "candidates": {name: sorted(s) for name, s in names.items()},
+                    }
+                )
+        return report
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @classmethod
+    def from_local_sources(
+        cls, project_root: Optional[str] = None, base_url: Optional[str] = None
+    ) -> "EmployerIndex":
+        """Строит индекс из файлов проекта, встроенных списков и сохранённых результатов поиска в API base_url"""
+        config = get_employer_index_config(base_url)
+        index = cls(config["cache_path"], config["fuzzy_cutoff"], config["miss_ttl"])
+        index.add_many(((employer_id, name) for name, employer_id in KNOWN_EMPLOYERS.items()), "known")
+        index.add_many(((employer_id, name) for name, employer_id in PREDEFINED_EMPLOYERS.items()), "predefined")
+        index.add_many(read_companies_json(config["companies_path"]), "companies.json")
+        index.add_many(read_employers_file(config["employers_file"]), "employers.txt")
+        index.load_cache()
+        return index
+
+
+def _display_rank(source: str) -> Tuple[bool, int]:
+    return source in ALIAS_SOURCES, SOURCE_PRIORITY.index(source)
+
+
+def _distinct_names(names: Dict[str, set]) -> bool:
+    """Разные ли это компании, а не варианты написания одного названия"""
+    keys = [transliterate(name) for name in names]
+    return any(
+        SequenceMatcher(None, a, b).ratio() < 0.6 and a not in b and b not in a
+        for i, a in enumerate(keys)
+        for b in keys[i + 1 :]
+    )
+
+
+def read_companies_json(path: str) -> List[Tuple[str, str]]:
+    """Пары (ID, название) из data/companies.json"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [(str(item["id"]), item["name"]) for item in json.load(f) if item.get("id") and item.get("name")]
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать {path}: {e}")
+        return []
+
+
+def read_employers_file(path: str) -> List[Tuple[str, str]]:
+    """Пары (ID, название) из строк вида «1740    # Яндекс»"""
+    pairs = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                employer_id, _, comment = line.partition("#")
+                employer_id, comment = employer_id.strip(), comment.strip()
+                if employer_id and comment:
+                    pairs.append((employer_id.split()[0], comment))
+    except (OSError, UnicodeDecodeError):
+        return []
+    return pairs
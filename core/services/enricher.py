@@ -0,0 +1,123 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+from core.data_models.vacancy_details import VacancyDetails
+from core.database.db_manager import DBManager
+from core.services.api import HeadHunterAPI
+from core.services.errors import HeadHunterAPIError
+from core.utils.config_loader import get_enrichment_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+
+class EnrichmentSummary(NamedTuple):
+    """Итоги загрузки подробностей: кандидаты, сохранено, закрыто (удалены на hh.ru), не получено"""
+
+    candidates: int = 0
+    enriched: int = 0
+    gone: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class VacancyEnricher:
+    """Загружает подробности (/vacancies/{id}) только для новых и изменившихся вакансий.
+
+    Вакансия требует загрузки, если для неё нет строки в vacancy_details или её content_hash
+    изменился после загрузки подробностей (source_hash). Поэтому стоимость ночного запуска
+    пропорциональна числу изменений, а не общему числу вакансий. Запросы идут из пула потоков
+    через общий клиент API и его лимит частоты.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "career_db",
+        api: Optional[HeadHunterAPI] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        config = get_enrichment_config()
+        self.db_name = db_name
+        self.api = api or HeadHunterAPI()
+        self.workers = workers or config["workers"]
+        self.batch_size = batch_size or config["batch_size"]
+
+    def _fetch(self, vacancy_id: str, source_hash: str) -> Tuple[str, Optional[VacancyDetails]]:
+        """Запрашивает подробности вакансии (выполняется в рабочем потоке)"""
+        data = self.api.get_vacancy_details(vacancy_id)
+        return vacancy_id, (VacancyDetails.from_api_response(data, source_hash) if data else None)
+
+    def run(self, employer_ids: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> EnrichmentSummary:
+        """Загружает подробности вакансий, которым они нужны (по всем работодателям или по employer_ids)"""
+        started = time.monotonic()
+        reader, writer = DBManager(self.db_name), DBManager(self.db_name)
+        if not reader.connect():
+            raise ConnectionError("Не удалось подключиться к базе данных")
+        if not writer.connect():
+            reader.disconnect()
+            raise ConnectionError("Не удалось подключиться к базе данных")
+
+        counts = {"candidates": 0, "enriched": 0, "gone": 0, "failed": 0}
+        batch: List[VacancyDetails] = []
+        gone: List[str] = []
+
+        def collect(done: Set[Future]) -> None:
+            for future in done:
+                try:
+                    vacancy_id, details = future.result()
+                except (HeadHunterAPIError, OSError, ValueError) as e:
+                    # Вакансия останется кандидатом и будет запрошена при следующем запуске
+                    counts["failed"] += 1
+                    logger.warning(f"⚠️ Не удалось получить подробности вакансии: {e}")
+                    continue
+                if details is None:
+                    gone.append(vacancy_id)
+                else:
+                    batch.append(details)
+            if len(batch) >= self.batch_size:
+                flush()
+
+        def flush() -> None:
+            if batch:
+                saved = writer.save_vacancy_details_bulk(batch)
+                counts["enriched"] += saved.inserted + saved.updated
+                counts["failed"] += saved.failed
+                batch.clear()
+            if gone:
+                closed = writer.close_vacancies(gone)
+                counts["gone"] += len(closed)
+                gone.clear()
+                if closed:
+                    # Закрытые вакансии меняют статистику работодателей и версии снимков аналитики и навыков
+                    writer.refresh_stats({employer_id for _, employer_id in closed})
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                in_flight: Set[Future] = set()
+                # Кандидаты читаются потоково, в работе держим ограниченное число запросов
+                for vacancy_id, source_hash in reader.iter_vacancies_to_enrich(employer_ids, limit):
+                    counts["candidates"] += 1
+                    in_flight.add(executor.submit(self._fetch, vacancy_id, source_hash))
+                    if len(in_flight) >= self.workers * 4:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                collect(wait(in_flight).done)
+            flush()
+        finally:
+            reader.disconnect()
+            writer.disconnect()
+
+        summary = EnrichmentSummary(**counts, elapsed_seconds=round(time.monotonic() - started, 3))
+        for result in ("enriched", "gone", "failed"):
+            REGISTRY.inc("enrich_vacancies_total", counts[result], result=result)
+        logger.info(
+            f"🧩 Подробности вакансий: кандидатов {summary.candidates}, сохранено {summary.enriched},"
+            f" закрыто {summary.gone}, не получено {summary.failed} за {summary.elapsed_seconds:.1f} с",
+            extra={"enrichment": summary.to_dict()},
+        )
+        return summary
@@ -0,0 +1,26 @@
+from typing import Optional
+
+
+class HeadHunterAPIError(Exception):
+    """Временный сбой API hh.ru: запрос стоит повторить позже, а не считать результат пустым"""
+
+    def __init__(self, message: str, path: str = "", status: Optional[int] = None):
+        super().__init__(message)
+        self.path = path
+        self.status = status
+
+
+class RateLimitedError(HeadHunterAPIError):
+    """API ограничивает частоту запросов (429 Too Many Requests)"""
+
+    def __init__(self, message: str, path: str = "", retry_after: Optional[float] = None):
+        super().__init__(message, path, 429)
+        self.retry_after = retry_after
+
+
+class APIUnavailableError(HeadHunterAPIError):
+    """API недоступен: ошибка 5xx, таймаут или обрыв соединения"""
+
+
+class CircuitOpenError(HeadHunterAPIError):
+    """Запросы приостановлены размыкателем после серии сбоев"""
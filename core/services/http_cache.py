@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlencode
+import requests
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """В офлайн-режиме запрошенного ответа нет в кэше"""
+
+
+class CachedResponse(NamedTuple):
+    """Сохранённый ответ API"""
+
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def to_response(self) -> requests.Response:
+        """Собирает requests.Response, неотличимый для вызывающего кода от сетевого"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+
+class ResponseCache:
+    """Дисковый кэш ответов API (SQLite) с TTL по эндпоинтам, ревалидацией и LRU-вытеснением"""
+
+    def __init__(self, path: str, max_bytes: int, ttls: Dict[str, float], offline: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Самый длинный подходящий префикс пути определяет TTL
+        self.ttls = sorted(ttls.items(), key=lambda item: len(item[0]), reverse=True)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        # Счётчики обновляются из рабочих потоков загрузки; своя блокировка не ждёт запросов к SQLite
+        self._counters_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_idx ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(path: str, params: Optional[Dict] = None) -> str:
+        """Ключ кэша: путь и отсортированные параметры запроса"""
+        query = urlencode(sorted((key, str(value)) for key, value in (params or {}).items()))
+        return f"{path}?{query}" if query else path
+
+    def ttl_for(self, path: str) -> float:
+        """Время жизни ответа для эндпоинта в секундах"""
+        for prefix, ttl in self.ttls:
+            if path.startswith(prefix):
+                return ttl
+        return 0.0
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        """Возвращает сохранённый ответ (в том числе устаревший) и отмечает обращение для LRU"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        url, body, etag, last_modified, stored_at = row
+        return CachedResponse(url, zlib.decompress(body), etag, last_modified, stored_at)
+
+    def is_fresh(self, cached: CachedResponse, path: str) -> bool:
+        """Можно ли отдать ответ без обращения к API"""
+        return self.offline or time.time() - cached.stored_at < self.ttl_for(path)
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """Сохраняет успешный ответ и при превышении лимита вытесняет давно не читавшиеся записи"""
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, url, body, etag, last_modified, stored_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    response.url,
+                    body,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Продлевает жизнь записи после ответа 304 Not Modified"""
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Удаляет записи в порядке давности последнего чтения, пока кэш не уложится в 90% лимита"""
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def count(self, hits: int = 0, misses: int = 0, revalidated: int = 0) -> None:
+        """Увеличивает счётчики попаданий, промахов и ревалидаций (потокобезопасно)"""
+        with self._counters_lock:
+            self.hits += hits
+            self.misses += misses
+            self.revalidated += revalidated
+
+    def summary(self) -> str:
+        """Счётчики попаданий для итогового отчёта"""
+        with self._counters_lock:
+            hits, misses, revalidated = self.hits, self.misses, self.revalidated
+        total = hits + misses
+        ratio = hits / total * 100 if total else 0.0
+        return (
+            f"попаданий: {hits}, промахов: {misses} ({ratio:.0f}% из кэша),"
+            f" подтверждено через 304: {revalidated}"
+        )
+
+    def close(self) -> None:
+        """Закрывает файл кэша"""
+        with self._lock:
+            self._conn.close()
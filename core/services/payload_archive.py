@@ -0,0 +1,327 @@
+"""Архив исходных ответов API: сжатые блоки JSONL в сегментах только для дописывания и индекс смещений.
+
+Модели сохраняют в БД лишь часть ответа, архив хранит его целиком: новое поле извлекается повторной
+обработкой архива (команда reprocess) без обращения к hh.ru.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+from core.utils.config_loader import get_archive_config
+from core.utils.log import get_logger
+from core.utils.metrics import REGISTRY
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd необязателен, без него блоки сжимаются zlib
+    zstandard = None
+
+CODECS = ("zstd", "zlib")
+SEGMENT_EXTENSIONS = {"zstd": ".jsonl.zst", "zlib": ".jsonl.zz"}
+
+ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS blocks (
+        id INTEGER PRIMARY KEY,
+        segment TEXT NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        raw_length INTEGER NOT NULL,
+        codec TEXT NOT NULL,
+        records INTEGER NOT NULL,
+        first_fetched_at TEXT NOT NULL,
+        last_fetched_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS records (
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        fetched_at TEXT NOT NULL,
+        block_id INTEGER NOT NULL,
+        line INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS records_key_idx ON records (kind, key, block_id)",
+    "CREATE INDEX IF NOT EXISTS blocks_fetched_idx ON blocks (last_fetched_at)",
+)
+
+logger = get_logger(__name__)
+
+_archives: Dict[str, "PayloadArchive"] = {}
+_lock = threading.Lock()
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise ImportError("Для архива в формате zstd установите пакет zstandard")
+
+
+def compress_block(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        _require_zstd()
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data)
+
+
+def decompress_block(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        _require_zstd()
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class ArchiveRecord(NamedTuple):
+    """Сохранённый ответ API: вид (employer, vacancy_page, vacancy), ключ запроса, время получения, тело"""
+
+    kind: str
+    key: str
+    fetched_at: str
+    payload: Dict
+
+
+class ArchiveBlock(NamedTuple):
+    """Положение сжатого блока записей в файле сегмента"""
+
+    block_id: int
+    path: str
+    offset: int
+    length: int
+    codec: str
+    records: int
+
+
+def read_block(block: ArchiveBlock) -> List[ArchiveRecord]:
+    """Читает и распаковывает блок архива одним обращением к диску"""
+    with open(block.path, "rb") as f:
+        f.seek(block.offset)
+        data = f.read(block.length)
+    return [ArchiveRecord(**json.loads(line)) for line in decompress_block(data, block.codec).splitlines()]
+
+
+class PayloadArchive:
+    """Архив исходных ответов API в каталоге path (потокобезопасен).
+
+    Ответы копятся в буфере и по достижении block_bytes сжимаются одним блоком в конец сегмента;
+    положение блока и ключи его записей попадают в индекс (SQLite). Каждый процесс пишет свои
+    сегменты, поэтому с одним архивом могут работать несколько загрузчиков. Ответ, совпадающий
+    с последним сохранённым по тому же ключу, повторно не сохраняется.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        codec: Optional[str] = None,
+        block_bytes: int = 1024 * 1024,
+        segment_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if self.codec not in CODECS:
+            raise ValueError(f"Неизвестный формат сжатия архива: {self.codec} (доступны: {', '.join(CODECS)})")
+        if self.codec == "zstd":
+            _require_zstd()
+        self.block_bytes = block_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._lines: List[bytes] = []
+        self._entries: List[tuple] = []
+        self._pending: Dict[tuple, str] = {}
+        self._buffered = 0
+        self._segment_prefix = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._segment_number = 0
+        self._segment: Optional[str] = None
+
+        os.makedirs(path, exist_ok=True)
+        self._index = sqlite3.connect(os.path.join(path, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        for statement in ARCHIVE_SCHEMA:
+            self._index.execute(statement)
+        self._index.commit()
+
+    def _last_digest(self, kind: str, key: str) -> Optional[str]:
+        digest = self._pending.get((kind, key))
+        if digest is None:
+            row = self._index.execute(
+                "SELECT digest FROM records WHERE kind = ? AND key = ? ORDER BY block_id DESC, line DESC LIMIT 1",
+                (kind, key),
+            ).fetchone()
+            digest = row[0] if row else None
+        return digest
+
+    def append(self, kind: str, key: str, payload: Dict) -> bool:
+        """Сохраняет ответ API; False, если он не изменился с прошлого сохранения или не записан"""
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        fetched_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        header = json.dumps({"kind": kind, "key": key, "fetched_at": fetched_at}, ensure_ascii=False)
+        # Тело уже сериализовано для хэша: строка записи собирается без повторного json.dumps
+        line = f'{header[:-1]}, "payload": {body}}}\n'.encode("utf-8")
+
+        with self._lock:
+            if self._last_digest(kind, key) == digest:
+                REGISTRY.inc("archive_records_total", kind=kind, result="duplicate")
+                return False
+            self._lines.append(line)
+            self._entries.append((kind, key, digest, fetched_at))
+            self._pending[(kind, key)] = digest
+            self._buffered += len(line)
+            if self._buffered >= self.block_bytes:
+                return self._flush()
+        return True
+
+    def _flush(self) -> bool:
+        """Дописывает буфер блоком в сегмент и индексирует его (вызывается под блокировкой)"""
+        if not self._lines:
+            return True
+        raw = b"".join(self._lines)
+        entries = self._entries
+        self._lines, self._entries, self._pending, self._buffered = [], [], {}, 0
+        try:
+            data = compress_block(raw, self.codec)
+            if self._segment is None or os.path.getsize(self._segment) + len(data) > self.segment_bytes:
+                self._segment_number += 1
+                name = f"{self._segment_prefix}-{self._segment_number:04d}{SEGMENT_EXTENSIONS[self.codec]}"
+                self._segment = os.path.join(self.path, name)
+            with open(self._segment, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Блок попадает в индекс только после записи на диск: оборванный хвост сегмента не читается
+            with self._index:
+                block_id = self._index.execute(
+                    """
+                    INSERT INTO blocks (segment, offset, length, raw_length, codec, records, first_fetched_at,
+                                        last_fetched_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        os.path.basename(self._segment),
+                        offset,
+                        len(data),
+                        len(raw),
+                        self.codec,
+                        len(entries),
+                        entries[0][3],
+                        entries[-1][3],
+                    ),
+                ).lastrowid
+                self._index.executemany(
+                    "INSERT INTO records (kind, key, digest, fetched_at, block_id, line) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*entry, block_id, line) for line, entry in enumerate(entries)],
+                )
+        except (OSError, sqlite3.Error) as e:
+            # Архив вторичен: сбой записи не должен прерывать загрузку
+            logger.error(f"Ошибка записи архива ответов API: {e}", extra={"archive": self.path})
+            for kind, *_ in entries:
+                REGISTRY.inc("archive_records_total", kind=kind, result="failed")
+            return False
+
+        for kind, *_ in entries:
+            REGISTRY.inc("archive_records_total", kind=kind, result="stored")
+        REGISTRY.inc("archive_bytes_total", len(data))
+        return True
+
+    def flush(self) -> bool:
+        """Записывает накопленные ответы, не дожидаясь заполнения блока"""
+        with self._lock:
+            return self._flush()
+
+    def blocks(self, since: Optional[str] = None) -> List[ArchiveBlock]:
+        """Блоки архива по времени первого ответа (since — только блоки с ответами не раньше этого времени).
+
+        Блоки разных процессов пересекаются по времени, поэтому их порядок не совпадает с порядком
+        ответов: читатель, которому нужна последняя версия, сравнивает fetched_at записей.
+        """
+        self.flush()
+        with self._lock:
+            rows = self._index.execute(
+                """
+                SELECT id, segment, offset, length, codec, records
+                FROM blocks
+                WHERE ? IS NULL OR last_fetched_at >= ?
+                ORDER BY first_fetched_at, id
+                """,
+                (since, since),
+            ).fetchall()
+        return [
+            ArchiveBlock(block_id, os.path.join(self.path, segment), offset, length, codec, records)
+            for block_id, segment, offset, length, codec, records in rows
+        ]
+
+    def get(self, kind: str, key: str) -> Optional[ArchiveRecord]:
+        """Последний сохранённый ответ по ключу: индекс указывает блок и строку в нём"""
+        self.flush()
+        with self._lock:
+            row = self._index.execute(
+                """
+                SELECT b.id, b.segment, b.offset, b.length, b.codec, b.records, r.line
+                FROM records r
+                JOIN blocks b ON b.id = r.block_id
+                WHERE r.kind = ? AND r.key = ?
+                ORDER BY r.block_id DESC, r.line DESC
+                LIMIT 1
+                """,
+                (kind, key),
+            ).fetchone()
+        if row is None:
+            return None
+        block_id, segment, offset, length, codec, records, line = row
+        block = ArchiveBlock(block_id, os.path.join(self.path, segment), offset, length, codec, records)
+        return read_block(block)[line]
+
+    def stats(self) -> Dict:
+        """Размер архива: блоки, записи по видам, объём до и после сжатия"""
+        self.flush()
+        with self._lock:
+            blocks, stored, raw = self._index.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(raw_length), 0) FROM blocks"
+            ).fetchone()
+            kinds = dict(self._index.execute("SELECT kind, COUNT(*) FROM records GROUP BY kind").fetchall())
+        return {
+            "path": os.path.abspath(self.path),
+            "blocks": blocks,
+            "records": kinds,
+            "bytes": stored,
+            "raw_bytes": raw,
+            "ratio": round(raw / stored, 2) if stored else None,
+        }
+
+    def close(self) -> None:
+        """Записывает буфер и закрывает индекс"""
+        with self._lock:
+            self._flush()
+            self._index.close()
+
+
+def open_archive(base_url: Optional[str] = None) -> Optional[PayloadArchive]:
+    """Общий для процесса архив ответов адреса API base_url по настройкам (None, если архив выключен)"""
+    config = get_archive_config(base_url)
+    if not config["enabled"]:
+        return None
+    path = os.path.abspath(config["path"])
+    with _lock:
+        archive = _archives.get(path)
+        if archive is None:
+            archive = PayloadArchive(path, config["codec"], config["block_bytes"], config["segment_bytes"])
+            _archives[path] = archive
+    return archive
+
+
+@atexit.register
+def close_archives() -> None:
+    """Дописывает незаполненные блоки архивов при завершении процесса"""
+    with _lock:
+        for archive in _archives.values():
+            archive.close()
+        _archives.clear()
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Потокобезопасный ограничитель частоты запросов (token bucket)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Частота запросов должна быть больше нуля")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Пополняет корзину токенами за прошедшее время"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Забирает токены без ожидания, если они есть"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Блокирует поток, пока в корзине не появятся токены"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AsyncTokenBucket:
+    """Ограничитель частоты запросов (token bucket) для asyncio-задач одного цикла событий"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Частота запросов должна быть больше нуля")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Ожидает, пока в корзине не появятся токены"""
+        # Под блокировкой задачи встают в очередь и получают токены по порядку
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._tokens = tokens
+                self._updated_at = time.monotonic()
+            self._tokens -= tokens
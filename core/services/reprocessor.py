@@ -0,0 +1,183 @@
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+from core.data_models.employer import Employer
+from core.data_models.vacancy import Vacancy
+from core.database.db_manager import DBManager
+from core.services.currency import load_currency_converter
+from core.services.payload_archive import ArchiveBlock, PayloadArchive, open_archive, read_block
+from core.utils.config_loader import get_archive_config
+from core.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ParsedBlock(NamedTuple):
+    """Модели из одного блока архива, каждая — в паре со временем получения своего ответа"""
+
+    records: int
+    employers: List[Tuple[str, Employer]]
+    discovered: List[Tuple[str, Employer]]
+    vacancies: List[Tuple[str, Vacancy]]
+
+
+def parse_block(block: ArchiveBlock, since: Optional[str] = None) -> ParsedBlock:
+    """Строит модели из ответов блока (выполняется в рабочем процессе).
+
+    Ответы /employers/{id} дают работодателей целиком, страницы выдачи — вакансии и их работодателей
+    (только название и ссылку). Подробности вакансий (/vacancies/{id}) здесь не разбираются.
+    Ответы, полученные раньше since, пропускаются.
+    """
+    records = [record for record in read_block(block) if since is None or record.fetched_at >= since]
+    employers, discovered, vacancies = [], [], []
+    for record in records:
+        if record.kind == "employer":
+            employers.append((record.fetched_at, Employer.from_api_response(record.payload)))
+        elif record.kind == "vacancy_page":
+            for item in record.payload.get("items", []):
+                employer_data = item.get("employer") or {}
+                if not employer_data.get("id"):
+                    continue
+                discovered.append((record.fetched_at, Employer.from_api_response(employer_data)))
+                vacancies.append((record.fetched_at, Vacancy.from_api_response(item)))
+    return ParsedBlock(len(records), employers, discovered, vacancies)
+
+
+def _keep_latest(batch: Dict[str, Tuple[str, object]], parsed: List[Tuple[str, object]]) -> None:
+    """Добавляет модели в пакет: по ID остаётся версия из самого позднего ответа"""
+    for fetched_at, model in parsed:
+        current = batch.get(model.id)
+        if current is None or current[0] <= fetched_at:
+            batch[model.id] = (fetched_at, model)
+
+
+class ReprocessSummary(NamedTuple):
+    """Итоги повторной обработки архива"""
+
+    blocks: int = 0
+    records: int = 0
+    employers_saved: int = 0
+    employers_updated: int = 0
+    vacancies_found: int = 0
+    vacancies_saved: int = 0
+    vacancies_updated: int = 0
+    vacancies_failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class ArchiveReprocessor:
+    """Перестраивает employers и vacancies из архива ответов API без обращения к сети.
+
+    Блоки распаковываются и разбираются пулом процессов (разбор JSON упирается в GIL), запись идёт
+    пакетами в основном процессе. Блоки разных загрузчиков перекрываются по времени, поэтому порядок
+    версий определяет время получения каждого ответа, а не порядок блоков: более поздний ответ заменяет
+    более ранний. Вакансии при этом не закрываются и не открываются заново: отсутствие в архиве
+    не значит, что вакансии нет, а присутствие — что она не закрылась позже.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "career_db",
+        archive: Optional[PayloadArchive] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        config = get_archive_config()
+        self.db_name = db_name
+        self.archive = archive if archive is not None else open_archive()
+        self.workers = workers or config["reprocess_workers"]
+        self.batch_size = batch_size or config["reprocess_batch_size"]
+
+    def run(self, since: Optional[str] = None) -> ReprocessSummary:
+        """Применяет к БД все блоки архива (или только блоки с ответами, полученными не раньше since)"""
+        if self.archive is None:
+            raise RuntimeError("Архив ответов API выключен (HH_ARCHIVE=0)")
+        started = time.monotonic()
+        blocks = self.archive.blocks(since)
+        counts = dict.fromkeys(ReprocessSummary._fields[:-1], 0)
+        # Пакет: по ID остаётся версия из самого позднего ответа
+        employers: Dict[str, Tuple[str, Employer]] = {}
+        discovered: Dict[str, Tuple[str, Employer]] = {}
+        vacancies: Dict[str, Tuple[str, Vacancy]] = {}
+        # Время ответа, из которого работодатель уже записан: у employers нет своей отметки времени,
+        # а более ранний ответ из следующего пакета не должен затереть более поздний
+        employer_versions: Dict[str, str] = {}
+        touched: Set[str] = set()
+
+        # Пул создаётся до подключения к БД: рабочим процессам соединения не нужны
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            db = DBManager(self.db_name)
+            if not db.connect():
+                raise ConnectionError("Не удалось подключиться к базе данных")
+            try:
+                converter = load_currency_converter(db)
+
+                def newer_employers(batch: Dict[str, Tuple[str, Employer]]) -> List[Employer]:
+                    fresh = []
+                    for employer_id, (fetched_at, employer) in batch.items():
+                        if employer_versions.get(employer_id, "") <= fetched_at:
+                            employer_versions[employer_id] = fetched_at
+                            fresh.append(employer)
+                    return fresh
+
+                def flush() -> None:
+                    if employers:
+                        saved = db.save_employers_bulk(newer_employers(employers))
+                        counts["employers_saved"] += saved.inserted
+                        counts["employers_updated"] += saved.updated
+                    if discovered:
+                        counts["employers_saved"] += db.save_discovered_employers_bulk(
+                            employer for _, employer in discovered.values()
+                        ).inserted
+                    if vacancies:
+                        for _, vacancy in vacancies.values():
+                            vacancy.salary_rub_mid = converter.salary_mid_rub(vacancy)
+                        # Порядок пакетов не важен: БД сравнивает время ответа с updated_at записи
+                        saved = db.save_archived_vacancies_bulk(
+                            (vacancy, fetched_at) for fetched_at, vacancy in vacancies.values()
+                        )
+                        counts["vacancies_saved"] += saved.inserted
+                        counts["vacancies_updated"] += saved.updated
+                        counts["vacancies_failed"] += saved.failed
+                        touched.update(vacancy.employer_id for _, vacancy in vacancies.values())
+                    employers.clear()
+                    discovered.clear()
+                    vacancies.clear()
+
+                def apply(parsed: ParsedBlock) -> None:
+                    counts["blocks"] += 1
+                    counts["records"] += parsed.records
+                    counts["vacancies_found"] += len(parsed.vacancies)
+                    _keep_latest(employers, parsed.employers)
+                    _keep_latest(discovered, parsed.discovered)
+                    _keep_latest(vacancies, parsed.vacancies)
+                    if len(employers) + len(discovered) + len(vacancies) >= self.batch_size:
+                        flush()
+
+                # Блоки применяются строго по порядку, в работе держится ограниченное окно
+                in_flight: Deque[Future] = deque()
+                for block in blocks:
+                    in_flight.append(executor.submit(parse_block, block, since))
+                    if len(in_flight) >= self.workers * 2:
+                        apply(in_flight.popleft().result())
+                while in_flight:
+                    apply(in_flight.popleft().result())
+                flush()
+                if touched:
+                    db.refresh_stats(touched)
+            finally:
+                db.disconnect()
+
+        summary = ReprocessSummary(**counts, elapsed_seconds=round(time.monotonic() - started, 3))
+        logger.info(
+            f"🗄️ Архив обработан: блоков {summary.blocks}, ответов {summary.records}; работодателей новых"
+            f" {summary.employers_saved}, обновлено {summary.employers_updated}; вакансий {summary.vacancies_found}"
+            f" (новых {summary.vacancies_saved}, обновлено {summary.vacancies_updated}, с ошибкой"
+            f" {summary.vacancies_failed}) за {summary.elapsed_seconds:.1f} с",
+            extra={"reprocess": summary.to_dict()},
+        )
+        return summary
@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата) в секунды ожидания"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """Экспоненциальная задержка с полным джиттером, но не меньше Retry-After"""
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class CircuitBreaker:
+    """Общий для всех потоков размыкатель: при троттлинге или серии сбоев приостанавливает все запросы.
+
+    В отличие от классического размыкателя, не отклоняет запросы сразу, а задерживает их до конца паузы —
+    рабочие потоки загрузки просто ждут, пока API снова станет доступен. Если пауза длиннее max_wait,
+    вызывающий получает отказ и может вернуть задачу в очередь.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Приостановлены ли запросы прямо сейчас"""
+        return time.monotonic() < self._open_until
+
+    def wait(self, max_wait: Optional[float] = None) -> bool:
+        """Ждёт окончания паузы; False, если ждать пришлось бы дольше max_wait"""
+        remaining = self._open_until - time.monotonic()
+        if remaining <= 0:
+            return True
+        if max_wait is not None and remaining > max_wait:
+            return False
+        time.sleep(remaining)
+        return True
+
+    def trip(self, pause: float) -> None:
+        """Немедленно приостанавливает запросы (например, по Retry-After)"""
+        with self._lock:
+            self._open_until = max(self._open_until, time.monotonic() + pause)
+
+    def record_failure(self) -> None:
+        """Учитывает сбой; после failure_threshold сбоев подряд размыкает цепь на cooldown"""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = max(self._open_until, time.monotonic() + self.cooldown)
+                self._failures = 0
+
+    def record_success(self) -> None:
+        """Сбрасывает счётчик сбоев после успешного ответа"""
+        with self._lock:
+            self._failures = 0
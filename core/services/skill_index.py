@@ -0,0 +1,324 @@
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from core.data_models.vacancy_details import normalize_skill
+from core.database.db_manager import DBManager
+from core.services.columnar import DEFAULT_PERCENTILES, group_percentile, json_number, np, require_numpy
+from core.utils.config_loader import get_analytics_config
+
+# Версия формата файла индекса: при изменении состава массивов старые файлы пересобираются
+SKILL_INDEX_FORMAT = 1
+
+ARRAY_FIELDS = (
+    "vacancy_ids",
+    "employer_codes",
+    "employer_ids",
+    "salaries",
+    "vacancy_offsets",
+    "vacancy_skills",
+    "skill_ids",
+    "skill_names",
+    "skill_offsets",
+    "postings",
+)
+
+# Индексы, уже загруженные в этом процессе: db_name -> индекс
+_indexes: Dict[str, "SkillIndex"] = {}
+
+
+class SkillIndex:
+    """Инвертированный индекс навыков открытых вакансий в массивах NumPy.
+
+    Вакансии пронумерованы строками 0..n-1. Для каждого навыка хранится отсортированный массив строк
+    вакансий (postings, срезы по skill_offsets), для каждой вакансии — коды её навыков (vacancy_skills,
+    срезы по vacancy_offsets). Навыки кодируются позицией в отсортированном skill_ids.
+    """
+
+    __slots__ = ["version", "_normalized"] + list(ARRAY_FIELDS)
+
+    def __init__(
+        self,
+        version: str,
+        vacancy_ids,
+        employer_codes,
+        employer_ids,
+        salaries,
+        vacancy_offsets,
+        vacancy_skills,
+        skill_ids,
+        skill_names,
+        skill_offsets,
+        postings,
+    ):
+        self.version = version
+        self.vacancy_ids = vacancy_ids
+        self.employer_codes = employer_codes
+        self.employer_ids = employer_ids
+        self.salaries = salaries
+        self.vacancy_offsets = vacancy_offsets
+        self.vacancy_skills = vacancy_skills
+        self.skill_ids = skill_ids
+        self.skill_names = skill_names
+        self.skill_offsets = skill_offsets
+        self.postings = postings
+        self._normalized = {normalize_skill(str(name)): code for code, name in enumerate(skill_names)}
+
+    def __len__(self) -> int:
+        return len(self.vacancy_ids)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[tuple], skills: Iterable[Tuple[int, str]], version: str = ""
+    ) -> "SkillIndex":
+        """Собирает индекс из строк (id, employer_id, salary_rub_mid, [ID навыков]) и справочника навыков"""
+        require_numpy()
+        names = dict(skills)
+        skill_ids = np.array(sorted(names), dtype=np.int64)
+        vacancy_ids, employers, salaries, counts, entries = [], [], [], [], []
+        for vacancy_id, employer_id, salary, vacancy_skill_ids in rows:
+            vacancy_ids.append(vacancy_id)
+            employers.append(employer_id)
+            salaries.append(np.nan if salary is None else float(salary))
+            counts.append(len(vacancy_skill_ids))
+            entries.extend(vacancy_skill_ids)
+
+        vacancy_offsets = np.zeros(len(vacancy_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=vacancy_offsets[1:])
+        vacancy_skills = np.searchsorted(skill_ids, np.array(entries, dtype=np.int64)).astype(np.int32)
+        # Сортировка пар (навык, строка вакансии) даёт списки вакансий по навыкам подряд
+        rows_of_entries = np.repeat(np.arange(len(vacancy_ids), dtype=np.int32), counts)
+        order = np.lexsort((rows_of_entries, vacancy_skills))
+        skill_offsets = np.zeros(len(skill_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(vacancy_skills, minlength=len(skill_ids)), out=skill_offsets[1:])
+
+        employer_ids, employer_codes = np.unique(np.array(employers, dtype=str), return_inverse=True)
+        return cls(
+            version,
+            np.array(vacancy_ids, dtype=str),
+            employer_codes.astype(np.int32),
+            employer_ids,
+            np.array(salaries, dtype=np.float64),
+            vacancy_offsets,
+            vacancy_skills,
+            skill_ids,
+            np.array([names[skill_id] for skill_id in skill_ids.tolist()], dtype=str),
+            skill_offsets,
+            rows_of_entries[order],
+        )
+
+    @classmethod
+    def load(cls, path: str, version: str) -> Optional["SkillIndex"]:
+        """Читает индекс с диска; None, если файла нет или он собран по другой версии данных"""
+        require_numpy()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["format"]) != SKILL_INDEX_FORMAT or str(data["version"]) != version:
+                    return None
+                return cls(version, *(data[name] for name in ARRAY_FIELDS))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: str) -> None:
+        """Атомарно сохраняет индекс в npz (без pickle)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                format=np.array(SKILL_INDEX_FORMAT),
+                version=np.array(self.version),
+                **{name: getattr(self, name) for name in ARRAY_FIELDS},
+            )
+        os.replace(tmp_path, path)
+
+    def skill_code(self, skill: str) -> int:
+        """Код навыка по названию (без учёта регистра) или ID из таблицы skills"""
+        code = self._normalized.get(normalize_skill(skill))
+        if code is None and skill.strip().isdigit():
+            position = int(np.searchsorted(self.skill_ids, int(skill)))
+            if position < len(self.skill_ids) and self.skill_ids[position] == int(skill):
+                code = position
+        if code is None:
+            raise KeyError(f"Навык «{skill}» не найден в индексе")
+        return code
+
+    def postings_for(self, code: int):
+        """Отсортированные строки вакансий с навыком"""
+        return self.postings[self.skill_offsets[code] : self.skill_offsets[code + 1]]
+
+    def _employer_rows(self, employer_ids: Optional[Sequence[str]]):
+        """Отсортированные строки вакансий указанных работодателей (None — фильтра нет)"""
+        if not employer_ids:
+            return None
+        codes = np.flatnonzero(np.isin(self.employer_ids, np.array(employer_ids, dtype=str)))
+        return np.flatnonzero(np.isin(self.employer_codes, codes)).astype(np.int32)
+
+    def _entries_for_rows(self, rows):
+        """Коды навыков всех вакансий из rows (с повторами)"""
+        if rows is None:
+            return self.vacancy_skills
+        starts, ends = self.vacancy_offsets[rows], self.vacancy_offsets[rows + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.zeros(0, dtype=np.int32)
+        # Индексы элементов каждой вакансии подряд: start, start+1, ... для каждой строки
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return self.vacancy_skills[positions]
+
+    def _skill_row(self, code: int, count: int, total: int) -> dict:
+        count, total = int(count), int(total)
+        return {
+            "skill_id": int(self.skill_ids[code]),
+            "skill": str(self.skill_names[code]),
+            "vacancy_count": count,
+            "share": round(count / total, 4) if total else None,
+        }
+
+    def top_skills(self, top: Optional[int] = None, employer_ids: Optional[Sequence[str]] = None) -> List[dict]:
+        """Самые востребованные навыки: число вакансий и доля от вакансий с подробностями"""
+        rows = self._employer_rows(employer_ids)
+        if rows is None:
+            counts, total = np.diff(self.skill_offsets), len(self)
+        else:
+            counts = np.bincount(self._entries_for_rows(rows), minlength=len(self.skill_ids))
+            total = len(rows)
+        order = np.argsort(-counts, kind="stable")[: top or get_analytics_config()["top_skills"]]
+        return [self._skill_row(code, counts[code], total) for code in order if counts[code]]
+
+    def skill_salaries(
+        self,
+        skills: Optional[Sequence[str]] = None,
+        employer_ids: Optional[Sequence[str]] = None,
+        top: Optional[int] = None,
+        min_count: Optional[int] = None,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> List[dict]:
+        """Зарплаты по навыкам (средняя и перцентили в рублях), по убыванию медианы"""
+        rows = self._employer_rows(employer_ids)
+        row_ids = np.arange(len(self), dtype=np.int32) if rows is None else rows
+        lengths = self.vacancy_offsets[row_ids + 1] - self.vacancy_offsets[row_ids]
+        codes = self._entries_for_rows(rows)
+        values = np.repeat(self.salaries[row_ids], lengths)
+        vacancy_counts = np.bincount(codes, minlength=len(self.skill_ids))
+
+        has_salary = ~np.isnan(values)
+        codes, values = codes[has_salary], values[has_salary]
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+        salary_counts = np.bincount(codes, minlength=len(self.skill_ids))
+        sums = np.bincount(codes, weights=values, minlength=len(self.skill_ids))
+        starts = np.cumsum(salary_counts) - salary_counts
+        points = {q: group_percentile(values, starts, salary_counts, q) for q in percentiles}
+
+        if skills:
+            selected = [self.skill_code(skill) for skill in skills]
+        else:
+            minimum = get_analytics_config()["skill_min_salaries"] if min_count is None else min_count
+            selected = np.flatnonzero(salary_counts >= max(minimum, 1))
+            median = points.get(50, sums / np.maximum(salary_counts, 1))
+            selected = sorted(selected, key=lambda code: -median[code])[: top or get_analytics_config()["top_skills"]]
+
+        result = []
+        for code in selected:
+            row = self._skill_row(code, vacancy_counts[code], len(row_ids))
+            row["salary_count"] = int(salary_counts[code])
+            row["avg_salary"] = json_number(sums[code] / salary_counts[code]) if salary_counts[code] else None
+            row.update({f"p{q:g}": json_number(points[q][code]) for q in percentiles})
+            result.append(row)
+        return result
+
+    def cooccurrence(self, skill: str, top: Optional[int] = None) -> dict:
+        """Навыки, которые чаще всего требуются вместе с указанным.
+
+        lift — во сколько раз навык встречается в таких вакансиях чаще, чем в среднем по рынку.
+        """
+        code = self.skill_code(skill)
+        rows = self.postings_for(code)
+        counts = np.bincount(self._entries_for_rows(rows), minlength=len(self.skill_ids))
+        counts[code] = 0
+        market = np.diff(self.skill_offsets)
+        order = np.argsort(-counts, kind="stable")[: top or get_analytics_config()["top_skills"]]
+        together = []
+        for other in order:
+            if not counts[other]:
+                break
+            row = self._skill_row(other, counts[other], len(rows))
+            row["lift"] = round(float(counts[other] / len(rows) / (market[other] / len(self))), 3)
+            together.append(row)
+        return {"skill": self._skill_row(code, len(rows), len(self)), "together": together}
+
+    def filter_rows(
+        self,
+        all_of: Sequence[str] = (),
+        any_of: Sequence[str] = (),
+        employer_ids: Optional[Sequence[str]] = None,
+    ):
+        """Строки вакансий со всеми навыками all_of и хотя бы одним из any_of"""
+        rows = None
+        # Пересечение начинаем с самого редкого навыка: промежуточные массивы сразу маленькие
+        for code in sorted((self.skill_code(skill) for skill in all_of), key=lambda c: len(self.postings_for(c))):
+            postings = self.postings_for(code)
+            rows = postings if rows is None else np.intersect1d(rows, postings, assume_unique=True)
+        if any_of:
+            union = np.unique(np.concatenate([self.postings_for(self.skill_code(skill)) for skill in any_of]))
+            rows = union if rows is None else np.intersect1d(rows, union, assume_unique=True)
+        if rows is None:
+            rows = np.arange(len(self), dtype=np.int32)
+        employer_rows = self._employer_rows(employer_ids)
+        if employer_rows is not None:
+            rows = np.intersect1d(rows, employer_rows, assume_unique=True)
+        return rows
+
+    def filter_vacancies(
+        self,
+        all_of: Sequence[str] = (),
+        any_of: Sequence[str] = (),
+        employer_ids: Optional[Sequence[str]] = None,
+        limit: Optional[int] = 20,
+    ) -> dict:
+        """Вакансии по навыкам: число, зарплаты и ID (самые высокооплачиваемые первыми)"""
+        rows = self.filter_rows(all_of, any_of, employer_ids)
+        salaries = self.salaries[rows]
+        known = salaries[~np.isnan(salaries)]
+        # Сначала вакансии с зарплатой по убыванию, затем без зарплаты
+        order = np.lexsort((-np.nan_to_num(salaries, nan=-np.inf), np.isnan(salaries)))
+        selected = rows[order][:limit] if limit else rows[order]
+        return {
+            "vacancy_count": int(len(rows)),
+            "salary_count": int(len(known)),
+            "avg_salary": json_number(known.mean()) if len(known) else None,
+            "p50": json_number(np.percentile(known, 50)) if len(known) else None,
+            "vacancy_ids": self.vacancy_ids[selected].tolist(),
+        }
+
+
+def skill_index_path(db_name: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or get_analytics_config()["cache_dir"], f"skills_{db_name}.npz")
+
+
+def load_skill_index(db_name: str = "career_db", cache_dir: Optional[str] = None, refresh: bool = False) -> SkillIndex:
+    """Возвращает актуальный индекс навыков: из памяти процесса, с диска или собранный из БД.
+
+    Версия индекса меняется после каждого пакета загрузки вакансий и каждой загрузки подробностей.
+    Индекс сохраняется на диск только после полного чтения строк из БД: обрыв чтения — ConnectionError.
+    """
+    require_numpy()
+    db = DBManager(db_name)
+    if not db.connect():
+        raise ConnectionError("Не удалось подключиться к базе данных")
+    try:
+        version = db.get_skills_version() or ""
+        path = skill_index_path(db_name, cache_dir)
+
+        cached = _indexes.get(db_name)
+        if not refresh and version and cached is not None and cached.version == version:
+            return cached
+        index = None if refresh or not version else SkillIndex.load(path, version)
+        if index is None:
+            index = SkillIndex.from_rows(db.iter_vacancy_skill_rows(), db.get_skills(), version)
+            if version:
+                index.save(path)
+    finally:
+        db.disconnect()
+
+    _indexes[db_name] = index
+    return index
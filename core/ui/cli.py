@@ -0,0 +1,507 @@
+"""Неинтерактивный интерфейс командной строки для пакетных и плановых запусков.
+
+Каждая подкоманда печатает в stdout один JSON-объект, а диагностические сообщения
+уходят в stderr. Тяжёлые зависимости (psycopg2, requests) импортируются только
+внутри обработчиков, поэтому разбор аргументов и --help не требуют их загрузки.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from core.utils.log import configure_logging
+from core.utils.metrics import REGISTRY
+from core.utils.profiling import PROFILERS, profiled
+
+# Коды завершения (EXIT_USAGE совпадает с кодом ошибки разбора аргументов argparse)
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+
+VACANCY_FIELDS = ("company", "title", "min_salary", "max_salary", "currency", "url")
+
+
+def read_employer_ids(filename: str) -> List[str]:
+    """Читает ID компаний из файла: первый столбец строки, пустые строки и комментарии пропускаются"""
+    employer_ids = []
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            employer_ids.append(line.split()[0])
+    return employer_ids
+
+
+def _json_default(value):
+    """Приводит значения из БД к типам, которые понимает json"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _emit(payload: dict) -> None:
+    """Печатает результат команды одной строкой JSON"""
+    sys.stdout.write(json.dumps(payload, ensure_ascii=False, default=_json_default) + "\n")
+    sys.stdout.flush()
+
+
+def _vacancy_dict(row: tuple) -> dict:
+    return dict(zip(VACANCY_FIELDS, row))
+
+
+def _cmd_init_db(args) -> Tuple[int, dict]:
+    from core.database.db_handler import initialize_database
+    from core.database.db_manager import postgres_enabled
+    from core.database.migrations import get_schema_version
+    from core.database.pool import get_pool
+
+    if not initialize_database(args.db_name):
+        return EXIT_FAILURE, {"command": "init-db", "ok": False, "db_name": args.db_name}
+
+    if not postgres_enabled():
+        from core.database.embedded import EMBEDDED_SCHEMA_VERSION, database_path, resolve_engine
+
+        return EXIT_OK, {
+            "command": "init-db",
+            "ok": True,
+            "db_name": args.db_name,
+            "backend": resolve_engine(),
+            "path": database_path(args.db_name),
+            "schema_version": EMBEDDED_SCHEMA_VERSION,
+        }
+
+    pool = get_pool(args.db_name)
+    conn = pool.getconn()
+    try:
+        version = get_schema_version(conn)
+    finally:
+        pool.putconn(conn)
+    return EXIT_OK, {
+        "command": "init-db",
+        "ok": True,
+        "db_name": args.db_name,
+        "backend": "postgres",
+        "schema_version": version,
+    }
+
+
+def _cmd_load(args) -> Tuple[int, dict]:
+    from core.services.data_processor import DataProcessor
+
+    processor = DataProcessor(args.db_name, workers=args.workers)
+    job_name = None if args.no_job else args.job
+    if args.names is not None:
+        items = [name.strip() for name in ",".join(args.names).split(",") if name.strip()]
+        ok = processor.load_by_names(items, job_name=job_name)
+    else:
+        if args.ids_file:
+            items = read_employer_ids(args.ids_file)
+            # Как и в интерактивном режиме, загрузка из файла по умолчанию возобновляемая
+            if job_name is None and not args.no_job and not args.use_async:
+                job_name = f"file:{os.path.abspath(args.ids_file)}"
+        else:
+            items = args.ids
+        if args.use_async:
+            import asyncio
+
+            ok = asyncio.run(processor.load_by_ids_async(items, args.max_concurrency))
+        else:
+            ok = processor.load_by_ids(items, job_name=job_name)
+
+    if ok and args.enrich:
+        # По названиям ID работодателей заранее неизвестны — берутся все вакансии, которым нужны подробности
+        ok = processor.enrich(None if args.names is not None else items)
+
+    summary = processor.last_summary.to_dict() if processor.last_summary else None
+    payload = {"command": "load", "ok": ok, "requested": len(items), "job": job_name, "summary": summary}
+    if processor.last_enrichment:
+        payload["enrichment"] = processor.last_enrichment.to_dict()
+    if not ok:
+        return EXIT_FAILURE, payload
+    if (summary and summary["failed"]) or (processor.last_enrichment and processor.last_enrichment.failed):
+        return EXIT_PARTIAL, payload
+    return EXIT_OK, payload
+
+
+def _cmd_enrich(args) -> Tuple[int, dict]:
+    from core.services.data_processor import DataProcessor
+
+    processor = DataProcessor(args.db_name)
+    ok = processor.enrich(args.employer, args.limit)
+    enrichment = processor.last_enrichment.to_dict() if processor.last_enrichment else None
+    payload = {"command": "enrich", "ok": ok, "enrichment": enrichment}
+    if not ok:
+        return EXIT_FAILURE, payload
+    return (EXIT_PARTIAL if enrichment["failed"] else EXIT_OK), payload
+
+
+def _cmd_crawl(args) -> Tuple[int, dict]:
+    from core.services.crawler import crawl_params, default_crawl_name, search_criteria
+    from core.services.data_processor import DataProcessor
+
+    criteria = search_criteria(args.text, args.area or (), args.role or ())
+    name = args.name or default_crawl_name(criteria)
+    processor = DataProcessor(args.db_name)
+    ok = processor.crawl(name, crawl_params(criteria), args.workers)
+    crawl = processor.last_crawl.to_dict() if processor.last_crawl else None
+    payload = {"command": "crawl", "ok": ok, "name": name, "criteria": criteria, "crawl": crawl}
+    if not ok:
+        return EXIT_FAILURE, payload
+    return (EXIT_PARTIAL if crawl["slices_failed"] else EXIT_OK), payload
+
+
+def _cmd_reprocess(args) -> Tuple[int, dict]:
+    from core.services.data_processor import DataProcessor
+
+    processor = DataProcessor(args.db_name)
+    if processor.api.archive is None:
+        return EXIT_FAILURE, {"command": "reprocess", "ok": False, "error": "архив ответов API выключен"}
+    if args.stats:
+        return EXIT_OK, {"command": "reprocess", "ok": True, "archive": processor.api.archive.stats()}
+
+    ok = processor.reprocess(args.since, args.workers)
+    reprocess = processor.last_reprocess.to_dict() if processor.last_reprocess else None
+    payload = {"command": "reprocess", "ok": ok, "since": args.since, "reprocess": reprocess}
+    if not ok:
+        return EXIT_FAILURE, payload
+    return (EXIT_PARTIAL if reprocess["vacancies_failed"] else EXIT_OK), payload
+
+
+def _cmd_stats(args) -> Tuple[int, dict]:
+    from core.database.db_manager import DBManager
+
+    db = DBManager(args.db_name)
+    if not db.connect():
+        return EXIT_FAILURE, {"command": "stats", "ok": False}
+    try:
+        salary = db.get_salary_stats()
+        employers = db.get_companies_and_vacancies_count()
+    finally:
+        db.disconnect()
+
+    if args.top:
+        employers = employers[: args.top]
+    payload = {
+        "command": "stats",
+        "ok": salary is not None,
+        "salary": salary,
+        "employers": [{"name": name, "vacancies": count} for name, count in employers],
+    }
+    return (EXIT_OK if salary is not None else EXIT_FAILURE), payload
+
+
+def _cmd_search(args) -> Tuple[int, dict]:
+    from core.database.db_manager import DBManager
+
+    db = DBManager(args.db_name)
+    if not db.connect():
+        return EXIT_FAILURE, {"command": "search", "ok": False}
+    try:
+        # Ошибка запроса — сбой (EXIT_FAILURE), а не пустая выдача
+        rows = db.search_vacancies(args.query, args.limit, args.offset, strict=True)
+        results = [_vacancy_dict(row) for row in rows]
+    except ConnectionError as e:
+        return EXIT_FAILURE, {"command": "search", "ok": False, "query": args.query, "error": str(e)}
+    finally:
+        db.disconnect()
+
+    return EXIT_OK, {"command": "search", "ok": True, "query": args.query, "count": len(results), "results": results}
+
+
+def _cmd_export(args) -> Tuple[int, dict]:
+    from core.database.db_manager import DBManager
+    from core.database.transfer import default_format
+    from core.utils.config_loader import get_transfer_config
+
+    fmt = args.format or get_transfer_config()["format"] or default_format()
+    with DBManager(args.db_name) as db:
+        if db.connection is None:
+            return EXIT_FAILURE, {"command": "export", "ok": False}
+        counts = db.export_dataset(args.output, fmt, get_transfer_config()["chunk_size"])
+    payload = {
+        "command": "export",
+        "ok": counts is not None,
+        "format": fmt,
+        "output": os.path.abspath(args.output),
+        "rows": counts,
+    }
+    return (EXIT_OK if counts is not None else EXIT_FAILURE), payload
+
+
+def _cmd_import(args) -> Tuple[int, dict]:
+    from core.database.db_manager import DBManager
+    from core.utils.config_loader import get_transfer_config
+
+    with DBManager(args.db_name) as db:
+        if db.connection is None:
+            return EXIT_FAILURE, {"command": "import", "ok": False}
+        results = db.import_dataset(args.input, args.format, get_transfer_config()["chunk_size"])
+    payload = {
+        "command": "import",
+        "ok": results is not None,
+        "input": os.path.abspath(args.input),
+        "tables": {table: result._asdict() for table, result in (results or {}).items()},
+    }
+    return (EXIT_OK if results is not None else EXIT_FAILURE), payload
+
+
+def _cmd_analytics(args) -> Tuple[int, dict]:
+    from core.services.analytics import load_snapshot
+
+    snapshot = load_snapshot(args.db_name, refresh=args.refresh)
+    employer = args.employer[0] if args.employer else None
+    try:
+        if args.report == "summary":
+            result = {"market": snapshot.market_summary(), "currencies": snapshot.currency_counts()}
+        elif args.report == "employers":
+            result = snapshot.employer_stats()[: args.top or None]
+        elif args.report == "histogram":
+            result = snapshot.salary_histogram(args.bins, employer)
+        elif args.report == "keywords":
+            result = [{"word": word, "count": count} for word, count in snapshot.title_keywords(args.top, employer)]
+        else:
+            if not args.employer:
+                return EXIT_USAGE, {"command": "analytics", "ok": False, "error": "для compare укажите --employer"}
+            result = snapshot.compare_employers(args.employer)
+    except KeyError as e:
+        return EXIT_USAGE, {"command": "analytics", "ok": False, "error": e.args[0]}
+    return EXIT_OK, {
+        "command": "analytics",
+        "ok": True,
+        "report": args.report,
+        "snapshot": {"version": snapshot.version, "vacancies": len(snapshot)},
+        "result": result,
+    }
+
+
+def _cmd_skills(args) -> Tuple[int, dict]:
+    from core.database.db_manager import DBManager
+    from core.services.skill_index import load_skill_index
+
+    index = load_skill_index(args.db_name, refresh=args.refresh)
+    try:
+        if args.report == "top":
+            result = index.top_skills(args.top, args.employer)
+        elif args.report == "salaries":
+            result = index.skill_salaries(args.skill, args.employer, args.top, args.min_count)
+        elif args.report == "cooccur":
+            if not args.skill:
+                return EXIT_USAGE, {"command": "skills", "ok": False, "error": "для cooccur укажите --skill"}
+            result = index.cooccurrence(args.skill[0], args.top)
+        else:
+            if not (args.all or args.any):
+                return EXIT_USAGE, {"command": "skills", "ok": False, "error": "для filter укажите --all и/или --any"}
+            result = index.filter_vacancies(args.all or (), args.any or (), args.employer, args.limit)
+            with DBManager(args.db_name) as db:
+                rows = db.get_vacancies_by_ids(result["vacancy_ids"]) if db.connection is not None else []
+            result["vacancies"] = [_vacancy_dict(row) for row in rows]
+    except KeyError as e:
+        return EXIT_USAGE, {"command": "skills", "ok": False, "error": e.args[0]}
+    return EXIT_OK, {
+        "command": "skills",
+        "ok": True,
+        "report": args.report,
+        "index": {"version": index.version, "vacancies": len(index), "skills": len(index.skill_ids)},
+        "result": result,
+    }
+
+
+def _cmd_employers(args) -> Tuple[int, dict]:
+    from core.database.db_manager import DBManager
+    from core.services.api import HeadHunterAPI
+    from core.services.errors import HeadHunterAPIError
+
+    api = HeadHunterAPI()
+    index = api.employer_index
+    # БД необязательна: без неё индекс строится только из файлов и сохранённых результатов поиска
+    with DBManager(args.db_name) as db:
+        if db.connection is not None:
+            index.add_many(db.get_employers(), "db")
+
+    if args.action == "conflicts":
+        conflicts = index.conflicts()
+        return EXIT_OK, {"command": "employers", "ok": True, "indexed": len(index), "conflicts": conflicts}
+
+    names = [name.strip() for name in ",".join(args.names or []).split(",") if name.strip()]
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            names.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not names:
+        return EXIT_USAGE, {"command": "employers", "ok": False, "error": "не заданы названия (--names или --file)"}
+
+    results, api_lookups = [], 0
+    for name in names:
+        match = index.lookup(name)
+        if match:
+            results.append({"query": name, **match._asdict()})
+            continue
+        api_lookups += not index.is_recent_miss(name)
+        try:
+            employer_id = api.get_employer_id_by_name(name)
+        except HeadHunterAPIError as e:
+            results.append({"query": name, "employer_id": None, "error": str(e)})
+            continue
+        results.append({"query": name, "employer_id": employer_id, "source": "api" if employer_id else None})
+
+    unresolved = sum(1 for result in results if not result["employer_id"])
+    payload = {
+        "command": "employers",
+        "ok": True,
+        "resolved": len(results) - unresolved,
+        "unresolved": unresolved,
+        "api_lookups": api_lookups,
+        "results": results,
+    }
+    return (EXIT_PARTIAL if unresolved else EXIT_OK), payload
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Описание подкоманд CLI"""
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Job Data Keeper: загрузка и анализ вакансий hh.ru. "
+        "Без аргументов запускается интерактивный режим.",
+    )
+    parser.add_argument("--db-name", default="career_db", help="имя базы данных (по умолчанию career_db)")
+    parser.add_argument("--log-format", choices=("text", "json"), help="формат диагностики в stderr (HH_LOG_FORMAT)")
+    parser.add_argument("--log-level", help="уровень журнала: DEBUG, INFO, WARNING, ERROR (HH_LOG_LEVEL)")
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="сохранить метрики запуска: *.json — JSON-сводка, иначе формат Prometheus; «-» — в поле metrics ответа",
+    )
+    parser.add_argument("--profile", metavar="FILE", help="профилировать команду и сохранить профиль в FILE")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile", help="профилировщик для --profile")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_db = subparsers.add_parser("init-db", help="создать БД и применить миграции")
+    init_db.set_defaults(handler=_cmd_init_db)
+
+    load = subparsers.add_parser("load", help="загрузить вакансии работодателей")
+    source = load.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ids-file", help="файл с ID работодателей (первый столбец строки)")
+    source.add_argument("--ids", nargs="+", help="ID работодателей")
+    source.add_argument("--names", nargs="+", help="названия работодателей (можно через запятую)")
+    load.add_argument("--workers", type=int, help="число рабочих потоков")
+    load.add_argument("--job", help="имя задания в очереди (прерванный запуск продолжится)")
+    load.add_argument("--no-job", action="store_true", help="не использовать очередь заданий")
+    load.add_argument("--async", dest="use_async", action="store_true", help="асинхронный движок (aiohttp + asyncpg)")
+    load.add_argument("--max-concurrency", type=int, help="число одновременных запросов в асинхронном режиме")
+    load.add_argument(
+        "--enrich", action="store_true", help="затем загрузить подробности новых и изменившихся вакансий"
+    )
+    load.set_defaults(handler=_cmd_load)
+
+    enrich = subparsers.add_parser(
+        "enrich", help="загрузить подробности (описание, навыки, условия) новых и изменившихся вакансий"
+    )
+    enrich.add_argument("--employer", action="append", help="только вакансии работодателя (можно несколько раз)")
+    enrich.add_argument("--limit", type=int, help="не больше N вакансий за запуск")
+    enrich.set_defaults(handler=_cmd_enrich)
+
+    crawl = subparsers.add_parser(
+        "crawl", help="загрузить все вакансии по поисковому запросу (с разбиением выдачи и возобновлением)"
+    )
+    crawl.add_argument("--text", help="поисковый запрос /vacancies?text=...")
+    crawl.add_argument("--area", action="append", help="ID региона (можно несколько раз)")
+    crawl.add_argument("--role", action="append", help="ID профессиональной роли (можно несколько раз)")
+    crawl.add_argument("--name", help="имя обхода для возобновления (по умолчанию — по критериям поиска)")
+    crawl.add_argument("--workers", type=int, help="число срезов, загружаемых параллельно")
+    crawl.set_defaults(handler=_cmd_crawl)
+
+    reprocess = subparsers.add_parser(
+        "reprocess", help="перестроить работодателей и вакансии из архива ответов API (без сети)"
+    )
+    reprocess.add_argument("--since", help="только ответы, полученные не раньше (ISO 8601, UTC)")
+    reprocess.add_argument("--workers", type=int, help="число процессов разбора архива")
+    reprocess.add_argument("--stats", action="store_true", help="только показать размер архива")
+    reprocess.set_defaults(handler=_cmd_reprocess)
+
+    stats = subparsers.add_parser("stats", help="статистика по зарплатам и работодателям")
+    stats.add_argument(
+        "--top", type=int, default=0, help="вывести только N работодателей с наибольшим числом вакансий"
+    )
+    stats.set_defaults(handler=_cmd_stats)
+
+    search = subparsers.add_parser("search", help="полнотекстовый поиск вакансий")
+    search.add_argument("query", help="запрос: пробел — И, запятая — ИЛИ")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--offset", type=int, default=0)
+    search.set_defaults(handler=_cmd_search)
+
+    formats = ("parquet", "arrow", "csv", "jsonl")
+    export = subparsers.add_parser("export", help="выгрузить работодателей и вакансии в файлы")
+    export.add_argument("--output", "-o", default="export", help="каталог для выгрузки")
+    export.add_argument(
+        "--format", choices=formats, help="формат (по умолчанию parquet, если установлен pyarrow, иначе csv)"
+    )
+    export.set_defaults(handler=_cmd_export)
+
+    import_ = subparsers.add_parser("import", help="загрузить выгрузку в БД (слияние с существующими данными)")
+    import_.add_argument("--input", "-i", default="export", help="каталог с выгрузкой")
+    import_.add_argument("--format", choices=formats, help="формат (по умолчанию — по расширению файлов)")
+    import_.set_defaults(handler=_cmd_import)
+
+    employers = subparsers.add_parser("employers", help="поиск ID работодателей по названиям в локальном индексе")
+    employers.add_argument("action", choices=("resolve", "conflicts"))
+    employers.add_argument("--names", nargs="+", help="названия (можно через запятую)")
+    employers.add_argument("--file", help="файл с названиями, по одному в строке")
+    employers.set_defaults(handler=_cmd_employers)
+
+    analytics = subparsers.add_parser("analytics", help="аналитика по снимку вакансий (требуется numpy)")
+    analytics.add_argument("report", choices=("summary", "employers", "histogram", "keywords", "compare"))
+    analytics.add_argument("--employer", action="append", help="ID работодателя (для compare — несколько раз)")
+    analytics.add_argument("--top", type=int, help="ограничить число строк")
+    analytics.add_argument("--bins", type=int, help="число интервалов гистограммы")
+    analytics.add_argument("--refresh", action="store_true", help="пересобрать снимок из БД")
+    analytics.set_defaults(handler=_cmd_analytics)
+
+    skills = subparsers.add_parser("skills", help="спрос и зарплаты по ключевым навыкам (требуется numpy)")
+    skills.add_argument("report", choices=("top", "salaries", "cooccur", "filter"))
+    skills.add_argument("--skill", action="append", help="навык (название или ID; для salaries — несколько раз)")
+    skills.add_argument("--all", nargs="+", metavar="SKILL", help="filter: вакансии со всеми навыками")
+    skills.add_argument("--any", nargs="+", metavar="SKILL", help="filter: вакансии хотя бы с одним навыком")
+    skills.add_argument("--employer", action="append", help="ID работодателя (можно несколько раз)")
+    skills.add_argument("--top", type=int, help="ограничить число навыков")
+    skills.add_argument("--min-count", type=int, help="salaries: минимум вакансий с зарплатой на навык")
+    skills.add_argument("--limit", type=int, default=20, help="filter: число выводимых вакансий")
+    skills.add_argument("--refresh", action="store_true", help="пересобрать индекс навыков из БД")
+    skills.set_defaults(handler=_cmd_skills)
+
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    """Выполняет подкоманду и возвращает код завершения"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if getattr(args, "use_async", False) and (args.names is not None or args.job):
+        parser.error("--async поддерживает только загрузку по ID без очереди заданий")
+
+    configure_logging(args.log_format, args.log_level)
+    try:
+        # Диагностика обработчиков уходит в stderr, stdout остаётся для JSON
+        with contextlib.redirect_stdout(sys.stderr), profiled(args.profile, args.profiler):
+            code, payload = args.handler(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        code, payload = EXIT_FAILURE, {"command": args.command, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    if args.metrics == "-":
+        payload["metrics"] = REGISTRY.summary()
+    elif args.metrics:
+        try:
+            REGISTRY.write(args.metrics)
+        except OSError as e:
+            sys.stderr.write(f"Не удалось сохранить метрики в {args.metrics}: {e}\n")
+    _emit(payload)
+    return code
@@ -1,11 +1,13 @@
+from typing import Iterable, Tuple
 from core.database.db_manager import DBManager
 
 
 class CareerConsoleUI:
     """Консольный интерфейс для работы с данными о карьере"""
 
-    def __init__(self, db_name: str = "career_db"):
+    def __init__(self, db_name: str = "career_db", page_size: int = 20):
         self.db_name = db_name
+        self.page_size = page_size
 
     def show_menu(self):
         """Отображает главное меню"""
@@ -16,6 +18,7 @@ class CareerConsoleUI:
             print("3. Показать среднюю зарплату")
             print("4. Показать вакансии с зарплатой выше средней")
             print("5. Поиск вакансий по ключевому слову")
+            print("6. Аналитика навыков")
             print("0. Выход")
 
             choice = input("Выберите действие: ").strip()
@@ -30,6 +33,8 @@ class CareerConsoleUI:
                 self.show_high_salary_vacancies()
             elif choice == "5":
                 self.search_vacancies()
+            elif choice == "6":
+                self.show_skills_menu()
             elif choice == "0":
                 print("До свидания!")
                 break
@@ -49,68 +54,129 @@ class CareerConsoleUI:
             for name, count in companies:
                 print(f"- {name}: {count} вакансий")
 
-    def show_all_vacancies(self):
-        """Показывает все вакансии"""
-        with DBManager(self.db_name) as db:
-            vacancies = db.get_all_vacancies()
-
-            if not vacancies:
-                print("Нет данных о вакансиях")
-                return
+    def print_vacancies(self, vacancies: Iterable[Tuple], header: str, empty_message: str) -> int:
+        """Постранично выводит вакансии по мере их чтения из БД.
 
-            print("\nВсе вакансии:")
+        vacancies читаются в строгом режиме: обрыв чтения (ConnectionError) сообщается, а не выглядит
+        как конец списка.
+        """
+        shown = 0
+        try:
             for company, title, min_sal, max_sal, currency, url in vacancies:
+                if shown == 0:
+                    print(header)
+                elif shown % self.page_size == 0:
+                    answer = input("Enter — следующая страница, 0 — вернуться в меню: ").strip()
+                    if answer == "0":
+                        break
+
                 salary_info = self.format_salary(min_sal, max_sal, currency)
                 print(f"Компания: {company}, Вакансия: {title}")
                 print(f"Зарплата: {salary_info}")
                 print(f"Ссылка: {url}\n")
+                shown += 1
+        except ConnectionError as e:
+            print(f"⚠️ Вывод прерван: {e}. Показано вакансий: {shown}, список неполный")
+            return shown
+
+        if shown == 0:
+            print(empty_message)
+        return shown
+
+    def show_all_vacancies(self):
+        """Показывает все вакансии"""
+        with DBManager(self.db_name) as db:
+            self.print_vacancies(db.iter_all_vacancies(strict=True), "\nВсе вакансии:", "Нет данных о вакансиях")
 
     def show_avg_salary(self):
         """Показывает среднюю зарплату"""
         with DBManager(self.db_name) as db:
-            avg_salary = db.get_avg_salary()
-
-            if avg_salary:
-                print(f"\nСредняя зарплата: {avg_salary:.2f} RUB")
+            stats = db.get_salary_stats()
+
+            if stats and stats["avg_salary"]:
+                print(f"\nСредняя зарплата: {stats['avg_salary']:.2f} RUB")
+                print(f"Медиана: {stats['median_salary']:.2f} RUB")
+                print(f"25-75 перцентили: {stats['p25_salary']:.2f} - {stats['p75_salary']:.2f} RUB")
+                print(f"Вакансий с указанной вилкой: {stats['salary_count']} из {stats['vacancy_count']}")
+                if stats["currency_counts"]:
+                    currencies = ", ".join(f"{code}: {count}" for code, count in stats["currency_counts"].items())
+                    print(f"Валюты: {currencies}")
             else:
                 print("\nНедостаточно данных для расчёта зарплаты")
 
     def show_high_salary_vacancies(self):
         """Показывает вакансии с зарплатой выше средней"""
         with DBManager(self.db_name) as db:
-            vacancies = db.get_vacancies_with_higher_salary()
-
-            if not vacancies:
-                print("Нет вакансий с зарплатой выше средней")
-                return
-
-            print("\nВакансии с зарплатой выше средней:")
-            for company, title, min_sal, max_sal, currency, url in vacancies:
-                salary_info = self.format_salary(min_sal, max_sal, currency)
-                print(f"Компания: {company}, Вакансия: {title}")
-                print(f"Зарплата: {salary_info}")
-                print(f"Ссылка: {url}\n")
+            self.print_vacancies(
+                db.iter_vacancies_with_higher_salary(strict=True),
+                "\nВакансии с зарплатой выше средней:",
+                "Нет вакансий с зарплатой выше средней",
+            )
 
     def search_vacancies(self):
         """Ищет вакансии по ключевому слову"""
-        keyword = input("Введите ключевое слово: ").strip()
+        keyword = input("Введите ключевые слова (через пробел — все сразу, через запятую — любое): ").strip()
         if not keyword:
             print("Ключевое слово не может быть пустым")
             return
 
         with DBManager(self.db_name) as db:
-            vacancies = db.get_vacancies_with_keyword(keyword)
-
-            if not vacancies:
-                print(f"По запросу '{keyword}' вакансий не найдено")
-                return
+            self.print_vacancies(
+                db.iter_vacancies_with_keyword(keyword, strict=True),
+                f"\nРезультаты поиска по '{keyword}':",
+                f"По запросу '{keyword}' вакансий не найдено",
+            )
+
+    def show_skills_menu(self):
+        """Аналитика по ключевым навыкам вакансий (индекс навыков, требуется numpy)"""
+        from core.services.skill_index import load_skill_index
+
+        try:
+            index = load_skill_index(self.db_name)
+        except (ImportError, ConnectionError) as e:
+            print(f"Аналитика навыков недоступна: {e}")
+            return
+        if not len(index):
+            print("Нет вакансий с ключевыми навыками: сначала загрузите подробности вакансий")
+            return
 
-            print(f"\nРезультаты поиска по '{keyword}':")
-            for company, title, min_sal, max_sal, currency, url in vacancies:
-                salary_info = self.format_salary(min_sal, max_sal, currency)
-                print(f"Компания: {company}, Вакансия: {title}")
-                print(f"Зарплата: {salary_info}")
-                print(f"Ссылка: {url}\n")
+        print("\n1. Самые востребованные навыки")
+        print("2. Зарплаты по навыкам")
+        print("3. Навыки, которые требуют вместе с указанным")
+        print("4. Вакансии по набору навыков")
+        choice = input("Выберите действие: ").strip()
+        try:
+            if choice == "1":
+                print("\nСамые востребованные навыки:")
+                for row in index.top_skills():
+                    print(f"- {row['skill']}: {row['vacancy_count']} вакансий ({row['share']:.0%})")
+            elif choice == "2":
+                print("\nНавыки с самой высокой медианной зарплатой (RUB):")
+                for row in index.skill_salaries():
+                    print(
+                        f"- {row['skill']}: медиана {row['p50']:.0f}, 25-75 перцентили {row['p25']:.0f} -"
+                        f" {row['p75']:.0f} (вакансий с зарплатой: {row['salary_count']})"
+                    )
+            elif choice == "3":
+                skill = input("Навык: ").strip()
+                result = index.cooccurrence(skill)
+                base = result["skill"]
+                print(f"\nВместе с «{base['skill']}» ({base['vacancy_count']} вакансий) требуют:")
+                for row in result["together"]:
+                    print(f"- {row['skill']}: {row['share']:.0%} вакансий, в {row['lift']:.1f} раза чаще среднего")
+            elif choice == "4":
+                all_of = [skill for skill in input("Все навыки (через запятую): ").split(",") if skill.strip()]
+                any_of = [skill for skill in input("Хотя бы один из (через запятую): ").split(",") if skill.strip()]
+                result = index.filter_vacancies(all_of, any_of, limit=None)
+                print(f"\nНайдено вакансий: {result['vacancy_count']}, медианная зарплата: {result['p50'] or '—'}")
+                with DBManager(self.db_name) as db:
+                    self.print_vacancies(
+                        db.get_vacancies_by_ids(result["vacancy_ids"]), "", "Вакансий с такими навыками не найдено"
+                    )
+            else:
+                print("Неверный ввод")
+        except KeyError as e:
+            print(e.args[0])
 
     @staticmethod
     def format_salary(min_sal: int, max_sal: int, currency: str) -> str:
@@ -1,11 +1,28 @@
 from configparser import ConfigParser
+from functools import lru_cache
+from typing import Optional
 import os
+import re
+
+
+DB_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "database.ini")
+
+DEFAULT_API_BASE_URL = "https://api.hh.ru"
+
+STORAGE_BACKENDS = ("postgres", "duckdb", "sqlite")
 
 
 def get_db_config(section: str = "postgresql") -> dict:
     """Возвращает конфигурацию базы данных с указанием кодировки"""
+    # Файл читается один раз за процесс, вызывающему отдаём копию для изменения
+    return dict(_read_db_config(section))
+
+
+@lru_cache(maxsize=None)
+def _read_db_config(section: str) -> dict:
+    """Читает секцию database.ini с диска"""
     config = ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), "..", "..", "database.ini")
+    config_path = DB_CONFIG_PATH
 
     try:
         with open(config_path, "r", encoding="utf-8") as f:
@@ -26,8 +43,196 @@ def get_db_config(section: str = "postgresql") -> dict:
     return dict(config[section])
 
 
+def get_storage_config() -> dict:
+    """Возвращает хранилище данных: PostgreSQL из database.ini или встроенная БД в локальном файле.
+
+    Без database.ini (и без HH_DB_BACKEND) данные хранятся во встроенной БД: DuckDB, если он установлен,
+    иначе SQLite из стандартной библиотеки.
+    """
+    backend = os.environ.get("HH_DB_BACKEND", "").lower()
+    if backend and backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Неизвестное хранилище HH_DB_BACKEND={backend} (доступны: {', '.join(STORAGE_BACKENDS)})")
+    return {
+        "backend": backend or ("postgres" if os.path.exists(DB_CONFIG_PATH) else "embedded"),
+        # Каталог файлов встроенной БД: <db_name>.duckdb или <db_name>.sqlite3 (по умолчанию в корне проекта,
+        # как .cache и .archive, чтобы запуск из другого каталога не создавал новую пустую БД)
+        "data_dir": os.environ.get("HH_DB_DIR") or os.path.join(os.path.dirname(__file__), "..", "..", ".data"),
+    }
+
+
+def get_pool_config() -> dict:
+    """Возвращает параметры пула соединений с БД"""
+    return {
+        "min_connections": 1,
+        "max_connections": 10,
+        # Соединение, простаивавшее дольше этого времени (с), проверяется перед выдачей
+        "health_check_interval": 30.0,
+    }
+
+
 def get_api_config() -> dict:
     """Возвращает конфигурацию API"""
     return {
-        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+        # Переопределяется переменной окружения, например для локального mock-сервера
+        "base_url": os.environ.get("HH_API_BASE_URL", DEFAULT_API_BASE_URL),
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+        # Общий лимит запросов в секунду для всех потоков загрузки
+        "requests_per_second": 5.0,
+        # Максимум одновременных запросов в асинхронном режиме загрузки
+        "max_concurrency": 100,
+        # Размер пула HTTP-соединений requests (не меньше числа рабочих потоков)
+        "pool_maxsize": 32,
+        "timeout": 15.0,
+        # Повторы временных сбоев (429, 5xx, таймауты) с экспоненциальной задержкой
+        "max_retries": 4,
+        "backoff_base": 0.5,
+        "backoff_cap": 30.0,
+        # Размыкатель: сколько сбоев подряд приостанавливают все запросы и на сколько секунд
+        "breaker_threshold": 5,
+        "breaker_cooldown": 30.0,
+        # Дольше этого рабочий поток паузу не ждёт, а возвращает задачу в очередь
+        "breaker_max_wait": 120.0,
+    }
+
+
+def api_data_dir(directory: str, base_url: Optional[str] = None) -> str:
+    """Каталог данных, полученных из API: кэша, архива ответов и результатов поиска работодателей.
+
+    Ответы другого адреса API (например, имитации из benchmarks/mock_hh.py) хранятся в подкаталоге
+    hosts/<адрес> и не смешиваются с ответами api.hh.ru.
+    """
+    base_url = (base_url or get_api_config()["base_url"]).rstrip("/")
+    if base_url == DEFAULT_API_BASE_URL:
+        return directory
+    return os.path.join(directory, "hosts", re.sub(r"[^\w.-]+", "_", base_url.split("://", 1)[-1]))
+
+
+def get_cache_config(base_url: Optional[str] = None) -> dict:
+    """Возвращает параметры дискового кэша ответов API (base_url — адрес API, по умолчанию из настроек)"""
+    cache_dir = api_data_dir(os.path.join(os.path.dirname(__file__), "..", "..", ".cache"), base_url)
+    return {
+        "enabled": os.environ.get("HH_CACHE", "1") != "0",
+        # Офлайн-режим: все ответы только из кэша, без обращения к сети
+        "offline": os.environ.get("HH_OFFLINE", "0") == "1",
+        "path": os.path.join(cache_dir, "hh_responses.sqlite"),
+        "max_bytes": 512 * 1024 * 1024,
+        # Время жизни ответов по префиксу пути (с); 0 — всегда ревалидировать через ETag/Last-Modified
+        "ttls": {
+            "/employers/": 7 * 24 * 3600,
+            "/employers": 24 * 3600,
+            # Подробности запрашиваются только для изменившихся вакансий — всегда ревалидируем
+            "/vacancies/": 0,
+            "/vacancies": 3600,
+            "/dictionaries": 24 * 3600,
+        },
+    }
+
+
+def get_archive_config(base_url: Optional[str] = None) -> dict:
+    """Возвращает параметры архива исходных ответов API (base_url — адрес API, по умолчанию из настроек)"""
+    return {
+        "enabled": os.environ.get("HH_ARCHIVE", "1") != "0",
+        "path": api_data_dir(os.path.join(os.path.dirname(__file__), "..", "..", ".archive"), base_url),
+        # zstd, если установлен пакет zstandard, иначе zlib
+        "codec": os.environ.get("HH_ARCHIVE_CODEC") or None,
+        # Размер несжатого блока: блок сжимается целиком и читается одним обращением к диску
+        "block_bytes": 1024 * 1024,
+        "segment_bytes": 256 * 1024 * 1024,
+        # Разбор блоков при повторной обработке идёт в отдельных процессах
+        "reprocess_workers": os.cpu_count() or 1,
+        "reprocess_batch_size": 5000,
+    }
+
+
+def get_ingestion_config() -> dict:
+    """Возвращает параметры параллельной загрузки данных"""
+    return {
+        "workers": 4,
+        # Через сколько загруженных работодателей обновлять материализованную статистику
+        "stats_batch_size": 50,
+        # Сколько страниц вакансий может ждать записи в асинхронном режиме
+        "write_queue_size": 32,
+        # Сколько раз возвращать в очередь компании, упавшие из-за временных сбоев API
+        "max_requeue_rounds": 2,
+        # Пауза перед повтором (с); в очереди задания удваивается с каждой попыткой
+        "requeue_delay": 10.0,
+        # Через сколько секунд захваченная, но не завершённая компания считается брошенной упавшим процессом
+        "stale_claim_timeout": 600.0,
+    }
+
+
+def get_enrichment_config() -> dict:
+    """Возвращает параметры загрузки подробностей вакансий (/vacancies/{id})"""
+    return {
+        # Потоки делят общий лимит частоты запросов клиента API
+        "workers": 8,
+        # Сколько вакансий записывать в БД одной транзакцией
+        "batch_size": 100,
+    }
+
+
+def get_crawler_config() -> dict:
+    """Возвращает параметры обхода рынка через поиск /vacancies"""
+    return {
+        # Срезы выдачи обрабатываются параллельно и делят общий лимит частоты запросов клиента API
+        "workers": 4,
+        # Сколько раз возвращать в очередь срез, упавший из-за временного сбоя API
+        "max_attempts": 3,
+        # Пауза перед повтором среза (с), удваивается с каждой попыткой
+        "retry_delay": 10.0,
+        # Через сколько секунд захваченный, но не завершённый срез считается брошенным упавшим процессом
+        "stale_claim_timeout": 600.0,
+    }
+
+
+def get_analytics_config() -> dict:
+    """Возвращает параметры аналитического снимка вакансий"""
+    return {
+        # Каталог для снимков (npz); файл сбрасывается при обновлении salary_stats
+        "cache_dir": os.path.join(os.path.dirname(__file__), "..", "..", ".cache"),
+        "top_keywords": 20,
+        "histogram_bins": 20,
+        "top_skills": 20,
+        # Навыки с меньшим числом вакансий с зарплатой не попадают в рейтинг зарплат (шум)
+        "skill_min_salaries": 5,
+    }
+
+
+def get_transfer_config() -> dict:
+    """Возвращает параметры выгрузки и загрузки таблиц в файлы"""
+    return {
+        # None — parquet, если установлен pyarrow, иначе csv
+        "format": None,
+        # Сколько строк читается из курсора или файла за раз (ограничивает память)
+        "chunk_size": 20000,
+    }
+
+
+def get_employer_index_config(base_url: Optional[str] = None) -> dict:
+    """Возвращает параметры локального индекса названий работодателей (base_url — адрес API)"""
+    project_root = os.path.join(os.path.dirname(__file__), "..", "..")
+    cache_dir = api_data_dir(os.path.join(project_root, ".cache"), base_url)
+    return {
+        "companies_path": os.path.join(project_root, "data", "companies.json"),
+        "employers_file": os.path.join(project_root, "employers.txt"),
+        # Сохранённые результаты поиска работодателей в API (включая «не найдено»)
+        "cache_path": os.path.join(cache_dir, "employer_lookups.json"),
+        # Минимальное сходство названий для нечёткого совпадения (difflib, 0..1)
+        "fuzzy_cutoff": 0.88,
+        # Через сколько секунд повторять поиск названия, которое API не нашёл
+        "miss_ttl": 7 * 24 * 3600,
+    }
+
+
+def get_observability_config() -> dict:
+    """Возвращает параметры журналирования, метрик и профилирования"""
+    return {
+        # text — сообщения как есть (по умолчанию), json — одна JSON-запись на строку
+        "log_format": os.environ.get("HH_LOG_FORMAT", "text"),
+        "log_level": os.environ.get("HH_LOG_LEVEL", "INFO"),
+        # Границы интервалов гистограмм: длительность (с) и число строк в пакете записи
+        "latency_buckets": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+        "row_buckets": (1, 10, 50, 100, 250, 500, 1000, 5000, 10000),
+        # Период опроса стеков потоков сэмплирующим профилировщиком (с)
+        "sampling_interval": 0.005,
     }
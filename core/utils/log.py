@@ -0,0 +1,73 @@
+"""Журналирование приложения: текстовый вывод как раньше у print или JSON-записи для сборщиков логов.
+
+Все логгеры проекта — потомки "career". Поля из extra={...} попадают в JSON-запись как есть.
+"""
+
+import json
+import logging
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+from core.utils.config_loader import get_observability_config
+
+ROOT_LOGGER = "career"
+
+# Стандартные атрибуты LogRecord: всё остальное пришло из extra и выводится как поля записи
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configure_lock = threading.Lock()
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Пишет в текущий sys.stdout (учитывает contextlib.redirect_stdout в CLI)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-запись на строку: время, уровень, логгер, сообщение и поля extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage().strip(),
+            "thread": record.threadName,
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(fmt: Optional[str] = None, level: Optional[str] = None) -> logging.Logger:
+    """Настраивает вывод логгеров проекта (повторный вызов заменяет прежние настройки)"""
+    config = get_observability_config()
+    fmt = fmt or config["log_format"]
+    handler = StdoutHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    with _configure_lock:
+        for old_handler in list(logger.handlers):
+            logger.removeHandler(old_handler)
+        logger.addHandler(handler)
+        logger.setLevel((level or config["log_level"]).upper())
+        # Сообщения не дублируются корневым логгером, если приложение настроило его само
+        logger.propagate = False
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Логгер модуля; при первом использовании без явной настройки включается текстовый вывод"""
+    if not logging.getLogger(ROOT_LOGGER).handlers:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name.rsplit('.', 1)[-1]}")
@@ -0,0 +1,211 @@
+"""Счётчики и гистограммы процесса: задержка HTTP по эндпоинтам, объём ответов, строки пакетной записи,
+время запросов DBManager.
+
+Значения копятся в общем реестре REGISTRY и выгружаются в текстовом формате Prometheus или JSON-сводкой.
+"""
+
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+from core.utils.config_loader import get_observability_config
+
+# Числовые сегменты пути заменяются шаблоном, чтобы /employers/1740 и /employers/3529 были одной серией
+_PATH_ID_RE = re.compile(r"/\d+(?=/|$)")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def endpoint_label(path: str) -> str:
+    """Путь запроса без параметров и ID: /employers/1740?x=1 → /employers/{id}"""
+    return _PATH_ID_RE.sub("/{id}", path.split("?", 1)[0]) or "/"
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Распределение значений по интервалам (как histogram в Prometheus)"""
+
+    __slots__ = ["bounds", "bucket_counts", "count", "total", "max"]
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.bucket_counts = [0] * len(self.bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """Пары (граница, число значений не больше неё)"""
+        running = 0
+        for bound, count in zip(self.bounds, self.bucket_counts):
+            running += count
+            yield bound, running
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр счётчиков и гистограмм с метками"""
+
+    __slots__ = ["_counters", "_histograms", "_help", "_lock"]
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Задаёт описание метрики для выгрузки в Prometheus"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Увеличивает счётчик"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None, **labels) -> None:
+        """Добавляет значение в гистограмму (границы задаются при первом наблюдении)"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets or get_observability_config()["latency_buckets"])
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Замеряет длительность блока в секундах (и при исключении)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def summary(self) -> dict:
+        """JSON-сводка: значения счётчиков и count/sum/mean/max гистограмм по каждому набору меток"""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(labels), "value": value} for labels, value in sorted(series.items())]
+                    for name, series in sorted(self._counters.items())
+                },
+                "histograms": {
+                    name: [{"labels": dict(labels), **hist.to_dict()} for labels, hist in sorted(series.items())]
+                    for name, series in sorted(self._histograms.items())
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Выгрузка в текстовом формате Prometheus (exposition format 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{_format_labels(labels)} {value:g}" for labels, value in sorted(series.items()))
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, fmt: Optional[str] = None) -> None:
+        """Сохраняет метрики в файл: JSON для *.json (или fmt="json"), иначе формат Prometheus"""
+        fmt = fmt or ("json" if path.endswith(".json") else "prometheus")
+        with open(path, "w", encoding="utf-8") as f:
+            if fmt == "json":
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+REGISTRY = MetricsRegistry()
+
+REGISTRY.describe("hh_http_request_seconds", "Длительность запроса к API hh.ru по эндпоинту и статусу")
+REGISTRY.describe("hh_http_response_bytes_total", "Объём тел ответов API hh.ru")
+REGISTRY.describe("hh_http_retries_total", "Повторы запросов к API после временных сбоев")
+REGISTRY.describe("hh_json_decode_seconds", "Разбор JSON ответов API")
+REGISTRY.describe("ingest_parse_seconds", "Построение моделей из ответов API (Vacancy.from_api_response)")
+REGISTRY.describe("archive_records_total", "Ответы API в архиве по итогу: stored, duplicate, failed")
+REGISTRY.describe("archive_bytes_total", "Объём сжатых блоков, дописанных в архив ответов API")
+REGISTRY.describe("crawl_slices_total", "Срезы выдачи обхода рынка по итогу: done, split, truncated, retried, failed")
+REGISTRY.describe("db_query_seconds", "Длительность методов DBManager")
+REGISTRY.describe("db_batch_rows", "Число строк в пакете записи")
+REGISTRY.describe("db_rows_written_total", "Строки пакетной записи по итогу: inserted, updated, skipped, failed")
+
+
+def timed_method(name: str):
+    """Декоратор: время каждого вызова метода в гистограмму name с меткой method.
+
+    Для генераторов время считается до исчерпания (или закрытия) итератора, а не до его создания.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = function(*args, **kwargs)
+            if hasattr(result, "__next__") and hasattr(result, "close"):
+                return _timed_iterator(result, name, function.__name__, started)
+            REGISTRY.observe(name, time.perf_counter() - started, method=function.__name__)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _timed_iterator(iterator, name: str, method: str, started: float):
+    try:
+        yield from iterator
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - started, method=method)
@@ -0,0 +1,142 @@
+"""Профилирование целого запуска загрузки: cProfile (детерминированный) или сэмплирующий профилировщик.
+
+Оба режима учитывают рабочие потоки пула, а не только главный поток.
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+from core.utils.config_loader import get_observability_config
+from core.utils.log import get_logger
+
+PROFILERS = ("cprofile", "sampling")
+
+logger = get_logger(__name__)
+
+
+class ThreadedProfile:
+    """cProfile для главного и всех потоков, запущенных во время профилирования"""
+
+    __slots__ = ["profiles", "_lock"]
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def _new_profile(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        return profile
+
+    def _bootstrap(self, frame, event, arg):
+        # Первый вызов в новом потоке: заменяем временный хук профилировщиком этого потока
+        sys.setprofile(None)
+        self._new_profile().enable()
+
+    def start(self) -> None:
+        if sys.version_info >= (3, 12):
+            # cProfile на sys.monitoring видит все потоки сразу и допускает только один активный профиль
+            self._new_profile().enable()
+            return
+        threading.setprofile(self._bootstrap)
+        self._new_profile().enable()
+
+    def stop(self) -> pstats.Stats:
+        threading.setprofile(None)
+        for profile in self.profiles:
+            profile.disable()
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+class SamplingProfiler:
+    """Периодически снимает стеки всех потоков (sys._current_frames) и считает одинаковые стеки.
+
+    Результат — свёрнутые стеки «func;func;func count», формат flamegraph.pl и speedscope.
+    """
+
+    __slots__ = ["interval", "samples", "_stop", "_thread"]
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or get_observability_config()["sampling_interval"]
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profiled(path: Optional[str], profiler: str = "cprofile", top: int = 25):
+    """Профилирует блок и сохраняет результат в path (без path ничего не делает).
+
+    cprofile — файл pstats (snakeviz, python -m pstats), в лог выводятся самые затратные функции;
+    sampling — свёрнутые стеки для flamegraph.
+    """
+    if not path:
+        yield
+        return
+    if profiler not in PROFILERS:
+        raise ValueError(f"Неизвестный профилировщик: {profiler} (доступны: {', '.join(PROFILERS)})")
+
+    started = time.perf_counter()
+    if profiler == "sampling":
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(path)
+            logger.info(
+                f"🔬 Профиль ({sum(sampler.samples.values())} снимков стеков) сохранён в {path}",
+                extra={"profile_path": path, "elapsed_seconds": round(time.perf_counter() - started, 3)},
+            )
+        return
+
+    profile = ThreadedProfile()
+    profile.start()
+    try:
+        yield
+    finally:
+        stats = profile.stop()
+        stats.dump_stats(path)
+        logger.info(
+            f"🔬 Профиль сохранён в {path}",
+            extra={"profile_path": path, "elapsed_seconds": round(time.perf_counter() - started, 3)},
+        )
+        # Сводка самых затратных функций — в тот же поток вывода, что и остальная диагностика
+        stats.stream = sys.stdout
+        stats.sort_stats("cumulative").print_stats(top)
@@ -1,37 +1,14 @@
-from core.database.db_handler import initialize_database
-from core.services.data_processor import DataProcessor
-from core.ui.console_ui import CareerConsoleUI
-
-# Предопределенные ID известных компаний (можно расширять)
-PREDEFINED_EMPLOYERS = {
-    "yandex": "1740",  # Яндекс
-    "sber": "3529",  # Сбер
-    "tinkoff": "78638",  # Тинькофф
-    "vk": "41862",  # VK
-    "alfa": "80",  # Альфа-Банк
-    "mts": "15478",  # МТС
-    "megafon": "3776",  # МегаФон
-    "ozon": "907345",  # Ozon
-    "kaspersky": "2180",  # Лаборатория Касперского
-    "sbertech": "87021",  # СберТех
-}
+import asyncio
+import os
+import sys
+from core.services.employer_index import PREDEFINED_EMPLOYERS
+from core.ui.cli import read_employer_ids, run
 
 
 def load_employers_from_file(filename: str = "employers.txt") -> list:
     """Загружает ID компаний из текстового файла с поддержкой UTF-8"""
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            employer_ids = []
-            for line in f:
-                line = line.strip()
-                # Пропускаем пустые строки и комментарии
-                if not line or line.startswith("#"):
-                    continue
-                # Извлекаем ID из строки (разделитель - пробел или табуляция)
-                parts = line.split()
-                if parts:
-                    employer_ids.append(parts[0])
-            return employer_ids
+        return read_employer_ids(filename)
     except FileNotFoundError:
         print(f"Файл {filename} не найден. Используются стандартные компании.")
         return list(PREDEFINED_EMPLOYERS.values())
@@ -41,6 +18,11 @@ def load_employers_from_file(filename: str = "employers.txt") -> list:
 
 
 def main():
+    # Тяжёлые зависимости (psycopg2, requests) нужны только интерактивному режиму
+    from core.database.db_handler import initialize_database
+    from core.services.data_processor import DataProcessor
+    from core.ui.console_ui import CareerConsoleUI
+
     # Инициализация БД
     db_name = "career_db"
     initialize_database(db_name)
@@ -50,6 +32,7 @@ def main():
     print("1. Использовать предопределенные ID компаний")
     print("2. Загрузить ID из файла")
     print("3. Ввести названия компаний вручную")
+    print("4. Загрузить ID из файла асинхронно (требуются aiohttp и asyncpg)")
 
     choice = input("Выберите вариант загрузки: ").strip()
 
@@ -62,7 +45,8 @@ def main():
         filename = input("Введите имя файла (по умолчанию employers.txt): ").strip() or "employers.txt"
         employer_ids = load_employers_from_file(filename)
         print(f"Загружено {len(employer_ids)} компаний из файла")
-        processor.load_by_ids(employer_ids)
+        # Загрузка из файла идёт через очередь задания: прерванный запуск продолжится с места остановки
+        processor.load_by_ids(employer_ids, job_name=f"file:{os.path.abspath(filename)}")
 
     elif choice == "3":
         names_input = input("Введите названия компаний через запятую: ").strip()
@@ -73,6 +57,12 @@ def main():
         print(f"Поиск данных для {len(company_names)} компаний...")
         processor.load_by_names(company_names)
 
+    elif choice == "4":
+        filename = input("Введите имя файла (по умолчанию employers.txt): ").strip() or "employers.txt"
+        employer_ids = load_employers_from_file(filename)
+        print(f"Загружено {len(employer_ids)} компаний из файла")
+        asyncio.run(processor.load_by_ids_async(employer_ids))
+
     else:
         print("Неверный выбор!")
         return
@@ -83,4 +73,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # С аргументами — неинтерактивный CLI (python main.py --help), без аргументов — меню
+    if len(sys.argv) > 1:
+        sys.exit(run(sys.argv[1:]))
     main()
@@ -0,0 +1,120 @@
+"""Асинхронный клиент API против локальной имитации hh.ru (benchmarks/mock_hh.py)"""
+
+import asyncio
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from benchmarks.mock_hh import MockHHServer  # noqa: E402
+from benchmarks.synthetic import SyntheticDataset  # noqa: E402
+from core.services.api import MAX_SEARCH_DEPTH, VacancyListing  # noqa: E402
+from core.services.async_api import AsyncHeadHunterAPI  # noqa: E402
+from core.services.rate_limiter import AsyncTokenBucket  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    # Крупные работодатели упираются в max_per_employer: их выдача не помещается в лимит глубины
+    return SyntheticDataset(60_000, seed=7, mean_per_employer=6_000, max_per_employer=5_000)
+
+
+@pytest.fixture(scope="module")
+def server(dataset):
+    with MockHHServer(dataset) as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    # Ответы имитации не должны попадать в архив проекта
+    monkeypatch.setenv("HH_ARCHIVE", "0")
+
+
+def employer_with(dataset, predicate):
+    """ID первого работодателя, число вакансий которого удовлетворяет predicate"""
+    for index, employer_id in enumerate(dataset.employer_ids):
+        if predicate(dataset.offsets[index + 1] - dataset.offsets[index]):
+            return employer_id
+    pytest.skip("в наборе нет подходящего работодателя")
+
+
+def expected_ids(dataset, employer_id):
+    return {item["id"] for _, _, item in dataset.employer_vacancies(dataset.employer_index(employer_id))}
+
+
+def fetch_vacancies(base_url, employer_id, listing):
+    """Собирает ID всех вакансий работодателя через AsyncHeadHunterAPI"""
+
+    async def run():
+        async with AsyncHeadHunterAPI(max_concurrency=8, base_url=base_url) as api:
+            api.rate_limiter = AsyncTokenBucket(1000.0)
+            ids = []
+            async for page in api.iter_vacancies_by_employer_id(employer_id, listing):
+                ids.extend(item["id"] for item in page)
+            return ids
+
+    return asyncio.run(run())
+
+
+def test_fetches_all_pages_of_small_employer(server, dataset):
+    employer_id = employer_with(dataset, lambda count: 100 < count <= MAX_SEARCH_DEPTH)
+    listing = VacancyListing()
+
+    ids = fetch_vacancies(server.url, employer_id, listing)
+
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected_ids(dataset, employer_id)
+    assert listing.complete
+
+
+def test_splits_listing_over_search_depth_by_area(server, dataset):
+    # Самый крупный регион (45%) такого работодателя помещается в лимит: хватает разбиения по регионам
+    employer_id = employer_with(dataset, lambda count: MAX_SEARCH_DEPTH < count <= 4000)
+    listing = VacancyListing()
+
+    ids = fetch_vacancies(server.url, employer_id, listing)
+
+    assert set(ids) == expected_ids(dataset, employer_id)
+    assert listing.complete
+
+
+def test_reports_date_split_as_incomplete(server, dataset):
+    # Регион крупнее лимита делится по датам: окна покрывают только SEARCH_PERIOD, выдача считается неполной
+    employer_id = employer_with(dataset, lambda count: count >= 4800)
+    listing = VacancyListing()
+
+    ids = fetch_vacancies(server.url, employer_id, listing)
+
+    assert set(ids) == expected_ids(dataset, employer_id)
+    assert not listing.complete
+    assert "дней" in listing.reason
+
+
+def test_employer_info(server, dataset):
+    employer_id = dataset.employer_ids[0]
+
+    async def run():
+        async with AsyncHeadHunterAPI(base_url=server.url) as api:
+            return await api.test_connection(), await api.get_employer_info(employer_id)
+
+    connected, info = asyncio.run(run())
+
+    assert connected
+    assert info == dataset.employer(0)
+
+
+def test_page_errors_propagate(dataset):
+    employer_id = dataset.employer_ids[0]
+
+    async def run():
+        async with AsyncHeadHunterAPI(base_url=mock.url) as api:
+            assert not await api.test_connection()
+            assert await api.get_employer_info(employer_id) is None
+            async for _ in api.iter_vacancies_by_employer_id(employer_id):
+                pass
+
+    with MockHHServer(dataset, error_rate=1.0) as mock:
+        with pytest.raises(aiohttp.ClientResponseError) as error:
+            asyncio.run(run())
+
+    assert error.value.status == 503
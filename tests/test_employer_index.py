@@ -0,0 +1,112 @@
+"""Локальный индекс названий работодателей: нормализация, транслитерация, нечёткий поиск и расхождения источников"""
+
+import pytest
+from core.services.employer_index import EmployerIndex, name_keys, normalize_name
+
+
+@pytest.fixture
+def index():
+    # Без cache_path результаты поиска в API не пишутся на диск
+    index = EmployerIndex()
+    index.add("ООО «Яндекс»", "1740", "companies.json")
+    index.add("Тинькофф", "78638", "companies.json")
+    return index
+
+
+def test_normalize_name_drops_legal_forms_and_punctuation():
+    assert normalize_name("ПАО «Сбербанк»") == "сбербанк"
+    assert normalize_name("Ёлка LLC") == "елка"
+    assert name_keys("Яндекс") == ["яндекс", "yandex"]
+
+
+@pytest.mark.parametrize("name", ["Яндекс", "яндекс", "ЯНДЕКС ООО", "АО Яндекс", "Yandex"])
+def test_exact_match_by_normalized_or_transliterated_key(index, name):
+    match = index.lookup(name)
+
+    assert match.employer_id == "1740"
+    assert match.score == 1.0
+    assert match.source == "companies.json"
+
+
+def test_fuzzy_match(index):
+    match = index.lookup("Тинькоф")
+
+    assert match.employer_id == "78638"
+    assert index.fuzzy_cutoff <= match.score < 1.0
+
+
+def test_unknown_name(index):
+    assert index.lookup("Рога и копыта") is None
+    assert index.lookup("") is None
+
+
+def test_name_with_conflicting_ids_is_not_resolved_locally():
+    index = EmployerIndex()
+    index.add("Сбер", "1122462", "companies.json")
+    index.add("sber", "3529", "predefined")
+    index.add("VK", "15478", "companies.json")
+    index.add("VK", "41862", "employers.txt")
+
+    assert index.lookup("Сбер") is None
+    assert index.lookup("sber") is None
+    assert index.lookup("VK") is None
+
+
+def test_id_recorded_under_different_companies_is_not_resolved_locally():
+    index = EmployerIndex()
+    index.add("МТС", "3776", "companies.json")
+    index.add("megafon", "3776", "predefined")
+
+    assert index.lookup("Мегафон") is None
+    assert index.lookup("МТС") is None
+
+
+def test_db_confirms_contested_name():
+    index = EmployerIndex()
+    index.add("Сбер", "1122462", "companies.json")
+    index.add("sber", "3529", "predefined")
+    index.add("Сбер", "3529", "db")
+
+    match = index.lookup("Сбер")
+
+    assert match.employer_id == "3529"
+    assert match.source == "db"
+
+
+def test_api_lookup_confirms_contested_name():
+    index = EmployerIndex()
+    index.add("VK", "15478", "companies.json")
+    index.add("VK", "41862", "employers.txt")
+
+    index.remember("VK", {"id": "15478", "name": "VK"})
+
+    assert index.lookup("VK").employer_id == "15478"
+    assert index.lookup("VK").source == "api"
+
+
+def test_remembered_miss(index):
+    index.remember("Рога и копыта", None)
+
+    assert index.is_recent_miss("рога и копыта")
+    assert index.lookup("Рога и копыта") is None
+
+
+def test_conflicts_report_matches_lookup():
+    index = EmployerIndex()
+    index.add("Сбер", "1122462", "companies.json")
+    index.add("sber", "3529", "known")
+    index.add("VK", "15478", "companies.json")
+    index.add("VK", "41862", "employers.txt")
+    index.add("VK", "15478", "db")
+    index.add("Яндекс", "1740", "companies.json")
+
+    report = {entry["key"]: entry for entry in index.conflicts() if entry["kind"] == "name"}
+
+    # «сбер» сравнивается вместе с транслитерированным «sber», как в lookup
+    assert set(report) == {"сбер", "sber", "vk"}
+    assert report["сбер"]["candidates"] == {"1122462": ["companies.json"], "3529": ["known"]}
+    for key, entry in report.items():
+        match = index.lookup(key)
+        assert entry["chosen"] == (match.employer_id if match else None)
+    assert report["сбер"]["chosen"] is None
+    assert report["vk"]["chosen"] == "15478"